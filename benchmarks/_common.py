@@ -0,0 +1,28 @@
+"""Helper bersama untuk script benchmark (jalankan dari root repo: python benchmarks/<script>.py)."""
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+# supaya `import app` jalan tanpa install (sama seperti tests: PYTHONPATH=movie_booking)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "movie_booking"))
+
+
+def timeit(fn: Callable[[], object], repeat: int = 200) -> Dict[str, float]:
+    """Jalankan fn `repeat` kali, kembalikan statistik latensi dalam mikrodetik."""
+    samples: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    return {
+        "mean_us": statistics.fmean(samples),
+        "p50_us": samples[len(samples) // 2],
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def row(*cols, width: int = 14) -> str:
+    return "".join(str(c).ljust(width) for c in cols)
@@ -0,0 +1,94 @@
+"""
+On-sale rush: N klien bersamaan memukul GET /showtimes/{id}/layout dan
+POST /cart/add + DELETE /cart/remove untuk satu showtime (app in-process via
+httpx ASGITransport, satu event loop). Beban dinaikkan 1x -> 10x, dibandingkan
+tanpa vs dengan waiting room (active_cap = jumlah klien pada 1x). Klien yang
+belum masuk terus mencoba (backoff 200ms) dan keluar dari antrean setelah
+selesai. Yang dilihat: p99 request user yang sudah masuk tetap datar, sisanya
+ditolak murah (429) sebelum routing/pydantic/crud.
+
+    python benchmarks/bench_admission.py
+"""
+import _common  # noqa: F401  (set sys.path)
+from _common import row
+
+import asyncio
+import time
+
+import httpx
+from fastapi.testclient import TestClient
+from app.main import app
+
+BASE_CLIENTS = 20
+ROUNDS = 10
+POLL_S = 0.2
+
+
+def _pct(samples, q):
+    if not samples:
+        return 0.0
+    samples.sort()
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+async def _client(http, sid, i, gated, admitted, rejected):
+    user, seat = f"u{i}", f"{chr(65 + i // 20)}{i % 20 + 1}"
+    headers = {"X-User-Id": user}
+    if gated:
+        # klien yang belum masuk terus mencoba layout (backoff kecil) sampai diizinkan
+        while True:
+            t0 = time.perf_counter()
+            r = await http.get(f"/showtimes/{sid}/layout", headers=headers)
+            if r.status_code != 429:
+                break
+            rejected.append((time.perf_counter() - t0) * 1e3)
+            await asyncio.sleep(POLL_S)
+    for _ in range(ROUNDS):
+        for method, url, kw in (
+            ("GET", f"/showtimes/{sid}/layout", {"headers": headers}),
+            ("POST", "/cart/add", {"json": {"user_id": user, "showtime_id": sid, "seats": [seat]}}),
+            ("DELETE", "/cart/remove", {"json": {"user_id": user, "seats": [seat]}}),
+        ):
+            t0 = time.perf_counter()
+            r = await http.request(method, url, **kw)
+            ms = (time.perf_counter() - t0) * 1e3
+            (rejected if r.status_code == 429 else admitted).append(ms)
+    if gated:
+        await http.delete(f"/showtimes/{sid}/queue/{user}")   # selesai -> kepala antrean naik
+
+
+async def _run(sid, clients, gated):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as http:
+        if gated:
+            await http.put(f"/admin/showtimes/{sid}/waiting-room", json={
+                "active_cap": BASE_CLIENTS, "rate": 1000, "burst": 1000, "queue_max": clients})
+            for i in range(clients):
+                await http.post(f"/showtimes/{sid}/queue", json={"user_id": f"u{i}"})
+        admitted, rejected = [], []
+        t0 = time.perf_counter()
+        await asyncio.gather(*(_client(http, sid, i, gated, admitted, rejected) for i in range(clients)))
+        elapsed = time.perf_counter() - t0
+        if gated:
+            await http.delete(f"/admin/showtimes/{sid}/waiting-room")
+    return admitted, rejected, elapsed
+
+
+def main() -> None:
+    client = TestClient(app)
+    mv = client.post("/admin/movies", json={"title": "Rush", "duration_min": 150}).json()
+    print(row("mode", "clients", "admitted", "rejected", "adm_p50", "adm_p99", "rej_p99", "req/s", width=12))
+    for gated in (False, True):
+        for mult in (1, 10):
+            sid = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+                "day": "2035-01-01", "time": f"{mult:02d}:{int(gated):02d}", "studio": "R",
+                "price": 50000, "rows": 20, "cols": 20}).json()["id"]
+            clients = BASE_CLIENTS * mult
+            admitted, rejected, elapsed = asyncio.run(_run(sid, clients, gated))
+            total = len(admitted) + len(rejected)
+            print(row("gated" if gated else "open", clients, len(admitted), len(rejected),
+                      f"{_pct(admitted, 0.5):.2f}ms", f"{_pct(admitted, 0.99):.2f}ms",
+                      f"{_pct(rejected, 0.99):.2f}ms", f"{total / elapsed:.0f}", width=12))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Sync vs async route: req/s dan latensi ekor di bawah banyak koneksi bersamaan.
+
+Dua server uvicorn dijalankan bergantian (app.main = route `def` lewat thread
+pool, app.aio_main = route `async def` di event loop) lalu dibanjiri campuran
+layout GET + reserve/batal kursi dari N koneksi paralel (default 1000).
+
+    python benchmarks/bench_async.py
+    python benchmarks/bench_async.py --connections 1000 --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import List
+
+import _common  # noqa: F401  (set sys.path)
+from _common import row
+from load import Recorder
+
+import httpx
+from app.shard_router import _free_port, _wait_ready
+
+ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "movie_booking")
+APPS = {"sync": "app.main:app", "async": "app.aio_main:app"}
+HALL = {"studio": "Bench", "price": 50000, "rows": 26, "cols": 20}
+
+
+def serve(target: str) -> tuple[str, subprocess.Popen]:
+    port = _free_port("127.0.0.1")
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", target, "--port", str(port),
+                             "--log-level", "warning", "--backlog", "4096"], cwd=ROOT)
+    url = f"http://127.0.0.1:{port}"
+    _wait_ready(url, proc, 20)
+    return url, proc
+
+
+async def drive(url: str, requests: int, connections: int, seed: int) -> dict:
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as c:
+        mv = (await c.post("/admin/movies", json={"title": "Bench", "duration_min": 90})).json()
+        slots = [{"day": "2033-01-01", "time": f"{h:02d}:00"} for h in range(8)]
+        shows: List[int] = [s["id"] for s in (await c.post(
+            f"/admin/movies/{mv['id']}/showtimes/bulk", json={"template": HALL, "slots": slots})).json()]
+
+        rec = Recorder()
+        todo = iter(range(requests))
+
+        async def worker(wid: int) -> None:
+            rng = random.Random(seed * 10000 + wid)
+            for n in todo:
+                sid = rng.choice(shows)
+                if rng.random() < 0.6:
+                    await rec.call(c, "GET layout", "GET", f"/showtimes/{sid}/layout")
+                    continue
+                user = f"u{n}"
+                seat = f"{chr(65 + rng.randrange(26))}{rng.randrange(20) + 1}"
+                r = await rec.call(c, "POST cart/add", "POST", "/cart/add",
+                                   json={"user_id": user, "showtime_id": sid, "seats": [seat]})
+                if r.status_code == 200:
+                    await rec.call(c, "DELETE cart/remove", "DELETE", "/cart/remove",
+                                   json={"user_id": user, "cart_item_id": r.json()["id"]})
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(w) for w in range(connections)))
+        return rec.summary(time.perf_counter() - t0)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--connections", type=int, default=1000)
+    p.add_argument("--requests", type=int, default=10000, help="jumlah operasi per mode")
+    p.add_argument("--seed", type=int, default=7)
+    args = p.parse_args()
+
+    print(f"cpus={os.cpu_count()} connections={args.connections} ops={args.requests}")
+    print(row("mode", "req/s", "errors", "endpoint", "p50_ms", "p99_ms", width=19))
+    for mode, target in APPS.items():
+        url, proc = serve(target)
+        try:
+            res = asyncio.run(drive(url, args.requests, args.connections, args.seed))
+        finally:
+            proc.terminate()
+            proc.wait()
+        for i, (label, ep) in enumerate(res["endpoints"].items()):
+            head = (mode, f"{res['throughput_rps']:.0f}", res["errors"]) if i == 0 else ("", "", "")
+            print(row(*head, label, f"{ep['p50_ms']:.1f}", f"{ep['p99_ms']:.1f}", width=19))
+
+
+if __name__ == "__main__":
+    main()
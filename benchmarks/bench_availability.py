@@ -0,0 +1,39 @@
+"""
+"Sisa kursi" untuk jadwal satu hari: satu panggilan /showtimes/availability
+(counter O(1) per showtime) vs cara lama, ambil peta kursi tiap showtime lalu
+hitung status di client.
+
+    python benchmarks/bench_availability.py
+"""
+import _common  # noqa: F401  (set sys.path)
+from _common import row, timeit
+
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+def main() -> None:
+    mv = client.post("/admin/movies", json={"title": "Avail", "duration_min": 90}).json()
+    print(row("showtimes", "bulk_p50", "per_seatmap_p50", "speedup", width=16))
+    for n in (10, 50, 200):
+        day = f"2036-01-{n % 28 + 1:02d}"
+        slots = [{"day": day, "time": f"{i // 60 % 24:02d}:{i % 60:02d}"} for i in range(n)]
+        shows = client.post(f"/admin/movies/{mv['id']}/showtimes/bulk", json={
+            "template": {"studio": "A", "price": 1000, "rows": 26, "cols": 20}, "slots": slots}).json()
+
+        bulk = timeit(lambda: client.get("/showtimes/availability", params={"day": day}).json(), repeat=50)
+
+        def per_seatmap():
+            for st in client.get("/admin/showtimes", params={"day": day, "limit": 1000}).json():
+                seats = client.get(f"/showtimes/{st['id']}/seats").json()
+                sum(1 for v in seats.values() if v == "available")
+        old = timeit(per_seatmap, repeat=5 if n > 50 else 20)
+        assert len(shows) == n
+        print(row(n, f"{bulk['p50_us'] / 1e3:.2f}ms", f"{old['p50_us'] / 1e3:.1f}ms",
+                  f"{old['p50_us'] / bulk['p50_us']:.0f}x", width=16))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Latensi best-available di studio penuh 26x20 (2 aisle) pada berbagai tingkat
+keterisian. `indexed` = run index yang di-patch per baris berubah; `rescan` =
+bangun ulang run semua baris tiap query (setara client yang scan layout penuh).
+
+    python benchmarks/bench_best_available.py
+"""
+import random
+
+import _common  # noqa: F401  (set sys.path)
+from _common import row, timeit
+
+from app import seatfinder
+from app.schemas import SeatStatus
+from app.seatmap import layout_template
+
+
+def main() -> None:
+    rng = random.Random(7)
+    tpl = layout_template(26, 20, aisles=[5, 15], disabled=["A1", "A20", "Z1", "Z20"])
+    print(row("fill", "qty", "indexed_p50", "indexed_p99", "after_rsv_p50", "rescan_p50", width=15))
+    for fill in (0.0, 0.5, 0.8, 0.95):
+        sm = tpl.new_seat_map()
+        codes = [c for c in sm.layout.codes if sm[c] == SeatStatus.available]
+        for code in rng.sample(codes, int(len(codes) * fill)):
+            sm[code] = rng.choice((SeatStatus.reserved, SeatStatus.booked))
+        for qty in (2, 4, 6):
+            sid = -(int(fill * 100) * 10 + qty)
+            seatfinder.best_available(sid, sm, tpl, qty)    # warm index
+            hot = timeit(lambda: seatfinder.best_available(sid, sm, tpl, qty), repeat=2000)
+
+            # tiap query didahului satu reserve/release -> index patch satu baris
+            free = [c for c in sm.layout.codes if sm[c] == SeatStatus.available]
+            flip = {"i": 0}
+
+            def after_reserve():
+                code = free[flip["i"] % len(free)]
+                flip["i"] += 1
+                sm[code] = SeatStatus.reserved
+                seatfinder.best_available(sid, sm, tpl, qty)
+                sm[code] = SeatStatus.available
+            patched = timeit(after_reserve, repeat=2000)
+
+            def rescan():
+                seatfinder.invalidate(sid)
+                seatfinder.best_available(sid, sm, tpl, qty)
+            cold = timeit(rescan, repeat=500)
+            print(row(f"{fill:.0%}", qty, f"{hot['p50_us']:.1f}us", f"{hot['p99_us']:.1f}us",
+                      f"{patched['p50_us']:.1f}us", f"{cold['p50_us']:.1f}us", width=15))
+
+
+if __name__ == "__main__":
+    main()
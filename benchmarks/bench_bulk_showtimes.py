@@ -0,0 +1,49 @@
+"""
+Biaya pembuatan per showtime: satu-per-satu (crud.create_showtime) vs bulk
+(crud.create_showtimes_bulk, template layout di-intern dan dipakai bersama).
+
+    python benchmarks/bench_bulk_showtimes.py --count 5000
+"""
+import argparse
+import gc
+import time
+
+import _common  # noqa: F401  (set sys.path)
+from _common import row
+
+from app import crud
+from app.schemas import MovieCreate, ShowtimeBulkCreate, ShowtimeCreate
+
+TEMPLATE = {"studio": "Studio 1", "price": 50000, "rows": 26, "cols": 20, "aisles_cols": [5, 15],
+            "vip_seats": [f"M{c}" for c in range(5, 16)], "disabled_seats": ["A1", "A20"]}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--count", type=int, default=5000)
+    args = ap.parse_args()
+    movie = crud.create_movie(MovieCreate(title="Bench", duration_min=100))
+    slots = [{"day": f"2025-{m:02d}-{d:02d}", "time": f"{h:02d}:00"}
+             for m in range(1, 13) for d in range(1, 29) for h in range(10, 23)][:args.count]
+
+    # GC dimatikan saat pengukuran: heap yang tumbuh membuat GC gen2 mendominasi noise
+    gc.collect()
+    gc.disable()
+    t0 = time.perf_counter()
+    for slot in slots:
+        crud.create_showtime(movie.id, ShowtimeCreate(**slot, **TEMPLATE))
+    single = (time.perf_counter() - t0) / len(slots) * 1e6
+
+    gc.collect()
+    t0 = time.perf_counter()
+    crud.create_showtimes_bulk(movie.id, ShowtimeBulkCreate(template=TEMPLATE, slots=slots))
+    bulk = (time.perf_counter() - t0) / len(slots) * 1e6
+    gc.enable()
+
+    print(row("mode", "us/showtime"))
+    print(row("single", f"{single:.1f}"))
+    print(row("bulk", f"{bulk:.1f}"))
+
+
+if __name__ == "__main__":
+    main()
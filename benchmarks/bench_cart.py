@@ -0,0 +1,49 @@
+"""
+Operasi cart besar: hapus satu item, hapus sebagian kursi, dan lookup pemegang
+kursi pada cart berisi N item. Biaya seharusnya sebanding kursi yang disentuh
+(dict per item + index kepemilikan kursi), bukan ukuran cart.
+
+    python benchmarks/bench_cart.py
+"""
+import _common  # noqa: F401  (set sys.path)
+from _common import row, timeit
+
+from app import crud, storage
+from app.schemas import ShowtimeCreate, MovieCreate
+
+
+def main() -> None:
+    mv = crud.create_movie(MovieCreate(title="Cart", duration_min=90))
+    print(row("items", "drop_item_p50", "drop_seat_p50", "holder_p50", "get_cart_p50", width=15))
+    for n in (10, 100, 1000, 5000):
+        user = f"big-{n}"
+        shows = [crud.create_showtime(mv.id, ShowtimeCreate(
+            day="2035-01-01", time="10:00", studio="C", price=1000, rows=26, cols=20)) for _ in range(max(1, n // 500))]
+        for i in range(n):
+            st = shows[i % len(shows)]
+            crud.add_to_cart(user, st.id, [f"{chr(65 + i // len(shows) // 20 % 26)}{i // len(shows) % 20 + 1}"])
+        last = storage.get_cart(user)[-1]
+
+        def readd():
+            nonlocal last
+            cid, _ = crud.add_to_cart(user, last[1], last[2])
+            last = (cid, last[1], last[2])
+
+        def drop_and_readd():
+            crud.remove_from_cart(user, last[0], None)
+            readd()
+
+        def drop_seat_and_readd():
+            crud.remove_from_cart(user, None, last[2])
+            readd()
+
+        drop = timeit(drop_and_readd, repeat=300)
+        seat = timeit(drop_seat_and_readd, repeat=300)
+        holder = timeit(lambda: storage.seat_holder(last[1], last[2][0]), repeat=2000)
+        full = timeit(lambda: storage.get_cart(user), repeat=300)
+        print(row(n, f"{drop['p50_us']:.1f}us", f"{seat['p50_us']:.1f}us",
+                  f"{holder['p50_us']:.2f}us", f"{full['p50_us']:.1f}us", width=15))
+
+
+if __name__ == "__main__":
+    main()
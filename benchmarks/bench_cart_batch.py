@@ -0,0 +1,42 @@
+"""
+Booking grup lintas showtime: N x POST /cart/add vs satu POST /cart/batch
+(app in-process via TestClient, jadi yang terukur overhead per request,
+bukan network). Tiap putaran kursinya dilepas lagi lewat DELETE /cart/remove.
+
+    python benchmarks/bench_cart_batch.py
+"""
+import _common  # noqa: F401  (set sys.path)
+from _common import row, timeit
+
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+def main() -> None:
+    mv = client.post("/admin/movies", json={"title": "Batch", "duration_min": 90}).json()
+    slots = [{"day": "2034-01-01", "time": f"{h:02d}:00"} for h in range(20)]
+    shows = [s["id"] for s in client.post(f"/admin/movies/{mv['id']}/showtimes/bulk", json={
+        "template": {"studio": "B", "price": 50000, "rows": 10, "cols": 10}, "slots": slots}).json()]
+    print(row("showtimes", "seats/show", "add_x_n_p50", "batch_p50", "speedup", width=14))
+    for n_shows, per_show in ((2, 2), (5, 4), (10, 4), (20, 2)):
+        groups = [{"showtime_id": sid, "seats": [f"A{i + 1}" for i in range(per_show)]} for sid in shows[:n_shows]]
+
+        def one_by_one():
+            for g in groups:
+                client.post("/cart/add", json={"user_id": "b", **g})
+            client.request("DELETE", "/cart/remove", json={"user_id": "b", "seats": groups[0]["seats"]})
+
+        def batched():
+            client.post("/cart/batch", json={"user_id": "b", "groups": groups})
+            client.request("DELETE", "/cart/remove", json={"user_id": "b", "seats": groups[0]["seats"]})
+
+        seq = timeit(one_by_one, repeat=100)
+        bat = timeit(batched, repeat=100)
+        print(row(n_shows, per_show, f"{seq['p50_us'] / 1e3:.2f}ms", f"{bat['p50_us'] / 1e3:.2f}ms",
+                  f"{seq['p50_us'] / bat['p50_us']:.1f}x", width=14))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark backend durable (WAL + snapshot):
+1. latensi commit (append + tunggu fsync) dengan N thread -> efek group commit
+2. waktu recovery (snapshot + WAL tail) untuk --bookings booking
+
+    python benchmarks/bench_durability.py --bookings 1000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import _common  # noqa: F401  (set sys.path)
+from _common import row
+
+from app import persistence, storage
+
+
+def bench_commit(directory: str, threads: int, per_thread: int) -> dict:
+    wal = persistence.WriteAheadLog(directory, start_lsn=0)
+    lat = []
+    lock = threading.Lock()
+
+    def worker(t: int) -> None:
+        mine = []
+        for i in range(per_thread):
+            t0 = time.perf_counter()
+            wal.wait(wal.append("set_seats", (t, [f"A{i % 20 + 1}"], "reserved")))
+            mine.append((time.perf_counter() - t0) * 1e6)
+        with lock:
+            lat.extend(mine)
+
+    t0 = time.perf_counter()
+    ws = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for w in ws:
+        w.start()
+    for w in ws:
+        w.join()
+    elapsed = time.perf_counter() - t0
+    wal.close()
+    lat.sort()
+    return {
+        "threads": threads,
+        "commits_per_s": len(lat) / elapsed,
+        "p50_us": lat[len(lat) // 2],
+        "p99_us": lat[int(len(lat) * 0.99)],
+        "records_per_fsync": wal.stats["records"] / max(1, wal.stats["commits"]),
+    }
+
+
+_RECOVER = "import json,sys; from app import persistence; print(json.dumps(persistence.recover(sys.argv[1])))"
+
+
+def bench_recovery(directory: str, bookings: int, tail: int) -> dict:
+    for i in range(bookings):
+        storage.save_booking({
+            "booking_code": f"BKG-{i:010d}", "user_id": f"user{i % 50_000}",
+            "total_before_discount": 100000.0, "discount_amount": 0.0, "total_paid": 100000.0,
+            "items": [{"id": f"{i:08x}", "showtime_id": 1, "seats": ["A1", "A2"], "subtotal": 100000.0}],
+            "timestamp": "2025-10-15T19:00:00",
+        })
+    persistence.write_snapshot(directory, 0)
+    wal = persistence.WriteAheadLog(directory, start_lsn=0)
+    for i in range(tail):
+        wal.append("set_cart", (f"tail{i}", []))
+    wal.wait()
+    wal.close()
+    env = {**os.environ, "PYTHONPATH": os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "movie_booking")}
+    out = subprocess.run([sys.executable, "-c", _RECOVER, directory],
+                         capture_output=True, text=True, env=env, check=True)
+    return json.loads(out.stdout)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bookings", type=int, default=200_000)
+    ap.add_argument("--tail", type=int, default=50_000)
+    ap.add_argument("--commits", type=int, default=2_000)
+    args = ap.parse_args()
+
+    print("== commit latency (fsync per batch) ==")
+    print(row("threads", "commits/s", "p50", "p99", "recs/fsync"))
+    for threads in (1, 8, 32):
+        with tempfile.TemporaryDirectory() as d:
+            r = bench_commit(d, threads, max(1, args.commits // threads))
+        print(row(threads, f"{r['commits_per_s']:.0f}", f"{r['p50_us']:.0f}us",
+                  f"{r['p99_us']:.0f}us", f"{r['records_per_fsync']:.1f}"))
+
+    print(f"\n== recovery: {args.bookings} bookings snapshot + {args.tail} WAL records ==")
+    with tempfile.TemporaryDirectory() as d:
+        r = bench_recovery(d, args.bookings, args.tail)
+    print(row("seconds", "snap_recs", "wal_recs"))
+    print(row(f"{r['seconds']:.2f}", r["snapshot_records"], r["wal_records"]))
+
+
+if __name__ == "__main__":
+    main()
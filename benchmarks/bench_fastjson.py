@@ -0,0 +1,82 @@
+"""
+CPU per request: jalur pydantic (response_model) vs fast JSON (byte pre-encoded).
+Studio 26x20 penuh & user dengan 10k tiket, lewat app in-process (TestClient).
+
+    python benchmarks/bench_fastjson.py
+"""
+import time
+
+import _common  # noqa: F401  (set sys.path)
+from _common import row
+
+from fastapi.testclient import TestClient
+
+from app import fastjson, storage
+from app.main import app
+from app.schemas import Movie, SeatStatus, Showtime
+
+client = TestClient(app)
+
+
+def seed() -> int:
+    storage.save_movie(Movie(id=900_000, title="Bench", duration_min=120))
+    storage.save_showtime(Showtime(
+        id=900_000, movie_id=900_000, day="2030-01-01", time="19:00", studio="Bench",
+        price=50000, rows=26, cols=20, aisles_cols=[5, 15], vip_seats=["M10", "M11"],
+    ))
+    seat_map = storage.seats_map(900_000)
+    for i, code in enumerate(seat_map):
+        if i % 3 == 0:
+            seat_map[code] = SeatStatus.booked
+    for i in range(10_000):
+        storage.save_booking({
+            "booking_code": f"BENCH-{i:05d}", "user_id": "bench-user",
+            "total_before_discount": 100000.0, "discount_amount": 0.0, "total_paid": 100000.0,
+            "items": [{"id": f"c{i}", "showtime_id": 900_000, "seats": ["A1", "A2"], "subtotal": 100000.0}],
+            "timestamp": "2030-01-01T19:00:00",
+        })
+    return 900_000
+
+
+def cpu_ms(fn, n: int) -> float:
+    fn()  # warm cache
+    t0 = time.process_time()
+    for _ in range(n):
+        fn()
+    return (time.process_time() - t0) / n * 1e3
+
+
+def main() -> None:
+    sid = seed()
+    seat_map = storage.seats_map(sid)
+    flip = {"n": 0}
+
+    def layout_changing():
+        # satu kursi berubah tiap request -> cache tidak bisa dipakai utuh
+        code = "Z20" if flip["n"] % 2 else "Z19"
+        flip["n"] += 1
+        seat_map[code] = SeatStatus.reserved if seat_map[code] == SeatStatus.available else SeatStatus.available
+        client.get(f"/showtimes/{sid}/layout")
+
+    cases = [
+        ("layout", lambda: client.get(f"/showtimes/{sid}/layout"), 300),
+        ("layout+change", layout_changing, 300),
+        ("seats", lambda: client.get(f"/showtimes/{sid}/seats"), 300),
+        # histori 10k tiket, satu halaman maksimum (1000)
+        ("tickets_1000", lambda: client.get("/users/bench-user/tickets", params={"limit": 1000}), 30),
+    ]
+    # biaya dasar request kecil lewat TestClient (batas bawah kedua jalur)
+    floor = cpu_ms(lambda: client.get("/admin/holds"), 300)
+    print(f"request floor (GET /admin/holds): {floor:.2f}ms")
+    print(row("endpoint", "pydantic_ms", "fast_ms", "reduction"))
+    for name, fn, n in cases:
+        fastjson.set_enabled(False)
+        slow = cpu_ms(fn, n)
+        fastjson.set_enabled(True)
+        fast = cpu_ms(fn, n)
+        print(row(name, f"{slow:.2f}", f"{fast:.2f}", f"{(1 - fast / slow):.0%}"))
+    fastjson.set_enabled(False)
+
+
+if __name__ == "__main__":
+    main()
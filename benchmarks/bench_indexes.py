@@ -0,0 +1,55 @@
+"""
+Latensi list_showtimes(movie_id) & list_bookings_by_user saat histori tumbuh.
+Dengan secondary index latensi harus datar (O(jumlah hasil)), bukan naik linear.
+Juga halaman (limit 100) /admin/showtimes di tengah katalog lewat cursor: O(log n + halaman).
+
+    python benchmarks/bench_indexes.py
+"""
+import _common  # noqa: F401  (set sys.path)
+from _common import row, timeit
+
+from app import storage
+from app.schemas import Movie, Showtime
+
+
+def grow(n_movies: int, n_showtimes: int, n_bookings: int, start: dict) -> None:
+    for mid in range(start["movie"], n_movies + 1):
+        storage.save_movie(Movie(id=mid, title=f"M{mid}", duration_min=100))
+    for sid in range(start["showtime"], n_showtimes + 1):
+        storage.save_showtime(Showtime(
+            id=sid, movie_id=(sid % n_movies) + 1, day=f"2025-10-{sid % 28 + 1:02d}",
+            time="19:00", studio=f"S{sid % 8}", price=50000, rows=1, cols=1,
+        ))
+    for i in range(start["booking"], n_bookings):
+        storage.save_booking({"booking_code": f"B{i}", "user_id": f"user{i % 5000}", "items": []})
+    start.update(movie=n_movies + 1, showtime=n_showtimes + 1, booking=n_bookings)
+
+
+def seed_probe() -> None:
+    """User/movie probe dengan jumlah hasil tetap (10 tiket, 10 showtime)."""
+    storage.save_movie(Movie(id=0, title="Probe", duration_min=100))
+    for i in range(10):
+        storage.save_showtime(Showtime(
+            id=-(i + 1), movie_id=0, day="2025-10-01", time="10:00",
+            studio="P", price=1, rows=1, cols=1,
+        ))
+        storage.save_booking({"booking_code": f"P{i}", "user_id": "probe", "items": []})
+
+
+def main() -> None:
+    start = {"movie": 1, "showtime": 1, "booking": 0}
+    seed_probe()
+    print(row("bookings", "showtimes", "tickets_p50", "showtimes_p50", "mid_page_p50"))
+    for scale in (1, 10, 100):
+        grow(100, 200 * scale, 10_000 * scale, start)
+        tickets = timeit(lambda: storage.list_bookings_by_user("probe"))
+        shows = timeit(lambda: storage.list_showtimes(movie_id=0))
+        keys = storage._showtime_order.keys()
+        mid = keys[len(keys) // 2]
+        paged = timeit(lambda: storage.page_showtimes(100, after=mid))
+        print(row(10_000 * scale, 200 * scale,
+                  f"{tickets['p50_us']:.1f}us", f"{shows['p50_us']:.1f}us", f"{paged['p50_us']:.1f}us"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Pricing engine dengan rules aktif (tier VIP, rule weekend, promo):
+- quote satu item: memo hit vs hitung ulang (cache dikosongkan tiap putaran)
+  vs rumus lama `st.price * len(seats)` (tanpa tier/rule);
+- crud.get_cart_summary untuk cart 50 item;
+- POST /pricing/quote 100 item sekaligus vs 100 request satu item.
+
+    python benchmarks/bench_pricing.py
+"""
+import _common  # noqa: F401  (set sys.path)
+from _common import row, timeit
+
+from fastapi.testclient import TestClient
+from app import crud, pricing, storage
+from app.main import app
+
+client = TestClient(app)
+
+
+def main() -> None:
+    client.put("/admin/pricing", json={
+        "seat_tiers": {"standard": 1.0, "vip": 1.5},
+        "time_rules": [{"days": ["sat", "sun"], "multiplier": 1.25}, {"time_from": "22:00", "multiplier": 0.8}],
+    })
+    mv = client.post("/admin/movies", json={"title": "Pricing", "duration_min": 100}).json()
+    slots = [{"day": f"2034-02-{d % 28 + 1:02d}", "time": f"{10 + d % 13}:00"} for d in range(100)]
+    shows = client.post(f"/admin/movies/{mv['id']}/showtimes/bulk", json={"template": {
+        "studio": "PR", "price": 50000, "rows": 10, "cols": 10,
+        "vip_seats": [f"E{c}" for c in range(1, 11)]}, "slots": slots}).json()
+    st = storage.get_showtime(shows[0]["id"])
+    tpl = storage.showtime_meta(st.id)
+    seats = ["E4", "E5", "F4", "F5"]
+
+    def uncached():
+        pricing.invalidate(st.id)
+        return pricing.item_subtotal(st, tpl, seats)
+
+    print(row("single item", "p50_us", "p99_us", width=16))
+    for label, fn in (("old formula", lambda: st.price * len(seats)),
+                      ("engine (memo)", lambda: pricing.item_subtotal(st, tpl, seats)),
+                      ("engine (miss)", uncached)):
+        r = timeit(fn, repeat=2000)
+        print(row(label, f"{r['p50_us']:.2f}", f"{r['p99_us']:.2f}", width=16))
+
+    for i, s in enumerate(shows[:50]):
+        client.post("/cart/add", json={"user_id": "quoter", "showtime_id": s["id"], "seats": [f"A{i % 10 + 1}", "E1"]})
+    r = timeit(lambda: crud.get_cart_summary("quoter"), repeat=500)
+    print(f"get_cart_summary (50 items): p50 {r['p50_us']:.0f}us, p99 {r['p99_us']:.0f}us")
+
+    items = [{"showtime_id": s["id"], "seats": ["C3", "E3"]} for s in shows]
+    batch = timeit(lambda: client.post("/pricing/quote", json={"items": items, "promo_code": "DISCOUNT10"}), repeat=50)
+    single = timeit(lambda: [client.post("/pricing/quote", json={"items": [i]}) for i in items], repeat=5)
+    print(row("quote 100 items", "p50_ms", width=16))
+    print(row("one request", f"{batch['p50_us'] / 1e3:.2f}", width=16))
+    print(row("100 requests", f"{single['p50_us'] / 1e3:.2f}", width=16))
+    client.put("/admin/pricing", json={})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Laporan revenue atas N booking sintetis (disimpan lewat storage.save_booking,
+jadi agregat inkremental ikut terisi):
+- agregat (tanpa rentang) vs scan berpotongan (rentang tanggal ad-hoc): waktu &
+  puncak alokasi memori (tracemalloc) selama body laporan di-stream;
+- latensi POST /cart/add + /checkout saat scan berjalan di thread lain.
+
+    python benchmarks/bench_reports.py [N]
+"""
+import _common  # noqa: F401  (set sys.path)
+from _common import row, timeit
+
+import sys
+import threading
+import time
+import tracemalloc
+
+from fastapi.testclient import TestClient
+from app import crud, reports, storage
+from app.main import app
+
+client = TestClient(app)
+
+
+def _seed(n: int) -> None:
+    for i in range(n):
+        subtotal = 50000.0 * (1 + i % 3)
+        storage.save_booking({
+            "booking_code": f"BENCH-{i:08d}", "user_id": f"u{i % 5000}",
+            "total_before_discount": subtotal, "discount_amount": subtotal * 0.1 if i % 4 == 0 else 0.0,
+            "total_paid": subtotal, "promo_code": "DISCOUNT10" if i % 4 == 0 else None,
+            "items": [{"id": f"c{i}", "showtime_id": i % 2000 + 1, "movie_id": i % 200 + 1,
+                       "seats": ["A1"] * (1 + i % 3), "subtotal": subtotal}],
+            "timestamp": f"2030-{i % 12 + 1:02d}-{i % 28 + 1:02d}T19:00:00",
+        })
+
+
+def _drain(group: str, date_from=None, date_to=None):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    columns, rows = crud.revenue_report(group, date_from, date_to)
+    size = sum(len(chunk) for chunk in reports.encode(rows, columns, "csv"))
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    t0 = time.perf_counter()
+    _seed(n)
+    print(f"seeded {n} bookings in {time.perf_counter() - t0:.1f}s")
+
+    print(row("report", "group", "seconds", "peak_mem", "body", width=14))
+    for label, group, lo, hi in (("aggregate", "movie", None, None), ("aggregate", "day", None, None),
+                                 ("aggregate", "showtime", None, None), ("scan", "movie", "2030-03-01", "2030-08-31"),
+                                 ("scan", "showtime", "2030-01-01", "2030-12-31")):
+        elapsed, peak, size = _drain(group, lo, hi)
+        print(row(label, group, f"{elapsed:.3f}", f"{peak / 1024:.0f}KiB", f"{size / 1024:.0f}KiB", width=14))
+
+    mv = client.post("/admin/movies", json={"title": "Traffic", "duration_min": 90}).json()
+    sid = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2030-01-01", "time": "10:00", "studio": "T", "price": 50000, "rows": 26, "cols": 20}).json()["id"]
+    seats = iter(f"{chr(65 + r)}{c + 1}" for r in range(26) for c in range(20))
+
+    def book():
+        client.post("/cart/add", json={"user_id": "traffic", "showtime_id": sid, "seats": [next(seats)]})
+        client.post("/checkout", json={"user_id": "traffic"})
+
+    idle = timeit(book, repeat=200)
+    stop = threading.Event()
+
+    def scanner():
+        while not stop.is_set():
+            _, rows = crud.revenue_report("showtime", "2030-01-01", "2030-12-31")
+            for _ in rows:
+                pass
+
+    th = threading.Thread(target=scanner, daemon=True)
+    th.start()
+    busy = timeit(book, repeat=200)
+    stop.set()
+    th.join()
+    print(row("checkout", "p50", "p99", width=14))
+    print(row("idle", f"{idle['p50_us'] / 1e3:.2f}ms", f"{idle['p99_us'] / 1e3:.2f}ms", width=14))
+    print(row("during scan", f"{busy['p50_us'] / 1e3:.2f}ms", f"{busy['p99_us'] / 1e3:.2f}ms", width=14))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Pencarian movie atas katalog sintetis N judul (default 100k): latensi
+search.index.search per jenis query (exact, multi-token, prefix pendek, typo)
+dibanding filter linear substring atas storage.list_movies() (yang selama ini
+dilakukan client), plus biaya update inkremental per movie.
+
+    python benchmarks/bench_search.py [N]
+"""
+import _common  # noqa: F401  (set sys.path)
+from _common import row, timeit
+
+import random
+import sys
+import time
+
+from app import search, storage
+from app.schemas import Movie
+
+SYLLABLES = ["ka", "ri", "mo", "ten", "sa", "lu", "dor", "vi", "ne", "ash", "tor", "mi",
+             "el", "gan", "ru", "sha", "pe", "lin", "oz", "ba", "ker", "no", "sun", "da"]
+GENRES = ["Action", "Drama", "Comedy", "Horror", "Sci-Fi", "Romance", "Thriller", "Animation"]
+RATINGS = ["G", "PG", "PG-13", "R", "SU"]
+
+
+def _words(rng: random.Random, n: int):
+    out = set()
+    while len(out) < n:
+        out.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(out)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(7)
+    vocab = _words(rng, 20_000)
+    t0 = time.perf_counter()
+    for i in range(1, n + 1):
+        storage.save_movie(Movie(
+            id=storage.next_movie_id(), duration_min=100,
+            title=" ".join(rng.choice(vocab) for _ in range(rng.randint(1, 4))).title(),
+            synopsis=" ".join(rng.choice(vocab) for _ in range(10)),
+            genre=rng.choice(GENRES), rating=rng.choice(RATINGS)))
+    print(f"indexed {n} movies in {time.perf_counter() - t0:.1f}s ({len(search.index)} docs)")
+
+    movies = storage.list_movies()
+    sample = movies[n // 2]
+    title_words = sample.title.lower().split()
+    word = max(title_words, key=len)
+    typo = word[:2] + word[3:]
+    queries = [
+        ("exact", word),
+        ("two tokens", f"{word} {sample.genre}"),
+        ("prefix 3", word[:3]),
+        ("prefix 5", word[:5]),
+        ("typo", typo),
+        ("miss", "qqqqzzzz"),
+    ]
+    print(row("query", "text", "hits", "p50_us", "p99_us", "linear_p50", width=14))
+    for label, q in queries:
+        hits = len(search.index.search(q, 20))
+        stats = timeit(lambda: search.index.search(q, 20), repeat=300)
+        needle = q.split()[0]
+        linear = timeit(lambda: [m for m in storage.list_movies() if needle in m.title.lower()][:20], repeat=5)
+        print(row(label, q[:13], hits, f"{stats['p50_us']:.0f}", f"{stats['p99_us']:.0f}",
+                  f"{linear['p50_us'] / 1e3:.1f}ms", width=14))
+
+    upd = iter(range(10_000))
+    stats = timeit(lambda: storage.save_movie(sample.model_copy(update={"title": f"Renamed {next(upd)}"})), repeat=300)
+    print(f"incremental update: p50 {stats['p50_us']:.0f}us, p99 {stats['p99_us']:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Scaling mode sharded: throughput reserve+checkout untuk 1, 2, 4, ... shard.
+
+Tiap shard = proses uvicorn app.main terpisah (app.shard_router.start_local_shards).
+Driver beban = beberapa proses klien yang merutekan request sendiri ke shard
+pemilik showtime (aturan yang sama dengan router), jadi yang diukur adalah
+tier shard, bukan router. Scaling hanya bisa mendekati linear kalau core CPU
+>= jumlah shard + driver; angka `cpus` dicetak untuk konteks.
+
+    python benchmarks/bench_sharding.py
+    python benchmarks/bench_sharding.py --shards 1 2 4 8 --ops 4000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from typing import List, Tuple
+
+import _common  # noqa: F401  (set sys.path)
+from _common import row
+
+import httpx
+from app.shard_router import owner, start_local_shards, stop_local_shards
+
+ROWS, COLS = 26, 20
+HALL = {"studio": "Bench", "price": 50000, "rows": ROWS, "cols": COLS}
+
+
+def seed(urls: List[str], ops: int) -> List[int]:
+    """Showtime secukupnya di tiap shard (id otomatis milik shard tsb)."""
+    per_shard = ops // (ROWS * COLS * len(urls)) + 1
+    slots = [{"day": f"2032-01-{d % 28 + 1:02d}", "time": f"{d // 28 % 24:02d}:00"} for d in range(per_shard)]
+    ids: List[int] = []
+    for url in urls:
+        mv = httpx.post(url + "/admin/movies", json={"title": "Bench", "duration_min": 90}).json()
+        shows = httpx.post(f"{url}/admin/movies/{mv['id']}/showtimes/bulk",
+                           json={"template": HALL, "slots": slots}).json()
+        ids.extend(s["id"] for s in shows)
+    return sorted(ids)
+
+
+def _seat(i: int) -> str:
+    return f"{chr(65 + i // COLS)}{i % COLS + 1}"
+
+
+async def _drive(urls: List[str], showtimes: List[int], driver: int, drivers: int,
+                 ops: int, concurrency: int) -> int:
+    n = len(urls)
+    clients = [httpx.AsyncClient(base_url=u, timeout=30) for u in urls]
+    todo = iter(range(driver, ops, drivers))
+    done = 0
+
+    async def worker() -> None:
+        nonlocal done
+        for g in todo:
+            sid = showtimes[g % len(showtimes)]
+            client = clients[owner(sid, n)]
+            user = f"bench-{g}"
+            r = await client.post("/cart/add", json={"user_id": user, "showtime_id": sid,
+                                                     "seats": [_seat(g // len(showtimes))]})
+            if r.status_code == 200 and (await client.post("/checkout", json={"user_id": user})).status_code == 200:
+                done += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    await asyncio.gather(*(c.aclose() for c in clients))
+    return done
+
+
+def _driver_main(args: Tuple) -> int:
+    return asyncio.run(_drive(*args))
+
+
+def run(shards: int, ops: int, drivers: int, concurrency: int) -> Tuple[float, int]:
+    urls, procs = start_local_shards(shards)
+    try:
+        showtimes = seed(urls, ops)
+        jobs = [(urls, showtimes, d, drivers, ops, concurrency) for d in range(drivers)]
+        with multiprocessing.Pool(drivers) as pool:
+            t0 = time.perf_counter()
+            done = sum(pool.map(_driver_main, jobs))
+            seconds = time.perf_counter() - t0
+    finally:
+        stop_local_shards(procs)
+    return done / seconds, done
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    p.add_argument("--ops", type=int, default=2000, help="jumlah checkout per run")
+    p.add_argument("--drivers", type=int, default=0, help="proses klien (default: = jumlah shard)")
+    p.add_argument("--concurrency", type=int, default=16, help="request paralel per driver")
+    args = p.parse_args()
+
+    print(f"cpus={os.cpu_count()} ops={args.ops}")
+    print(row("shards", "checkout/s", "speedup", "efficiency"))
+    base = None
+    for n in args.shards:
+        rps, done = run(n, args.ops, args.drivers or n, args.concurrency)
+        base = base or rps
+        speedup = rps / base
+        print(row(n, f"{rps:.0f}", f"{speedup:.2f}x", f"{speedup / n:.0%}")
+              + ("" if done == args.ops else f"  ({args.ops - done} gagal)"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Throughput HTTP POST /cart/add dan POST /checkout per backend storage:
+memory (tanpa durability), wal (MOVIE_BOOKING_DATA_DIR) dan sqlite
+(MOVIE_BOOKING_SQLITE_PATH). Tiap mode = server uvicorn baru; N user paralel
+masing-masing mengambil 2 kursi di showtime yang dibagi rata, lalu checkout.
+
+    python benchmarks/bench_sqlite.py --users 4000 --connections 64
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import _common  # noqa: F401  (set sys.path)
+from _common import row
+from load import Recorder
+
+import httpx
+from app.shard_router import _free_port, _wait_ready
+
+ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "movie_booking")
+ROWS, COLS = 26, 20
+
+
+def serve(env: dict) -> tuple[str, subprocess.Popen]:
+    port = _free_port("127.0.0.1")
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                             "--log-level", "warning", "--backlog", "4096"],
+                            cwd=ROOT, env={**os.environ, **env})
+    url = f"http://127.0.0.1:{port}"
+    _wait_ready(url, proc, 20)
+    return url, proc
+
+
+def _plan(users: int, showtimes: list):
+    """user ke-i -> (showtime, 2 kursi) tanpa bentrok."""
+    per_show = ROWS * COLS // 2
+    plan = []
+    for i in range(users):
+        s, k = divmod(i, per_show)
+        r, c = divmod(k * 2, COLS)
+        letter = chr(ord("A") + r)
+        plan.append((f"user{i}", showtimes[s % len(showtimes)], [f"{letter}{c + 1}", f"{letter}{c + 2}"]))
+    return plan
+
+
+async def drive(url: str, users: int, connections: int) -> dict:
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as c:
+        mv = (await c.post("/admin/movies", json={"title": "Bench", "duration_min": 100})).json()
+        slots = [{"day": f"2035-01-{d + 1:02d}", "time": "19:00"} for d in range(users * 2 // (ROWS * COLS) + 1)]
+        shows = [s["id"] for s in (await c.post(f"/admin/movies/{mv['id']}/showtimes/bulk", json={
+            "template": {"studio": "B", "price": 50000, "rows": ROWS, "cols": COLS}, "slots": slots})).json()]
+        plan = _plan(users, shows)
+        out = {}
+        for label, method, path, body in (
+                ("POST cart/add", "POST", "/cart/add",
+                 lambda j: {"user_id": j[0], "showtime_id": j[1], "seats": j[2]}),
+                ("POST checkout", "POST", "/checkout", lambda j: {"user_id": j[0]})):
+            rec = Recorder()
+            todo = iter(plan)
+
+            async def worker() -> None:
+                for job in todo:
+                    await rec.call(c, label, method, path, json=body(job))
+
+            t0 = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(connections)))
+            out[label] = rec.summary(time.perf_counter() - t0)
+        return out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--users", type=int, default=4000)
+    p.add_argument("--connections", type=int, default=64)
+    args = p.parse_args()
+
+    print(f"cpus={os.cpu_count()} users={args.users} connections={args.connections}")
+    print(row("backend", "endpoint", "req/s", "errors", "p50_ms", "p99_ms", width=16))
+    with tempfile.TemporaryDirectory() as d:
+        modes = {"memory": {}, "wal": {"MOVIE_BOOKING_DATA_DIR": os.path.join(d, "wal")},
+                 "sqlite": {"MOVIE_BOOKING_SQLITE_PATH": os.path.join(d, "bench.db")}}
+        for mode, env in modes.items():
+            url, proc = serve(env)
+            try:
+                res = asyncio.run(drive(url, args.users, args.connections))
+            finally:
+                proc.terminate()
+                proc.wait()
+            for label, r in res.items():
+                ep = r["endpoints"][label]
+                print(row(mode, label, f"{r['throughput_rps']:.0f}", r["errors"],
+                          f"{ep['p50_ms']:.1f}", f"{ep['p99_ms']:.1f}", width=16))
+
+
+if __name__ == "__main__":
+    main()
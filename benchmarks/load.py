@@ -0,0 +1,272 @@
+"""
+Load generator untuk alur booking: seed data via API, jalankan campuran skenario
+secara konkuren, laporkan p50/p95/p99 per endpoint + throughput.
+
+Target default = app in-process (httpx ASGITransport, tanpa network). Untuk
+server sungguhan pakai --url (mis. uvicorn app.main:app di movie_booking/).
+
+    python benchmarks/load.py                                # small, semua skenario
+    python benchmarks/load.py --scale medium --json out.json
+    python benchmarks/load.py --url http://127.0.0.1:8000 --scenario rush
+    python benchmarks/load.py --json new.json --baseline old.json   # exit 1 kalau regresi
+
+Skenario:
+  browse    baca katalog, daftar showtime, layout kursi, tiket user
+  rush      premiere: semua klien berebut satu showtime (add/layout/checkout/batal)
+  checkout  badai checkout: tiap op = reserve 1 kursi + checkout
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import _common  # noqa: F401  (set sys.path)
+from _common import row
+
+import httpx
+
+# ukuran data yang di-seed sebelum skenario jalan
+SCALES: Dict[str, Dict[str, int]] = {
+    "small":  {"movies": 10, "showtimes_per_movie": 4, "bookings": 200, "users": 50},
+    "medium": {"movies": 50, "showtimes_per_movie": 10, "bookings": 2000, "users": 500},
+    "large":  {"movies": 200, "showtimes_per_movie": 20, "bookings": 10000, "users": 2000},
+}
+
+HALL = {"studio": "Load", "price": 50000, "rows": 26, "cols": 20,
+        "aisles_cols": [5, 15], "vip_seats": ["M9", "M10", "M11", "M12"]}
+
+
+class Recorder:
+    """Kumpulkan latensi (detik) per label endpoint + jumlah error."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kw) -> httpx.Response:
+        t0 = time.perf_counter()
+        resp = await client.request(method, url, **kw)
+        self.samples.setdefault(label, []).append(time.perf_counter() - t0)
+        if resp.status_code >= 400:
+            self.errors[label] = self.errors.get(label, 0) + 1
+        return resp
+
+    def summary(self, seconds: float) -> dict:
+        total = sum(len(v) for v in self.samples.values())
+        endpoints = {}
+        for label, samples in sorted(self.samples.items()):
+            samples.sort()
+            endpoints[label] = {
+                "count": len(samples),
+                "errors": self.errors.get(label, 0),
+                "p50_ms": _pct(samples, 0.50) * 1e3,
+                "p95_ms": _pct(samples, 0.95) * 1e3,
+                "p99_ms": _pct(samples, 0.99) * 1e3,
+            }
+        return {
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "seconds": seconds,
+            "throughput_rps": total / seconds if seconds else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+def _pct(sorted_samples: List[float], q: float) -> float:
+    """Persentil nearest-rank."""
+    if not sorted_samples:
+        return 0.0
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * q))]
+
+
+# =========================
+#          SEED
+# =========================
+async def seed(client: httpx.AsyncClient, sizes: Dict[str, int], rng: random.Random) -> dict:
+    """Buat movie, showtime (bulk), dan booking lewat API. Return id yang dipakai skenario."""
+    movie_ids: List[int] = []
+    showtime_ids: List[int] = []
+    slots = [{"day": f"2030-01-{d % 28 + 1:02d}", "time": f"{10 + d % 12:02d}:00"}
+             for d in range(sizes["showtimes_per_movie"])]
+    for i in range(sizes["movies"]):
+        mv = (await client.post("/admin/movies", json={"title": f"Load {i}", "duration_min": 120})).json()
+        movie_ids.append(mv["id"])
+        shows = (await client.post(f"/admin/movies/{mv['id']}/showtimes/bulk",
+                                   json={"template": HALL, "slots": slots})).json()
+        showtime_ids.extend(s["id"] for s in shows)
+
+    users = [f"load-user-{i}" for i in range(sizes["users"])]
+    for i in range(sizes["bookings"]):
+        user = users[i % len(users)]
+        sid = showtime_ids[i % len(showtime_ids)]
+        r = await client.post("/cart/best-available", json={"user_id": user, "showtime_id": sid, "quantity": 1})
+        if r.status_code == 200:
+            await client.post("/checkout", json={"user_id": user})
+
+    premiere = (await client.post(f"/admin/movies/{movie_ids[0]}/showtimes",
+                                  json={**HALL, "day": "2030-02-01", "time": "00:01"})).json()["id"]
+    rng.shuffle(showtime_ids)
+    return {"movies": movie_ids, "showtimes": showtime_ids, "users": users, "premiere": premiere}
+
+
+# =========================
+#        SKENARIO
+# =========================
+async def op_browse(c: httpx.AsyncClient, rec: Recorder, data: dict, rng: random.Random, n: int) -> None:
+    roll = rng.random()
+    if roll < 0.4:
+        await rec.call(c, "GET /showtimes/{id}/layout", "GET", f"/showtimes/{rng.choice(data['showtimes'])}/layout")
+    elif roll < 0.6:
+        await rec.call(c, "GET /movies", "GET", "/movies")
+    elif roll < 0.8:
+        await rec.call(c, "GET /movies/{id}/showtimes", "GET", f"/movies/{rng.choice(data['movies'])}/showtimes")
+    else:
+        await rec.call(c, "GET /users/{id}/tickets", "GET", f"/users/{rng.choice(data['users'])}/tickets")
+
+
+async def op_rush(c: httpx.AsyncClient, rec: Recorder, data: dict, rng: random.Random, n: int) -> None:
+    sid = data["premiere"]
+    user = f"rush-{n}"
+    await rec.call(c, "GET /showtimes/{id}/layout", "GET", f"/showtimes/{sid}/layout")
+    r = await rec.call(c, "POST /cart/best-available", "POST", "/cart/best-available",
+                       json={"user_id": user, "showtime_id": sid, "quantity": rng.randint(1, 4)})
+    if r.status_code != 200:
+        return
+    if rng.random() < 0.3:
+        await rec.call(c, "POST /checkout", "POST", "/checkout", json={"user_id": user})
+    else:
+        # batal -> kursi kembali ke pool supaya hall tidak cepat habis
+        await rec.call(c, "DELETE /cart/remove", "DELETE", "/cart/remove",
+                       json={"user_id": user, "cart_item_id": r.json()["id"]})
+
+
+async def op_checkout(c: httpx.AsyncClient, rec: Recorder, data: dict, rng: random.Random, n: int) -> None:
+    user = f"storm-{n}"
+    r = await rec.call(c, "POST /cart/best-available", "POST", "/cart/best-available",
+                       json={"user_id": user, "showtime_id": rng.choice(data["showtimes"]), "quantity": 1})
+    if r.status_code == 200:
+        await rec.call(c, "POST /checkout", "POST", "/checkout", json={"user_id": user})
+
+
+SCENARIOS: Dict[str, Callable[..., Awaitable[None]]] = {
+    "browse": op_browse,
+    "rush": op_rush,
+    "checkout": op_checkout,
+}
+
+
+async def run_scenario(client: httpx.AsyncClient, name: str, data: dict, ops: int,
+                       concurrency: int, seed_value: int) -> dict:
+    rec = Recorder()
+    op = SCENARIOS[name]
+    counter = iter(range(ops))
+
+    async def worker(wid: int) -> None:
+        rng = random.Random(seed_value * 1000 + wid)
+        for n in counter:
+            await op(client, rec, data, rng, n)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    return rec.summary(time.perf_counter() - t0)
+
+
+# =========================
+#          MAIN
+# =========================
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _client(url: str | None) -> httpx.AsyncClient:
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=30)
+    from app.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=30)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    async with _client(args.url) as client:
+        t0 = time.perf_counter()
+        data = await seed(client, SCALES[args.scale], rng)
+        seed_seconds = time.perf_counter() - t0
+        names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+        results = {name: await run_scenario(client, name, data, args.requests, args.concurrency, args.seed)
+                   for name in names}
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "target": args.url or "in-process",
+            "scale": args.scale,
+            "sizes": SCALES[args.scale],
+            "concurrency": args.concurrency,
+            "ops_per_scenario": args.requests,
+            "seed": args.seed,
+            "seed_seconds": seed_seconds,
+        },
+        "scenarios": results,
+    }
+
+
+def print_report(report: dict) -> None:
+    for name, res in report["scenarios"].items():
+        print(f"\n[{name}] {res['requests']} req, {res['errors']} err, "
+              f"{res['throughput_rps']:.0f} req/s")
+        print("endpoint".ljust(32) + row("count", "p50_ms", "p95_ms", "p99_ms", width=12))
+        for label, ep in res["endpoints"].items():
+            print(label.ljust(32) + row(ep["count"], f"{ep['p50_ms']:.2f}", f"{ep['p95_ms']:.2f}",
+                                         f"{ep['p99_ms']:.2f}", width=12))
+
+
+def compare(report: dict, baseline: dict, max_regress: float) -> List[str]:
+    """Daftar endpoint yang p95-nya naik lebih dari `max_regress` (rasio) dibanding baseline."""
+    out = []
+    for name, res in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name, {}).get("endpoints", {})
+        for label, ep in res["endpoints"].items():
+            old = base.get(label)
+            if old and old["p95_ms"] > 0 and ep["p95_ms"] > old["p95_ms"] * (1 + max_regress):
+                out.append(f"{name} {label}: p95 {old['p95_ms']:.2f}ms -> {ep['p95_ms']:.2f}ms")
+    return out
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--url", help="base URL server (default: app in-process)")
+    p.add_argument("--scale", choices=sorted(SCALES), default="small")
+    p.add_argument("--scenario", choices=["all", *SCENARIOS], default="all")
+    p.add_argument("--requests", type=int, default=2000, help="jumlah operasi per skenario")
+    p.add_argument("--concurrency", type=int, default=32)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--json", help="tulis hasil (JSON) ke file ini")
+    p.add_argument("--baseline", help="hasil JSON sebelumnya untuk deteksi regresi")
+    p.add_argument("--max-regress", type=float, default=0.25, help="ambang kenaikan p95 (rasio)")
+    args = p.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.max_regress)
+        for line in regressions:
+            print("REGRESSION", line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
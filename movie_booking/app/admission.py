@@ -0,0 +1,278 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+from urllib.parse import parse_qs
+from . import config, metrics
+
+# =========================
+#   WAITING ROOM (ADMISSION)
+# =========================
+# Untuk showtime yang sedang "on-sale rush" (diaktifkan admin per showtime):
+# - maksimal `active_cap` sesi aktif; sisanya antre FIFO (POST .../queue),
+#   posisi dicek lewat GET .../queue/{user_id} (O(1), tanpa crud/pydantic);
+# - sesi aktif kadaluarsa setelah `session_ttl` detik tanpa aktivitas, lalu
+#   kepala antrean naik otomatis (dicek lazy di tiap panggilan);
+# - token bucket per user_id membatasi laju request ke showtime tsb.
+# AdmissionMiddleware menolak request cart/layout dari user yang belum masuk
+# sebelum routing, validasi pydantic, dan crud -> beban berlebih dibuang murah.
+# Showtime tanpa waiting room tidak terpengaruh (satu cek dict kosong).
+
+decisions = metrics.Counter(
+    "admission_decisions_total", "Keputusan waiting room per hasil.", ("result",))
+
+_SHOWTIME_PATH = re.compile(r"^/showtimes/(\d+)/(layout|seats|best-available)$")
+_CART_PATHS = ("/cart/add", "/cart/best-available", "/cart/batch")
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, rate: float, burst: float, now: float) -> float:
+        """Ambil satu token. Return 0 kalau boleh, selain itu detik sampai token berikutnya."""
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / rate
+
+
+class WaitingRoom:
+    def __init__(self, showtime_id: int, active_cap: int | None = None, session_ttl: float | None = None,
+                 queue_max: int | None = None, rate: float | None = None, burst: int | None = None):
+        self.showtime_id = showtime_id
+        self.active_cap = config.ADMISSION_ACTIVE_CAP if active_cap is None else active_cap
+        self.session_ttl = config.ADMISSION_SESSION_TTL if session_ttl is None else session_ttl
+        self.queue_max = config.ADMISSION_QUEUE_MAX if queue_max is None else queue_max
+        self.rate = config.ADMISSION_RATE if rate is None else rate
+        self.burst = config.ADMISSION_BURST if burst is None else burst
+        self._active: "OrderedDict[str, float]" = OrderedDict()   # user -> expires_at (urut kadaluarsa)
+        self._queue: "OrderedDict[str, int]" = OrderedDict()      # user -> nomor tiket (FIFO)
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._next_ticket = 0        # tiket berikutnya yang dibagikan
+        self._served = 0             # tiket yang sudah keluar dari antrean
+        self._lock = threading.Lock()
+
+    def settings(self) -> dict:
+        return {"active_cap": self.active_cap, "session_ttl": self.session_ttl, "queue_max": self.queue_max,
+                "rate": self.rate, "burst": self.burst}
+
+    # ---------- internal (pemanggil memegang _lock) ----------
+    def _expire(self, now: float) -> None:
+        active = self._active
+        while active:
+            user, expires_at = next(iter(active.items()))
+            if expires_at > now:
+                break
+            del active[user]
+        while self._queue and len(active) < self.active_cap:
+            user, ticket = self._queue.popitem(last=False)
+            self._served = ticket + 1
+            active[user] = now + self.session_ttl
+
+    def _touch(self, user_id: str, now: float) -> None:
+        self._active[user_id] = now + self.session_ttl
+        self._active.move_to_end(user_id)
+
+    def _status(self, user_id: str) -> dict:
+        if user_id in self._active:
+            return {"showtime_id": self.showtime_id, "state": "admitted", "position": 0,
+                    "expires_in": round(self._active[user_id] - time.monotonic(), 3)}
+        ticket = self._queue.get(user_id)
+        if ticket is None:
+            return {"showtime_id": self.showtime_id, "state": "none", "position": None}
+        # O(1): tiket berurutan, posisi = jarak ke tiket terakhir yang naik. User yang
+        # keluar dari tengah antrean tidak dihitung ulang -> posisi batas atas.
+        position = ticket - self._served + 1
+        return {"showtime_id": self.showtime_id, "state": "queued", "position": max(1, position),
+                "queue_length": len(self._queue)}
+
+    # ---------- API ----------
+    def join(self, user_id: str) -> Tuple[dict, bool]:
+        """Masuk (langsung aktif kalau ada slot & antrean kosong) atau antre. Return (status, shed)."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if user_id in self._active:
+                self._touch(user_id, now)
+            elif user_id not in self._queue:
+                if not self._queue and len(self._active) < self.active_cap:
+                    self._touch(user_id, now)
+                    decisions.inc(1, "admitted")
+                elif len(self._queue) >= self.queue_max:
+                    decisions.inc(1, "shed")
+                    return self._status(user_id), True
+                else:
+                    self._queue[user_id] = self._next_ticket
+                    self._next_ticket += 1
+                    decisions.inc(1, "queued")
+            return self._status(user_id), False
+
+    def status(self, user_id: str) -> dict:
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._status(user_id)
+
+    def leave(self, user_id: str) -> bool:
+        with self._lock:
+            found = self._active.pop(user_id, None) is not None
+            if self._queue.pop(user_id, None) is not None:
+                found = True
+            self._expire(time.monotonic())
+            return found
+
+    def admit(self, user_id: str) -> Tuple[str, float]:
+        """
+        Gate untuk request cart/layout. Return (hasil, retry_after):
+        "ok", "not_admitted" (belum aktif / masih antre), atau "rate_limited".
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if user_id not in self._active:
+                return "not_admitted", 1.0
+            bucket = self._buckets.get(user_id)
+            if bucket is None:
+                bucket = self._buckets[user_id] = TokenBucket(self.burst, now)
+                if len(self._buckets) > max(self.active_cap * 2, 1024):
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(user_id)
+            wait = bucket.take(self.rate, self.burst, now)
+            if wait:
+                return "rate_limited", wait
+            self._touch(user_id, now)
+            return "ok", 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._expire(time.monotonic())
+            return {"showtime_id": self.showtime_id, **self.settings(),
+                    "active": len(self._active), "queued": len(self._queue)}
+
+
+rooms: Dict[int, WaitingRoom] = {}
+
+
+def open_room(showtime_id: int, **settings) -> WaitingRoom:
+    room = rooms.get(showtime_id)
+    if room is None:
+        room = rooms[showtime_id] = WaitingRoom(showtime_id, **settings)
+    else:
+        for key, value in settings.items():
+            if value is not None:
+                setattr(room, key, value)
+    return room
+
+
+def close_room(showtime_id: int) -> bool:
+    return rooms.pop(showtime_id, None) is not None
+
+
+metrics.CallbackMetric(
+    "admission_active_sessions", "Sesi aktif per waiting room.", ("showtime_id",),
+    lambda: {(sid,): r.stats()["active"] for sid, r in list(rooms.items())})
+metrics.CallbackMetric(
+    "admission_queue_length", "Panjang antrean per waiting room.", ("showtime_id",),
+    lambda: {(sid,): r.stats()["queued"] for sid, r in list(rooms.items())})
+
+
+# ---------- middleware ----------
+class AdmissionMiddleware:
+    """
+    ASGI murni, dijalankan sebelum routing: request cart/layout/seats untuk
+    showtime dengan waiting room harus dari user yang sudah aktif. User dibaca
+    dari header X-User-Id / query user_id, atau dari body JSON untuk cart
+    (/cart/batch: semua showtime_id di groups ikut dicek).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not rooms:
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        showtime_ids = []
+        user_id = None
+        if path in _CART_PATHS and scope["method"] == "POST":
+            body, receive = await _buffer(receive)
+            try:
+                data = json.loads(body)
+                user_id = str(data["user_id"])
+                groups = data["groups"] if path == "/cart/batch" else [data]
+                showtime_ids = list(dict.fromkeys(int(g["showtime_id"]) for g in groups))
+            except (ValueError, KeyError, TypeError):
+                showtime_ids = []   # body tidak valid -> biar validasi route yang menjawab
+        else:
+            m = _SHOWTIME_PATH.match(path)
+            if m is not None:
+                showtime_ids = [int(m.group(1))]
+                user_id = _user_from_scope(scope)
+        # batch: user harus aktif di waiting room tiap showtime yang disentuh
+        for showtime_id in showtime_ids:
+            room = rooms.get(showtime_id)
+            if room is None:
+                continue
+            if user_id is None:
+                result, retry = "not_admitted", 1.0
+            else:
+                result, retry = room.admit(user_id)
+            if result != "ok":
+                decisions.inc(1, result)
+                detail = ("Rate limit exceeded" if result == "rate_limited"
+                          else f"Waiting room active: join via POST /showtimes/{showtime_id}/queue")
+                await _reject(send, 429, {"detail": detail, "showtime_id": showtime_id}, retry)
+                return
+            decisions.inc(1, "passed")
+        await self.app(scope, receive, send)
+
+
+def _user_from_scope(scope) -> str | None:
+    for k, v in scope.get("headers", ()):
+        if k == b"x-user-id":
+            return v.decode("latin-1")
+    qs = scope.get("query_string", b"")
+    if b"user_id=" in qs:
+        values = parse_qs(qs.decode("latin-1")).get("user_id")
+        if values:
+            return values[0]
+    return None
+
+
+async def _buffer(receive):
+    """Baca seluruh body lalu kembalikan receive pengganti yang memutar ulang body itu."""
+    chunks = []
+    more = True
+    while more:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        more = message.get("more_body", False)
+    body = b"".join(chunks)
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+    return body, replay
+
+
+async def _reject(send, status: int, payload: dict, retry_after: float) -> None:
+    body = json.dumps(payload).encode()
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"retry-after", str(max(1, round(retry_after))).encode()),
+    ]})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,121 @@
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Iterable, List, Tuple, TypeVar
+
+from . import crud, fastjson, holds, storage
+
+# =========================
+#     ASYNC STORAGE/CRUD
+# =========================
+# Varian async dari operasi crud untuk route `async def` (app.aio_main).
+# - Operasi di-serialisasi per showtime dengan asyncio.Lock (urut id, sama
+#   seperti lock thread di storage) sehingga request yang berebut showtime
+#   antre di event loop, bukan di lock thread.
+# - Mode in-memory: kerja dict/SeatMap dijalankan langsung di event loop (tanpa
+#   thread pool) selama lock thread yang akan diambil crud sedang bebas. Lock
+#   itu juga dipakai sweeper hold & route sync; kalau salah satunya sedang
+#   dipegang (atau ada hold kadaluarsa yang akan di-sweep ikut dalam operasi),
+#   operasi jatuh ke asyncio.to_thread supaya event loop tidak ikut menunggu.
+# - Mode durable (journal terpasang): selalu asyncio.to_thread, karena commit
+#   menunggu fsync / transaksi database.
+
+T = TypeVar("T")
+
+# weak: lock hanya hidup selama ada yang memegang/menunggu -> tidak menumpuk
+# untuk showtime lama/terhapus
+_showtime_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _lock(showtime_id: int) -> asyncio.Lock:
+    lock = _showtime_locks.get(showtime_id)
+    if lock is None:
+        lock = _showtime_locks[showtime_id] = asyncio.Lock()
+    return lock
+
+
+@asynccontextmanager
+async def showtime_locks(showtime_ids: Iterable[int]) -> AsyncIterator[None]:
+    """Ambil asyncio lock beberapa showtime (urut id -> tidak deadlock)."""
+    locks = [_lock(sid) for sid in sorted(set(showtime_ids))]
+    taken: List[asyncio.Lock] = []
+    try:
+        for lock in locks:
+            await lock.acquire()
+            taken.append(lock)
+        yield
+    finally:
+        for lock in reversed(taken):
+            lock.release()
+
+
+def _locks_free(showtime_ids: Iterable[int], user_id: str | None) -> bool:
+    """Tidak ada thread lain di dalam lock showtime / cart yang akan diambil crud."""
+    for sid in showtime_ids:
+        seat_map = storage.seats_map(sid)
+        if seat_map is not None and seat_map.lock.locked():
+            return False
+    return user_id is None or not storage.cart_lock(user_id).locked()
+
+
+async def _run(showtime_ids: Iterable[int], user_id: str | None, fn: Callable[..., T], *args) -> T:
+    if not storage.has_journal() and not holds.has_expired() and _locks_free(showtime_ids, user_id):
+        return fn(*args)
+    return await asyncio.to_thread(fn, *args)
+
+
+# ---------- baca (tanpa lock async: snapshot seat map diambil di bawah lock thread) ----------
+async def get_seat_changes(showtime_id: int, since: int | None):
+    return await _run((showtime_id,), None, crud.get_seat_changes, showtime_id, since)
+
+
+async def seats_json(showtime_id: int, seat_map) -> bytes:
+    return await _run((showtime_id,), None, fastjson.seats, showtime_id, seat_map)
+
+
+async def get_seat_layout_with_etag(showtime_id: int):
+    return await _run((showtime_id,), None, crud.get_seat_layout_with_etag, showtime_id)
+
+
+async def get_seat_layout_json(showtime_id: int):
+    return await _run((showtime_id,), None, crud.get_seat_layout_json, showtime_id)
+
+
+async def find_best_available(showtime_id: int, quantity: int) -> List[str]:
+    return await _run((showtime_id,), None, crud.find_best_available, showtime_id, quantity)
+
+
+async def get_cart_summary(user_id: str):
+    return await _run((), user_id, crud.get_cart_summary, user_id)
+
+
+# ---------- cart & checkout ----------
+async def add_to_cart(user_id: str, showtime_id: int, seats: List[str]):
+    async with showtime_locks((showtime_id,)):
+        return await _run((showtime_id,), user_id, crud.add_to_cart, user_id, showtime_id, seats)
+
+
+async def add_best_available_to_cart(user_id: str, showtime_id: int, quantity: int):
+    async with showtime_locks((showtime_id,)):
+        return await _run((showtime_id,), user_id, crud.add_best_available_to_cart, user_id, showtime_id, quantity)
+
+
+async def add_batch_to_cart(user_id: str, groups: List[Tuple[int, List[str]]]):
+    showtime_ids = [sid for sid, _ in groups]
+    async with showtime_locks(showtime_ids):
+        return await _run(showtime_ids, user_id, crud.add_batch_to_cart, user_id, groups)
+
+
+async def remove_from_cart(user_id: str, cart_item_id: str | None, seats: List[str] | None) -> None:
+    showtime_ids = storage.cart_showtimes(user_id)
+    async with showtime_locks(showtime_ids):
+        await _run(showtime_ids, user_id, crud.remove_from_cart, user_id, cart_item_id, seats)
+
+
+async def checkout(user_id: str, promo_code: str | None) -> dict:
+    # cart bisa bertambah saat menunggu lock; crud.checkout tetap memvalidasi
+    # ulang di bawah lock thread, jadi yang dikunci di sini cukup snapshot awal
+    # (cek lock thread untuk jalur inline memakai isi cart terkini)
+    showtime_ids = storage.cart_showtimes(user_id)
+    async with showtime_locks(showtime_ids):
+        return await _run(storage.cart_showtimes(user_id), user_id, crud.checkout, user_id, promo_code)
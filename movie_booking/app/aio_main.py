@@ -0,0 +1,113 @@
+# app/aio_main.py
+from fastapi import FastAPI, Header, Query, Request, Response
+from typing import List, Dict, Optional
+import asyncio
+
+from .schemas import (
+    SeatStatus, AddToCartRequest, RemoveFromCartRequest, Cart, CartItem,
+    CartBatchRequest, CartBatchResponse,
+    BestAvailableRequest, SeatSuggestion, CheckoutRequest, CheckoutResponse, SeatLayout,
+)
+from . import admission, aio, crud, fastjson, main, metrics
+
+# =========================
+#   APP ASYNC (EVENT LOOP)
+# =========================
+# Sama dengan app.main, tetapi route jalur panas (seat map, layout, cart,
+# checkout) berupa `async def` di atas app.aio: antrean per showtime di event
+# loop, hanya operasi crud yang mengambil lock thread yang masuk thread pool.
+# Route lain (admin, katalog, tiket, ...) dipakai ulang dari app.main.
+#
+#   uvicorn app.aio_main:app
+
+app = FastAPI(
+    title="Movie Booking API (async)",
+    version="1.0.0",
+    description=main.app.description,
+    lifespan=main.lifespan,
+)
+app.router.route_class = metrics.TimedRoute
+app.add_middleware(admission.AdmissionMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+# -------- Seats & Layout --------
+@app.get("/showtimes/{showtime_id}/seats", response_model=Dict[str, SeatStatus], tags=["User"])
+async def get_seats(showtime_id: int, response: Response, since: Optional[int] = Query(None, ge=0)):
+    version, seats, full = await aio.get_seat_changes(showtime_id, since)
+    headers = {"X-Seat-Version": str(version), "X-Seat-Delta": "full" if full else "delta"}
+    if full and fastjson.enabled:
+        return main._json(await aio.seats_json(showtime_id, seats), headers)
+    response.headers.update(headers)
+    return seats
+
+@app.get("/showtimes/{showtime_id}/layout", response_model=SeatLayout, tags=["User"],
+         responses={304: {"description": "Layout tidak berubah sejak ETag terakhir"}})
+async def get_layout(showtime_id: int, request: Request, response: Response):
+    etag = crud.seat_layout_etag(showtime_id)
+    if main._etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    if fastjson.enabled:
+        body, etag = await aio.get_seat_layout_json(showtime_id)
+        return main._json(body, {"ETag": etag})
+    layout, etag = await aio.get_seat_layout_with_etag(showtime_id)
+    response.headers["ETag"] = etag
+    return layout
+
+@app.get("/showtimes/{showtime_id}/best-available", response_model=SeatSuggestion, tags=["User"])
+async def get_best_available(showtime_id: int, quantity: int = Query(..., ge=1, le=20)):
+    return {"showtime_id": showtime_id, "seats": await aio.find_best_available(showtime_id, quantity)}
+
+
+# -------- Cart & Checkout --------
+# Dengan Idempotency-Key request lewat jalur sync di thread (store idempotency
+# menunggu eksekusi pertama dengan threading.Event, tidak boleh di event loop)
+async def _idempotent(endpoint: str, user_id: str, key: str, fingerprint: str, fn, response: Response):
+    return await asyncio.to_thread(main._idempotent, endpoint, user_id, key, fingerprint, fn, response)
+
+@app.post("/cart/add", response_model=CartItem, tags=["User"])
+async def add_to_cart(req: AddToCartRequest, response: Response,
+                      idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    def item(cid: str, subtotal: float) -> dict:
+        return {"id": cid, "showtime_id": req.showtime_id, "seats": req.seats, "subtotal": subtotal}
+    if idempotency_key:
+        return await _idempotent("cart_add", req.user_id, idempotency_key, req.model_dump_json(),
+                                 lambda: item(*crud.add_to_cart(req.user_id, req.showtime_id, req.seats)),
+                                 response)
+    return item(*await aio.add_to_cart(req.user_id, req.showtime_id, req.seats))
+
+@app.post("/cart/best-available", response_model=CartItem, tags=["User"])
+async def add_best_available(req: BestAvailableRequest):
+    cid, seats, subtotal = await aio.add_best_available_to_cart(req.user_id, req.showtime_id, req.quantity)
+    return {"id": cid, "showtime_id": req.showtime_id, "seats": seats, "subtotal": subtotal}
+
+@app.post("/cart/batch", response_model=CartBatchResponse, tags=["User"])
+async def add_batch_to_cart(req: CartBatchRequest):
+    items, total = await aio.add_batch_to_cart(req.user_id, [(g.showtime_id, g.seats) for g in req.groups])
+    return {"user_id": req.user_id, "items": items, "total": total}
+
+@app.get("/cart/{user_id}", response_model=Cart, tags=["User"])
+async def get_cart(user_id: str):
+    items, total = await aio.get_cart_summary(user_id)
+    return {"user_id": user_id, "items": items, "total": total}
+
+@app.delete("/cart/remove", tags=["User"])
+async def remove_from_cart(req: RemoveFromCartRequest):
+    await aio.remove_from_cart(req.user_id, req.cart_item_id, req.seats)
+    return {"message": "Updated cart"}
+
+@app.post("/checkout", response_model=CheckoutResponse, tags=["User"])
+async def checkout(req: CheckoutRequest, response: Response,
+                   idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    if idempotency_key:
+        return await _idempotent("checkout", req.user_id, idempotency_key, req.model_dump_json(),
+                                 lambda: crud.checkout(req.user_id, req.promo_code), response)
+    return await aio.checkout(req.user_id, req.promo_code)
+
+
+# -------- sisa route dari app.main --------
+_async_routes = {(r.path, frozenset(getattr(r, "methods", None) or ())) for r in app.router.routes}
+app.router.routes.extend(
+    r for r in main.app.router.routes
+    if (r.path, frozenset(getattr(r, "methods", None) or ())) not in _async_routes
+)
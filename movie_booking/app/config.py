@@ -0,0 +1,57 @@
+import os
+
+# ---------- konfigurasi via environment variable ----------
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name)
+    return float(raw) if raw else default
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    return int(raw) if raw else default
+
+# lama kursi boleh ditahan di cart sebelum dilepas otomatis (detik)
+HOLD_TTL_SECONDS: float = _env_float("MOVIE_BOOKING_HOLD_TTL", 600.0)
+# interval background sweeper untuk hold yang kadaluarsa (detik)
+HOLD_SWEEP_INTERVAL: float = _env_float("MOVIE_BOOKING_HOLD_SWEEP_INTERVAL", 1.0)
+# umur transaksi 2PC yang sudah prepare tapi belum commit/abort (mis. router crash
+# di antara fase); lewat dari ini sweeper meng-abort-nya (detik)
+PREPARED_TX_TTL: float = _env_float("MOVIE_BOOKING_PREPARED_TX_TTL", 60.0)
+
+# direktori data durable (WAL + snapshot); kosong = murni in-memory seperti semula
+DATA_DIR: str | None = os.getenv("MOVIE_BOOKING_DATA_DIR") or None
+# snapshot otomatis setiap N record WAL (0 = hanya manual)
+SNAPSHOT_EVERY: int = _env_int("MOVIE_BOOKING_SNAPSHOT_EVERY", 100_000)
+# backend SQLite (file database): kalau diisi, semua mutasi storage di-commit ke
+# database ini dan state dimuat darinya saat start (menggantikan DATA_DIR)
+SQLITE_PATH: str | None = os.getenv("MOVIE_BOOKING_SQLITE_PATH") or None
+
+# idempotency key (checkout & cart/add): umur hasil tersimpan (detik) & jumlah key maksimum
+IDEMPOTENCY_TTL: float = _env_float("MOVIE_BOOKING_IDEMPOTENCY_TTL", 86400.0)
+IDEMPOTENCY_MAX_KEYS: int = _env_int("MOVIE_BOOKING_IDEMPOTENCY_MAX_KEYS", 100_000)
+
+# timer latensi untuk /metrics (counter selalu aktif); bisa diubah saat runtime
+# lewat PUT /admin/metrics/timing
+METRICS_TIMING: bool = bool(_env_int("MOVIE_BOOKING_METRICS_TIMING", 1))
+
+# response JSON pre-encoded untuk endpoint baca besar (seats, layout, daftar showtime & tiket)
+FAST_JSON: bool = bool(_env_int("MOVIE_BOOKING_FAST_JSON", 0))
+# jumlah body booking pre-encoded yang disimpan (LRU)
+FAST_JSON_BOOKING_CACHE: int = _env_int("MOVIE_BOOKING_FAST_JSON_BOOKING_CACHE", 50_000)
+
+# mode sharded: index shard ini & jumlah shard (showtime dipartisi per showtime_id)
+SHARD_INDEX: int = _env_int("MOVIE_BOOKING_SHARD_INDEX", 0)
+SHARD_COUNT: int = _env_int("MOVIE_BOOKING_SHARD_COUNT", 1)
+# untuk router (app.shard_router): base URL shard dipisah koma, urut sesuai SHARD_INDEX
+SHARD_URLS: list[str] = [u.strip() for u in os.getenv("MOVIE_BOOKING_SHARDS", "").split(",") if u.strip()]
+
+# waiting room (per showtime, diaktifkan lewat PUT /admin/showtimes/{id}/waiting-room):
+# default sesi aktif bersamaan, umur sesi tanpa aktivitas (detik), panjang antrean maks
+ADMISSION_ACTIVE_CAP: int = _env_int("MOVIE_BOOKING_ADMISSION_ACTIVE_CAP", 200)
+ADMISSION_SESSION_TTL: float = _env_float("MOVIE_BOOKING_ADMISSION_SESSION_TTL", 120.0)
+ADMISSION_QUEUE_MAX: int = _env_int("MOVIE_BOOKING_ADMISSION_QUEUE_MAX", 50_000)
+# token bucket per user_id untuk request ke showtime yang punya waiting room
+ADMISSION_RATE: float = _env_float("MOVIE_BOOKING_ADMISSION_RATE", 5.0)
+ADMISSION_BURST: int = _env_int("MOVIE_BOOKING_ADMISSION_BURST", 10)
+
+# laporan: booking per chunk saat scan ad-hoc (rentang tanggal di luar agregat)
+REPORT_SCAN_CHUNK: int = _env_int("MOVIE_BOOKING_REPORT_SCAN_CHUNK", 1_000)
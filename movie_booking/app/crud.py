@@ -1,13 +1,16 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterator, Tuple
 from fastapi import HTTPException
+from pydantic import ValidationError
 from .schemas import (
     MovieCreate, MovieUpdate, Movie,
-    ShowtimeCreate, Showtime, SeatStatus,
-    SeatCell, SeatLayout
+    ShowtimeCreate, Showtime, ShowtimeBulkCreate, SeatStatus,
+    StudioCreate, StudioUpdate, Studio, StudioShowtimesCreate,
+    SeatLayout, PricingRules
 )
-from . import storage
-from .utils import apply_promo, code_from_row_col, seat_type_for
+from . import admission, config, fastjson, paging, pricing, reports, search, storage, holds, layout_cache, metrics, seatfinder
+from .seatmap import layout_template
 import uuid
+import time
 from datetime import datetime
 
 
@@ -17,7 +20,9 @@ from datetime import datetime
 def create_movie(data: MovieCreate) -> Movie:
     """Buat movie baru dan simpan ke storage (in-memory)."""
     m = Movie(id=storage.next_movie_id(), **data.model_dump())
-    return storage.save_movie(m)
+    storage.save_movie(m)
+    storage.commit()
+    return m
 
 def update_movie(movie_id: int, data: MovieUpdate) -> Movie:
     """Update field yang diberikan (partial update) untuk movie tertentu."""
@@ -25,12 +30,37 @@ def update_movie(movie_id: int, data: MovieUpdate) -> Movie:
     if not m:
         raise HTTPException(404, "Movie not found")
     updated = m.model_copy(update=data.model_dump(exclude_unset=True))
-    return storage.save_movie(updated)
+    storage.save_movie(updated)
+    storage.commit()
+    return updated
+
+def search_movies(query: str, limit: int) -> List[dict]:
+    """Cari movie (title/synopsis/genre/rating) lewat inverted index; urut skor."""
+    hits = []
+    for movie_id, score in search.index.search(query, limit):
+        m = storage.get_movie(movie_id)
+        if m is not None:
+            hits.append({**m.model_dump(), "score": round(score, 4)})
+    return hits
+
+def _paged(fn, cursor: str | None, **kwargs) -> tuple[list, str | None]:
+    """Panggil fungsi page_* storage dengan cursor opaque; cursor rusak -> 400."""
+    try:
+        items, last = fn(after=paging.decode_cursor(cursor), **kwargs)
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+    return items, paging.encode_cursor(last)
+
+def list_movies_page(limit: int, cursor: str | None, genre: str | None = None,
+                     rating: str | None = None) -> tuple[List[Movie], str | None]:
+    """Satu halaman movie (urut id) + cursor halaman berikutnya."""
+    return _paged(storage.page_movies, cursor, limit=limit, genre=genre, rating=rating)
 
 def delete_movie(movie_id: int) -> None:
     """Hapus movie. Sekaligus cascade hapus showtime & seat map miliknya."""
     if not storage.delete_movie(movie_id):
         raise HTTPException(404, "Movie not found")
+    storage.commit()
 
 
 # =========================
@@ -41,7 +71,100 @@ def create_showtime(movie_id: int, data: ShowtimeCreate) -> Showtime:
     if not storage.get_movie(movie_id):
         raise HTTPException(404, "Movie not found")
     st = Showtime(id=storage.next_showtime_id(), movie_id=movie_id, **data.model_dump())
-    return storage.save_showtime(st)
+    storage.save_showtime(st)
+    storage.commit()
+    return st
+
+def create_showtimes_bulk(movie_id: int, data: ShowtimeBulkCreate) -> List[Showtime]:
+    """
+    Buat banyak showtime dari satu template studio sekaligus.
+    Template divalidasi & layout-nya di-intern sekali; per slot hanya salinan Showtime
+    (tanpa validasi ulang) dan seat map baru yang dibuat.
+    """
+    if not storage.get_movie(movie_id):
+        raise HTTPException(404, "Movie not found")
+    tpl = data.template
+    template = layout_template(tpl.rows, tpl.cols, tpl.aisles_cols, tpl.vip_seats, tpl.disabled_seats)
+    # prototype divalidasi sekali; tiap slot cukup copy dangkal (list layout dipakai bersama)
+    proto = Showtime(id=0, movie_id=movie_id, day=data.slots[0].day, time=data.slots[0].time,
+                     **tpl.model_dump())
+    created: List[Showtime] = []
+    for slot in data.slots:
+        st = proto.model_copy(update={"id": storage.next_showtime_id(), "day": slot.day, "time": slot.time})
+        storage.save_showtime(st, template)
+        created.append(st)
+    storage.commit()
+    return created
+
+
+def list_showtimes_page(limit: int, cursor: str | None, movie_id: int | None = None,
+                        studio: str | None = None, day_from: str | None = None,
+                        day_to: str | None = None) -> tuple[List[Showtime], str | None]:
+    """Satu halaman showtime (urut day, time) + cursor halaman berikutnya."""
+    return _paged(storage.page_showtimes, cursor, limit=limit, movie_id=movie_id,
+                  studio=studio, day_from=day_from, day_to=day_to)
+
+
+# =========================
+#        STUDIOS
+# =========================
+def create_studio(data: StudioCreate) -> Studio:
+    """Daftarkan studio; layout-nya di-intern sekali dan dipakai bersama semua showtime-nya."""
+    studio = Studio(id=storage.next_studio_id(), **data.model_dump())
+    storage.save_studio(studio)
+    storage.commit()
+    return studio
+
+def get_studio(studio_id: int) -> Studio:
+    studio = storage.get_studio(studio_id)
+    if not studio:
+        raise HTTPException(404, "Studio not found")
+    return studio
+
+def update_studio(studio_id: int, data: StudioUpdate) -> Studio:
+    """
+    Partial update studio. Layout yang sudah dipakai showtime tidak boleh diubah
+    (seat map showtime lama dibuat dari layout itu) -> 409.
+    """
+    studio = get_studio(studio_id)
+    changes = data.model_dump(exclude_unset=True)
+    if set(changes) - {"name"} and storage.studio_in_use(studio_id):
+        raise HTTPException(409, "Studio layout is used by existing showtimes")
+    try:
+        updated = Studio.model_validate({**studio.model_dump(), **changes})
+    except ValidationError as e:
+        raise HTTPException(422, e.errors(include_url=False, include_context=False))
+    storage.save_studio(updated)
+    storage.commit()
+    return updated
+
+def delete_studio(studio_id: int) -> None:
+    """Hapus studio; ditolak kalau masih ada showtime yang merujuknya."""
+    get_studio(studio_id)
+    if storage.studio_in_use(studio_id):
+        raise HTTPException(409, "Studio is used by existing showtimes")
+    storage.delete_studio(studio_id)
+    storage.commit()
+
+def create_showtimes_for_studio(studio_id: int, data: StudioShowtimesCreate) -> List[Showtime]:
+    """
+    Jadwalkan showtime di studio terdaftar. Semua showtime memakai LayoutTemplate
+    milik studio (flyweight): per slot hanya Showtime ringan + seat map baru.
+    """
+    studio = get_studio(studio_id)
+    if not storage.get_movie(data.movie_id):
+        raise HTTPException(404, "Movie not found")
+    template = storage.studio_template(studio_id)
+    layout = studio.model_dump(exclude={"id", "name"})
+    proto = Showtime(id=0, movie_id=data.movie_id, studio_id=studio_id, studio=studio.name,
+                     price=data.price, day=data.slots[0].day, time=data.slots[0].time, **layout)
+    created: List[Showtime] = []
+    for slot in data.slots:
+        st = proto.model_copy(update={"id": storage.next_showtime_id(), "day": slot.day, "time": slot.time})
+        storage.save_showtime(st, template)
+        created.append(st)
+    storage.commit()
+    return created
 
 
 # =========================
@@ -54,188 +177,474 @@ def get_seats_status(showtime_id: int) -> Dict[str, SeatStatus]:
         raise HTTPException(404, "Showtime not found")
     return seat_map
 
+def get_seat_changes(showtime_id: int, since: int | None) -> tuple[int, Dict[str, SeatStatus], bool]:
+    """
+    Peta kursi mode delta: hanya kursi yang berubah sejak versi `since`.
+    Return (version, seats, full) -> full=True kalau yang dikirim peta lengkap
+    (since kosong atau sudah di luar change log).
+    """
+    seat_map = storage.seats_map(showtime_id)
+    if seat_map is None:
+        raise HTTPException(404, "Showtime not found")
+    if since is not None:
+        version, changes = seat_map.changes_since(since)
+        if changes is not None:
+            return version, changes, False
+    # versi dibaca sebelum peta diserialisasi -> isi peta >= versi ini (aman untuk resume)
+    return seat_map.version, seat_map, True
+
+def _availability(st: Showtime) -> dict | None:
+    counts = storage.occupancy(st.id)
+    if counts is None:
+        return None
+    return {"showtime_id": st.id, "day": st.day, "time": st.time, "total": sum(counts.values()), **counts}
+
+def list_availability(showtime_ids: List[int] | None = None, movie_id: int | None = None,
+                      day: str | None = None) -> List[dict]:
+    """Okupansi banyak showtime sekaligus (urut day, time); O(jumlah showtime)."""
+    if showtime_ids:
+        shows = [st for st in map(storage.get_showtime, showtime_ids) if st is not None]
+    else:
+        shows = storage.list_showtimes(movie_id=movie_id, day=day)
+    shows.sort(key=lambda st: (st.day, st.time, st.id))
+    return [a for a in map(_availability, shows) if a is not None]
+
+def with_availability(showtimes: List[Showtime]) -> List[dict]:
+    """Showtime + field `availability` untuk listing (?with_availability=true)."""
+    return [{**st.model_dump(mode="json"), "availability": _availability(st)} for st in showtimes]
+
 def get_seat_layout(showtime_id: int) -> SeatLayout:
     """
     Kembalikan layout 2D untuk visualisasi:
     - screen_side, aisles_cols
     - grid[row][col] -> SeatCell(code, status, seat_type)
+    Layout di-cache per showtime dan hanya di-patch saat status kursi berubah.
     """
+    return get_seat_layout_with_etag(showtime_id)[0]
+
+@metrics.timed(metrics.crud_seconds, "get_seat_layout")
+def get_seat_layout_with_etag(showtime_id: int) -> tuple[SeatLayout, str]:
+    """Layout ter-cache + ETag yang konsisten dengan isinya."""
+    st = storage.get_showtime(showtime_id)
+    seat_map = storage.seats_map(showtime_id)
+    meta = storage.showtime_meta(showtime_id)
+    if not st or seat_map is None or meta is None:
+        raise HTTPException(404, "Showtime not found")
+    return layout_cache.get(st, seat_map, meta)
+
+def get_seat_layout_json(showtime_id: int) -> tuple[bytes, str]:
+    """Layout sebagai byte JSON siap kirim (mode fast JSON) + ETag-nya."""
     st = storage.get_showtime(showtime_id)
     seat_map = storage.seats_map(showtime_id)
     meta = storage.showtime_meta(showtime_id)
     if not st or seat_map is None or meta is None:
         raise HTTPException(404, "Showtime not found")
+    return fastjson.layout(st, seat_map, meta, layout_cache.LEGEND)
 
-    vip = meta["vip"]
-    disabled = meta["disabled"]
-    grid: List[List[SeatCell]] = []
+def seat_layout_etag(showtime_id: int) -> str:
+    """ETag layout saat ini tanpa membangun/serialisasi layout (untuk If-None-Match)."""
+    seat_map = storage.seats_map(showtime_id)
+    if seat_map is None:
+        raise HTTPException(404, "Showtime not found")
+    return layout_cache.etag_for(seat_map)
 
-    for r in range(1, st.rows + 1):
-        row_cells: List[SeatCell] = []
-        for c in range(1, st.cols + 1):
-            code = code_from_row_col(r, c)
-            status = seat_map.get(code)
-            if status is None:
-                continue
-            s_type = seat_type_for(code, vip, disabled)
-            row_cells.append(SeatCell(row=r, col=c, code=code, status=status, seat_type=s_type))
-        grid.append(row_cells)
-
-    return SeatLayout(
-        showtime_id=st.id,
-        rows=st.rows,
-        cols=st.cols,
-        screen_side=st.screen_side,
-        aisles_cols=meta["aisles"],
-        legend={
-            "available": "Kursi dapat dipesan",
-            "reserved": "Sedang di-cart pengguna lain",
-            "booked":   "Sudah dibayar",
-            "blocked":  "Dinonaktifkan",
-            "vip":      "Kursi VIP",
-            "standard": "Kursi standar",
-            "screen_side": "Posisi layar relatif grid",
-            "aisles_cols":  "Nomor kolom lorong/aisle (1-based)"
-        },
-        grid=grid
-    )
+@metrics.timed(metrics.crud_seconds, "find_best_available")
+def find_best_available(showtime_id: int, quantity: int) -> List[str]:
+    """Blok `quantity` kursi available bersebelahan paling tengah (tidak melewati aisle)."""
+    seat_map = storage.seats_map(showtime_id)
+    meta = storage.showtime_meta(showtime_id)
+    if seat_map is None or meta is None:
+        raise HTTPException(404, "Showtime not found")
+    seats = seatfinder.best_available(showtime_id, seat_map, meta, quantity)
+    if seats is None:
+        raise HTTPException(400, f"No {quantity} adjacent seats available")
+    return seats
 
 
 # =========================
 #          CART
 # =========================
+@metrics.timed(metrics.crud_seconds, "add_to_cart")
 def add_to_cart(user_id: str, showtime_id: int, seats: List[str]) -> tuple[str, float]:
     """
     Reserve kursi (status -> reserved) dan masukkan ke cart user.
+    Kursi ditahan selama HOLD_TTL_SECONDS, setelah itu dilepas oleh sweeper.
     Return: (cart_item_id, subtotal)
     """
+    if holds.has_expired():
+        release_expired_holds()
+
     seat_map = storage.seats_map(showtime_id)
     st = storage.get_showtime(showtime_id)
     meta = storage.showtime_meta(showtime_id)
     if seat_map is None or st is None or meta is None:
         raise HTTPException(404, "Showtime not found")
 
-    # validasi kursi exist & available
+    # validasi kursi exist & tidak dobel (layout tetap, aman dicek tanpa lock)
+    taken = set()
     for s in seats:
         if s not in seat_map:
             raise HTTPException(400, f"Seat {s} does not exist")
-        if seat_map[s] != SeatStatus.available:
-            raise HTTPException(400, f"Seat {s} is not available")
-
-    # reserve
-    for s in seats:
-        seat_map[s] = SeatStatus.reserved
+        if s in taken:
+            raise HTTPException(400, f"Seat {s} requested twice")
+        taken.add(s)
 
+    # cek available + reserve dalam satu langkah atomik (di bawah lock showtime).
+    # Backend SQLite: database yang memutuskan (UPDATE bersyarat + item cart dalam
+    # satu transaksi, berlaku lintas proses) sebelum seat map lokal diubah
     cart_item_id = str(uuid.uuid4())[:8]
-    items = storage.get_cart(user_id) or []
-    items.append((cart_item_id, showtime_id, list(seats)))
-    storage.set_cart(user_id, items)
-    subtotal = st.price * len(seats)
+    db = storage.seat_authority()
+    claim = None if db is None else (
+        lambda: db.reserve_into_cart(user_id, (cart_item_id, showtime_id, list(seats))))
+    bad = storage.transition_seats(showtime_id, seats, SeatStatus.available, SeatStatus.reserved, claim)
+    if bad is not None:
+        raise HTTPException(400, f"Seat {bad} is not available")
+
+    with storage.cart_lock(user_id):
+        storage.put_cart_item(user_id, cart_item_id, showtime_id, list(seats))
+        holds.hold(user_id, cart_item_id)
+    storage.commit()
+    subtotal = pricing.item_subtotal(st, storage.showtime_meta(showtime_id), seats)
     return cart_item_id, subtotal
 
+# berapa kali mencari ulang kalau blok terbaik keburu di-reserve orang lain
+_BEST_AVAILABLE_ATTEMPTS = 3
+
+def add_best_available_to_cart(user_id: str, showtime_id: int, quantity: int) -> tuple[str, List[str], float]:
+    """
+    Cari blok kursi terbaik lalu reserve lewat `add_to_cart` (atomik per batch).
+    Return: (cart_item_id, seats, subtotal)
+    """
+    for attempt in range(_BEST_AVAILABLE_ATTEMPTS):
+        seats = find_best_available(showtime_id, quantity)
+        try:
+            cart_item_id, subtotal = add_to_cart(user_id, showtime_id, seats)
+            return cart_item_id, seats, subtotal
+        except HTTPException:
+            if attempt == _BEST_AVAILABLE_ATTEMPTS - 1:
+                raise
+
+def add_batch_to_cart(user_id: str, groups: List[Tuple[int, List[str]]]) -> tuple[list, float]:
+    """
+    Reserve banyak (showtime, kursi) sekaligus, all-or-nothing: satu kali ambil
+    lock per showtime, satu item cart per grup.
+    Return: (items [{id, showtime_id, seats, subtotal}], total)
+    """
+    if holds.has_expired():
+        release_expired_holds()
+
+    seen: Dict[int, set] = {}
+    for showtime_id, seats in groups:
+        seat_map = storage.seats_map(showtime_id)
+        if seat_map is None or storage.get_showtime(showtime_id) is None:
+            raise HTTPException(404, f"Showtime {showtime_id} not found")
+        taken = seen.setdefault(showtime_id, set())
+        for s in seats:
+            if s not in seat_map:
+                raise HTTPException(400, f"Seat {s} does not exist")
+            if s in taken:
+                raise HTTPException(400, f"Seat {s} requested twice for showtime {showtime_id}")
+            taken.add(s)
+
+    items = [(str(uuid.uuid4())[:8], showtime_id, list(seats)) for showtime_id, seats in groups]
+    db = storage.seat_authority()
+    claim = None if db is None else (lambda: db.reserve_batch_into_cart(user_id, items))
+    failed = storage.transition_seats_batch(groups, SeatStatus.available, SeatStatus.reserved, claim)
+    if failed is not None:
+        raise HTTPException(400, f"Seat {failed[1]} is not available (showtime {failed[0]})")
+
+    result = []
+    total = 0.0
+    with storage.cart_lock(user_id):
+        for cart_item_id, showtime_id, seats in items:
+            storage.put_cart_item(user_id, cart_item_id, showtime_id, list(seats))
+            holds.hold(user_id, cart_item_id)
+            subtotal = pricing.item_subtotal(storage.get_showtime(showtime_id),
+                                             storage.showtime_meta(showtime_id), seats)
+            total += subtotal
+            result.append({"id": cart_item_id, "showtime_id": showtime_id, "seats": list(seats), "subtotal": subtotal})
+    storage.commit()
+    return result, total
+
 def remove_from_cart(user_id: str, cart_item_id: str | None, seats: List[str] | None) -> None:
     """
     Hapus kursi tertentu dari item (partial) atau hapus item penuh berdasarkan cart_item_id.
     Mengembalikan kursi yang dilepas ke status 'available'.
     """
-    items = storage.get_cart(user_id) or []
-    new_items: List[Tuple[str, int, List[str]]] = []
-    changed = False
-
-    for cid, stid, seat_list in items:
-        seat_map = storage.seats_map(stid)
+    with storage.cart_lock(user_id):
+        released: List[Tuple[int, List[str]]] = []
 
         # hapus seluruh item
-        if cart_item_id and cid == cart_item_id:
-            for s in seat_list:
-                seat_map[s] = SeatStatus.available
-            changed = True
-            continue
+        if cart_item_id:
+            item = storage.drop_cart_item(user_id, cart_item_id)
+            if item is not None:
+                released.append(item)
+                holds.drop(user_id, cart_item_id)
 
-        # hapus sebagian kursi dari item mana pun
+        # hapus sebagian kursi dari item mana pun (lewat index kepemilikan kursi)
         if seats:
-            keep = [s for s in seat_list if s not in seats]
-            if len(keep) != len(seat_list):
-                for s in seat_list:
-                    if s in seats:
-                        seat_map[s] = SeatStatus.available
-                changed = True
-                if keep:
-                    new_items.append((cid, stid, keep))
-                continue
+            for cid, stid, removed, emptied in storage.remove_cart_seats(user_id, seats):
+                released.append((stid, removed))
+                if emptied:
+                    holds.drop(user_id, cid)
+
+        if not released:
+            raise HTTPException(400, "No matching cart item or seats to remove")
+
+        # kursi milik cart ini pasti reserved -> kembalikan ke available
+        for stid, seat_list in released:
+            if storage.seats_map(stid) is not None:
+                storage.transition_seats(stid, seat_list, SeatStatus.reserved, SeatStatus.available)
+    storage.commit()
+
+def get_seat_holder(showtime_id: int, seat: str) -> dict:
+    """Siapa (user & cart item) yang sedang memegang kursi reserved."""
+    seat_map = storage.seats_map(showtime_id)
+    if seat_map is None:
+        raise HTTPException(404, "Showtime not found")
+    if seat not in seat_map:
+        raise HTTPException(400, f"Seat {seat} does not exist")
+    holder = storage.seat_holder(showtime_id, seat)
+    if holder is None:
+        raise HTTPException(404, f"Seat {seat} is not held by any cart")
+    return {"showtime_id": showtime_id, "seat": seat, "user_id": holder[0], "cart_item_id": holder[1]}
+
+def release_expired_holds(at: float | None = None) -> int:
+    """
+    Lepas semua cart item yang hold-nya kadaluarsa (kursi -> available), dan
+    abort transaksi 2PC prepared yang melewati config.PREPARED_TX_TTL.
+    Dipanggil background sweeper; biaya sebanding jumlah hold yang expired.
+    Return: jumlah cart item yang dilepas.
+    """
+    t0 = time.perf_counter()
+    released = 0
+    for txid in storage.expired_txs(holds.now() if at is None else at):
+        abort_checkout(txid)   # item kembali ke cart dengan hold baru
+    for user_id, cid in holds.pop_expired(at):
+        try:
+            remove_from_cart(user_id, cid, None)
+            released += 1
+        except HTTPException:
+            pass  # item sudah di-checkout / dihapus duluan
+    holds.record_sweep(released, time.perf_counter() - t0)
+    return released
+
+def restore_holds() -> int:
+    """Daftarkan ulang hold (TTL penuh) untuk cart hasil recovery. Return jumlah item."""
+    count = 0
+    for user_id, items in storage.list_carts():
+        for cid, _, _ in items:
+            holds.hold(user_id, cid)
+            count += 1
+    return count
+
+def _showtime_and_template(showtime_id: int):
+    return storage.get_showtime(showtime_id), storage.showtime_meta(showtime_id)
+
+def get_cart_summary(user_id: str) -> tuple[list, float]:
+    """Hitung ulang subtotal per item & total cart untuk user (satu panggilan batch pricing)."""
+    return pricing.price_items(storage.get_cart(user_id) or [], _showtime_and_template)
 
-        new_items.append((cid, stid, seat_list))
 
-    if not changed and len(new_items) == len(items):
-        raise HTTPException(400, "No matching cart item or seats to remove")
+# =========================
+#       WAITING ROOM
+# =========================
+def open_waiting_room(showtime_id: int, settings: dict) -> dict:
+    """Aktifkan / ubah waiting room showtime (on-sale rush)."""
+    if storage.get_showtime(showtime_id) is None:
+        raise HTTPException(404, "Showtime not found")
+    return admission.open_room(showtime_id, **settings).stats()
 
-    storage.set_cart(user_id, new_items)
+def waiting_room(showtime_id: int) -> admission.WaitingRoom:
+    room = admission.rooms.get(showtime_id)
+    if room is None:
+        raise HTTPException(404, "No waiting room for this showtime")
+    return room
 
-def get_cart_summary(user_id: str) -> tuple[list, float]:
-    """Hitung ulang subtotal per item & total cart untuk user."""
-    items = storage.get_cart(user_id) or []
-    enriched = []
+def close_waiting_room(showtime_id: int) -> None:
+    if not admission.close_room(showtime_id):
+        raise HTTPException(404, "No waiting room for this showtime")
+
+
+# =========================
+#         PRICING
+# =========================
+def get_pricing() -> PricingRules:
+    return storage.get_pricing()
+
+def set_pricing(rules: PricingRules) -> PricingRules:
+    """Ganti rules harga (tier seat_type, rule hari/jam, tabel promo); berlaku untuk quote berikutnya."""
+    storage.save_pricing(rules)
+    storage.commit()
+    return rules
+
+def quote(items: List[Tuple[int, List[str]]], promo_code: str | None) -> dict:
+    """Harga banyak (showtime, kursi) sekaligus tanpa reserve, satu snapshot rules untuk semua item."""
+    eng = pricing.engine()
+    lines = []
     total = 0.0
-    for cid, stid, seat_list in items:
-        st = storage.get_showtime(stid)
-        subtotal = st.price * len(seat_list)
+    for showtime_id, seats in items:
+        st, template = _showtime_and_template(showtime_id)
+        if st is None or template is None:
+            raise HTTPException(404, f"Showtime {showtime_id} not found")
+        for s in seats:
+            if s not in template.index.index:
+                raise HTTPException(400, f"Seat {s} does not exist")
+        mix = pricing.seat_mix(template, seats)
+        if any(seat_type == "blocked" for seat_type, _ in mix):
+            raise HTTPException(400, f"Blocked seats cannot be priced (showtime {showtime_id})")
+        subtotal = eng.quote(st, mix)
         total += subtotal
-        enriched.append({"id": cid, "showtime_id": stid, "seats": seat_list, "subtotal": subtotal})
-    return enriched, total
+        lines.append({"showtime_id": showtime_id, "seats": seats, "seat_types": dict(mix), "subtotal": subtotal})
+    discount = eng.discount(total, promo_code)
+    return {"items": lines, "total": total, "discount_amount": discount, "total_paid": max(0.0, total - discount)}
+
+def quote_cart(user_id: str, promo_code: str | None) -> dict:
+    """Harga seluruh cart + promo tanpa checkout."""
+    items, total = get_cart_summary(user_id)
+    discount = pricing.promo_discount(total, promo_code)
+    return {"user_id": user_id, "items": items, "total": total, "discount_amount": discount,
+            "total_paid": max(0.0, total - discount)}
 
 
 # =========================
 #         CHECKOUT
 # =========================
-def checkout(user_id: str, promo_code: str | None) -> dict:
-    """
-    Validasi kursi masih reserved, hitung total & promo, finalisasi -> booked,
-    kosongkan cart, generate booking_code, SIMPAN booking agar bisa dicek lagi.
-    """
-    items = storage.get_cart(user_id) or []
+def _require_cart(items: list) -> None:
     if not items:
+        metrics.checkout_failures.inc(1, "empty_cart")
         raise HTTPException(400, "Cart is empty")
+    for _, stid, _ in items:
+        if storage.seats_map(stid) is None:
+            metrics.checkout_failures.inc(1, "showtime_gone")
+            raise HTTPException(400, f"Showtime {stid} no longer exists")
 
-    total = 0.0
-    result_items = []
+def _price_reserved_items(items: list) -> tuple[float, list]:
+    """Pastikan kursi item masih reserved & hitung subtotal. Pemanggil memegang lock showtime."""
     for cid, stid, seat_list in items:
-        st = storage.get_showtime(stid)
-        seat_map = storage.seats_map(stid)
-        for s in seat_list:
-            if seat_map.get(s) != SeatStatus.reserved:
-                raise HTTPException(400, f"Seat {s} not reserved anymore")
-        subtotal = st.price * len(seat_list)
-        total += subtotal
-        result_items.append({"id": cid, "showtime_id": stid, "seats": seat_list, "subtotal": subtotal})
-
-    discount = apply_promo(total, promo_code)
-    total_paid = max(0.0, total - discount)
-
-    # finalize -> booked
-    for _, stid, seat_list in items:
-        seat_map = storage.seats_map(stid)
-        for s in seat_list:
-            seat_map[s] = SeatStatus.booked
-
-    storage.set_cart(user_id, [])
-    code = f"BKG-{uuid.uuid4().hex[:10].upper()}"
-    timestamp = datetime.now().isoformat(timespec="seconds")
-
-    payload = {
-        "booking_code": code,
+        bad = storage.seats_map(stid).check(seat_list, SeatStatus.reserved)
+        if bad is not None:
+            metrics.checkout_failures.inc(1, "seat_not_reserved")
+            raise HTTPException(400, f"Seat {bad} not reserved anymore")
+    result_items, total = pricing.price_items(items, _showtime_and_template)
+    for item in result_items:
+        item["movie_id"] = storage.get_showtime(item["showtime_id"]).movie_id
+    return total, result_items
+
+def build_booking(user_id: str, result_items: list, total: float, promo_code: str | None) -> dict:
+    """Payload booking (CheckoutResponse): promo, booking_code, timestamp."""
+    discount = pricing.promo_discount(total, promo_code)
+    return {
+        "booking_code": f"BKG-{uuid.uuid4().hex[:10].upper()}",
         "user_id": user_id,
         "total_before_discount": total,
         "discount_amount": discount,
-        "total_paid": total_paid,
+        "total_paid": max(0.0, total - discount),
         "items": result_items,
-        "timestamp": timestamp
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "promo_code": promo_code.upper() if discount else None,
     }
 
-    # SIMPAN booking agar bisa dicek ulang
-    storage.save_booking(payload)
+@metrics.timed(metrics.crud_seconds, "checkout")
+def checkout(user_id: str, promo_code: str | None) -> dict:
+    """
+    Validasi kursi masih reserved, hitung total & promo, finalisasi -> booked,
+    kosongkan cart, generate booking_code, SIMPAN booking agar bisa dicek lagi.
+    """
+    if holds.has_expired():
+        release_expired_holds()
+
+    with storage.cart_lock(user_id):
+        items = storage.get_cart(user_id) or []
+        _require_cart(items)
+
+        # lock semua showtime di cart: validasi reserved & finalisasi booked atomik
+        with storage.showtime_locks(stid for _, stid, _ in items):
+            total, result_items = _price_reserved_items(items)
+            payload = build_booking(user_id, result_items, total, promo_code)
+
+            # backend SQLite: reserved -> booked bersyarat di database dulu (kursi bisa
+            # saja sudah dilepas / diambil proses lain); gagal -> seat map tidak berubah
+            db = storage.seat_authority()
+            if db is not None:
+                bad = db.finalize_checkout(user_id, payload)
+                if bad is not None:
+                    metrics.checkout_failures.inc(1, "seat_not_reserved")
+                    raise HTTPException(400, f"Seat {bad} not reserved anymore")
+
+            # finalize -> booked, kosongkan cart, SIMPAN booking (satu record journal)
+            storage.finalize_checkout(user_id, payload)
+
+        for cid, _, _ in items:
+            holds.drop(user_id, cid)
+
+    storage.commit()
+    metrics.cart_seats.observe(sum(len(seat_list) for _, _, seat_list in items))
     return payload
 
 
+# =========================
+#     MODE SHARDED (SHARD)
+# =========================
+# Dipanggil router (app.shard_router). Movie & studio dibuat di shard 0 lalu
+# direplikasi ke shard lain apa adanya (id ikut), supaya showtime bisa dibuat
+# di shard mana pun.
+def replicate_movie(movie: Movie) -> Movie:
+    storage.save_movie(movie)
+    storage.commit()
+    return movie
+
+def replicate_studio(studio: Studio) -> Studio:
+    storage.save_studio(studio)
+    storage.commit()
+    return studio
+
+def drop_studio_replica(studio_id: int) -> None:
+    if storage.studio_in_use(studio_id):
+        raise HTTPException(409, "Studio is used by existing showtimes")
+    storage.delete_studio(studio_id)
+    storage.commit()
+
+# ---------- two-phase checkout: cart user tersebar di beberapa shard ----------
+def prepare_checkout(user_id: str, txid: str) -> dict:
+    """Fase 1: validasi & kunci item cart di shard ini ke transaksi `txid`."""
+    with storage.cart_lock(user_id):
+        items = storage.get_cart(user_id) or []
+        _require_cart(items)
+        with storage.showtime_locks(stid for _, stid, _ in items):
+            total, result_items = _price_reserved_items(items)
+            storage.prepare_tx(txid, user_id, items, holds.now() + config.PREPARED_TX_TTL)
+            storage.clear_cart(user_id)
+        for cid, _, _ in items:
+            holds.drop(user_id, cid)
+    storage.commit()
+    return {"items": result_items, "total": total}
+
+def commit_checkout(txid: str, booking: dict | None) -> None:
+    """Fase 2: kursi transaksi -> booked; `booking` disimpan kalau shard ini home-nya."""
+    tx = storage.pop_tx(txid)
+    if tx is None:
+        raise HTTPException(404, "Unknown transaction")
+    user_id, items = tx
+    live = [stid for _, stid, _ in items if storage.seats_map(stid) is not None]
+    with storage.showtime_locks(live):
+        storage.commit_tx(user_id, items, booking)
+    storage.commit()
+
+def abort_checkout(txid: str) -> bool:
+    """Batalkan transaksi prepared: item kembali ke cart dengan hold baru."""
+    tx = storage.pop_tx(txid)
+    if tx is None:
+        return False
+    user_id, items = tx
+    with storage.cart_lock(user_id):
+        for cid, stid, seat_list in items:
+            storage.put_cart_item(user_id, cid, stid, seat_list)
+            holds.hold(user_id, cid)
+    storage.commit()
+    return True
+
+
 # =========================
 #       TICKETS (NEW)
 # =========================
@@ -249,3 +658,86 @@ def get_booking(booking_code: str) -> dict:
 def list_user_bookings(user_id: str) -> list[dict]:
     """List semua tiket milik user (untuk /users/{user_id}/tickets)."""
     return storage.list_bookings_by_user(user_id)
+
+def list_user_bookings_page(user_id: str, limit: int, cursor: str | None,
+                            date_from: str | None = None,
+                            date_to: str | None = None) -> tuple[list[dict], str | None]:
+    """Satu halaman tiket user (urut waktu checkout) + cursor halaman berikutnya."""
+    return _paged(storage.page_bookings_by_user, cursor, user_id=user_id, limit=limit,
+                  date_from=date_from, date_to=date_to)
+
+
+# =========================
+#         REPORTS
+# =========================
+def _scan_bookings(date_from: str | None, date_to: str | None) -> Iterator[dict]:
+    """
+    Scan log booking per chunk (config.REPORT_SCAN_CHUNK). Tiap chunk cuma slice
+    list tanpa lock, dan GIL dilepas di antara chunk -> checkout tetap jalan.
+    Booking yang masuk selama scan ikut terbaca sampai ujung log.
+    """
+    hi = paging.upper(date_to) if date_to else None
+    start = 0
+    while True:
+        chunk = storage.booking_chunk(start, config.REPORT_SCAN_CHUNK)
+        if not chunk:
+            return
+        start += len(chunk)
+        for b in chunk:
+            ts = b.get("timestamp", "")
+            if (date_from and ts < date_from) or (hi and ts > hi):
+                continue
+            yield b
+        time.sleep(0)
+
+def revenue_report(group: str, date_from: str | None = None,
+                   date_to: str | None = None) -> Tuple[Tuple[str, ...], Iterator[dict]]:
+    """
+    Revenue per grup (movie / showtime / day / promo / movie_day) -> (kolom, baris).
+    Tanpa rentang tanggal, atau grup yang punya kolom day: dari agregat inkremental.
+    Selain itu scan berpotongan atas seluruh booking (memori sebanding jumlah grup).
+    """
+    if group not in reports.GROUPS:
+        raise HTTPException(400, f"Unknown report group: {group}")
+    columns = reports.GROUPS[group] + reports.FIELDS
+    if (not date_from and not date_to) or "day" in reports.GROUPS[group]:
+        return columns, reports.totals.rows(group, date_from, date_to)
+    return columns, reports.fold(_scan_bookings(date_from, date_to), group)
+
+def occupancy_report(group: str, movie_id: int | None = None,
+                     day: str | None = None) -> Tuple[Tuple[str, ...], Iterator[dict]]:
+    """Fill rate (booked / kursi yang bisa dijual) per showtime / movie / studio / day dari counter O(1)."""
+    if group not in reports.OCCUPANCY_GROUPS:
+        raise HTTPException(400, f"Unknown report group: {group}")
+    names = reports.OCCUPANCY_GROUPS[group]
+    shows = storage.list_showtimes(movie_id=movie_id, day=day)
+    shows.sort(key=lambda st: (st.day, st.time, st.id))
+
+    def fill(row: dict) -> dict:
+        sellable = row["total"] - row["blocked"]
+        row["fill_rate"] = round(row["booked"] / sellable, 4) if sellable else 0.0
+        return row
+
+    def per_showtime() -> Iterator[Tuple[Showtime, dict]]:
+        for st in shows:
+            counts = storage.occupancy(st.id)
+            if counts is not None:
+                yield st, {"showtime_id": st.id, "showtimes": 1, "total": sum(counts.values()), **counts}
+
+    def grouped() -> Iterator[dict]:
+        summed = reports.OCCUPANCY_FIELDS[:-1]
+        acc: Dict[tuple, dict] = {}
+        for st, row in per_showtime():
+            key = (getattr(st, names[0]),)
+            cur = acc.get(key)
+            if cur is None:
+                acc[key] = {names[0]: key[0], **{f: row[f] for f in summed}}
+            else:
+                for f in summed:
+                    cur[f] += row[f]
+        for key in sorted(acc, key=lambda k: "" if k[0] is None else k[0]):
+            yield fill(acc[key])
+
+    if group == "showtime":
+        return names + reports.OCCUPANCY_FIELDS, (fill(row) for _, row in per_showtime())
+    return names + reports.OCCUPANCY_FIELDS, grouped()
@@ -0,0 +1,140 @@
+import json
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+from . import config
+from .schemas import CheckoutResponse, Showtime
+from .seatmap import STATUSES, LayoutTemplate, SeatIndex, SeatMap
+
+# =========================
+#     FAST JSON RESPONSE
+# =========================
+# Mode opt-in (MOVIE_BOOKING_FAST_JSON=1): endpoint baca besar mengembalikan
+# byte JSON yang sudah jadi, tanpa validasi ulang `response_model` per item.
+# Bagian statis (key kursi, fragmen sel layout, showtime, booking) di-encode
+# sekali lalu di-cache; per request hanya status kursi yang disambung. Cache
+# booking (jumlahnya terus bertambah) dibatasi LRU FAST_JSON_BOOKING_CACHE entry.
+# Output identik byte-per-byte dengan jalur pydantic (dicek di tests), dan
+# `response_model` di route tetap dipakai untuk dokumentasi OpenAPI.
+
+enabled: bool = config.FAST_JSON
+
+MEDIA_TYPE = "application/json"
+
+_STATUS_JSON: Tuple[bytes, ...] = tuple(json.dumps(s.value).encode() for s in STATUSES)
+
+
+def set_enabled(flag: bool) -> None:
+    global enabled
+    enabled = flag
+
+
+def _dumps(obj) -> bytes:
+    # sama dengan JSONResponse starlette: compact, tanpa escape non-ASCII
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+# per showtime: (seat_map, version, bytes) -> valid selama seat map & versi sama
+_seats_cache: Dict[int, Tuple[SeatMap, int, bytes]] = {}
+_layout_cache: Dict[int, Tuple[SeatMap, int, bytes]] = {}
+_showtime_cache: Dict[int, Tuple[Showtime, bytes]] = {}
+_booking_cache: "OrderedDict[str, bytes]" = OrderedDict()   # booking_code -> bytes (LRU)
+_lock = threading.Lock()
+
+
+# ---------- seat map ----------
+@lru_cache(maxsize=None)
+def _seat_keys(index: SeatIndex) -> Tuple[bytes, ...]:
+    return tuple(_dumps(code) + b":" for code in index.codes)
+
+
+def _state(seat_map: SeatMap) -> Tuple[int, bytes]:
+    with seat_map.lock:
+        return seat_map.version, seat_map.snapshot()
+
+
+def seats(showtime_id: int, seat_map: SeatMap) -> bytes:
+    """Peta kursi penuh {"A1":"available",...}."""
+    hit = _seats_cache.get(showtime_id)
+    if hit is not None and hit[0] is seat_map and hit[1] == seat_map.version:
+        return hit[2]
+    version, state = _state(seat_map)
+    keys = _seat_keys(seat_map.layout)
+    status = _STATUS_JSON
+    body = b"{" + b",".join([keys[i] + status[c] for i, c in enumerate(state)]) + b"}"
+    with _lock:
+        _seats_cache[showtime_id] = (seat_map, version, body)
+    return body
+
+
+# ---------- layout ----------
+@lru_cache(maxsize=1024)
+def _cell_parts(meta: LayoutTemplate) -> Tuple[Tuple[bytes, bytes], ...]:
+    """Per kursi (index linear): fragmen sebelum & sesudah nilai status."""
+    parts = []
+    for static_row in meta.grid:
+        for r, c, code, seat_type in static_row:
+            parts.append((b'{"row":%d,"col":%d,"code":%s,"status":' % (r, c, _dumps(code)),
+                          b',"seat_type":%s}' % _dumps(seat_type)))
+    return tuple(parts)
+
+
+def layout(st: Showtime, seat_map: SeatMap, meta: LayoutTemplate, legend: Dict[str, str]) -> Tuple[bytes, str]:
+    """SeatLayout sebagai JSON + ETag yang sesuai versi yang di-encode."""
+    hit = _layout_cache.get(st.id)
+    if hit is None or hit[0] is not seat_map or hit[1] != seat_map.version:
+        version, state = _state(seat_map)
+        parts = _cell_parts(meta)
+        status = _STATUS_JSON
+        cols = seat_map.layout.cols
+        head = _dumps({
+            "showtime_id": st.id, "rows": st.rows, "cols": st.cols,
+            "screen_side": st.screen_side.value, "aisles_cols": list(meta.aisles), "legend": legend,
+        })
+        rows = []
+        for base in range(0, len(state), cols):
+            rows.append(b"[" + b",".join([parts[i][0] + status[state[i]] + parts[i][1]
+                                          for i in range(base, base + cols)]) + b"]")
+        hit = (seat_map, version, head[:-1] + b',"grid":[' + b",".join(rows) + b"]}")
+        with _lock:
+            _layout_cache[st.id] = hit
+    return hit[2], f'"{seat_map.uid}.{hit[1]}"'
+
+
+# ---------- daftar showtime & tiket ----------
+def showtimes(items: Iterable[Showtime]) -> bytes:
+    """List[Showtime]; tiap showtime di-encode sekali selama objeknya tidak diganti."""
+    parts: List[bytes] = []
+    for st in items:
+        hit = _showtime_cache.get(st.id)
+        if hit is None or hit[0] is not st:
+            hit = (st, st.model_dump_json().encode())
+            _showtime_cache[st.id] = hit
+        parts.append(hit[1])
+    return b"[" + b",".join(parts) + b"]"
+
+
+def bookings(items: Iterable[dict]) -> bytes:
+    """List[CheckoutResponse]; booking immutable, jadi cukup di-encode sekali per kode."""
+    parts: List[bytes] = []
+    for b in items:
+        code = b["booking_code"]
+        with _lock:
+            body = _booking_cache.get(code)
+            if body is not None:
+                _booking_cache.move_to_end(code)
+        if body is None:
+            body = CheckoutResponse.model_validate(b).model_dump_json().encode()
+            with _lock:
+                _booking_cache[code] = body
+                while len(_booking_cache) > config.FAST_JSON_BOOKING_CACHE:
+                    _booking_cache.popitem(last=False)
+        parts.append(body)
+    return b"[" + b",".join(parts) + b"]"
+
+
+def invalidate(showtime_id: int) -> None:
+    _seats_cache.pop(showtime_id, None)
+    _layout_cache.pop(showtime_id, None)
+    _showtime_cache.pop(showtime_id, None)
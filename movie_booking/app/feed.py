@@ -0,0 +1,58 @@
+import asyncio
+import json
+from typing import AsyncIterator, Dict
+from .schemas import SeatStatus
+from .seatmap import SeatMap
+
+# interval komentar keep-alive SSE (detik)
+HEARTBEAT_SECONDS = 15.0
+
+
+def _sse(event: str, version: int, seats: Dict[str, SeatStatus]) -> str:
+    data = json.dumps({"version": version, "seats": {k: v.value for k, v in seats.items()}})
+    return f"id: {version}\nevent: {event}\ndata: {data}\n\n"
+
+
+async def seat_events(seat_map: SeatMap, since: int | None = None,
+                      heartbeat: float = HEARTBEAT_SECONDS) -> AsyncIterator[str]:
+    """
+    Stream Server-Sent Events perubahan kursi satu showtime.
+    - event `snapshot`: peta kursi lengkap (awal koneksi / since terlalu lama)
+    - event `delta`: hanya kursi yang berubah sejak event sebelumnya
+    `id` tiap event = versi seat map, jadi client bisa resume lewat Last-Event-ID.
+    Perubahan dari thread lain (endpoint sync) membangunkan stream lewat
+    loop.call_soon_threadsafe, tanpa polling.
+    """
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+
+    def on_change() -> None:
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            pass   # loop client sudah tertutup; unsubscribe menyusul di finally
+
+    seat_map.subscribe(on_change)
+    try:
+        version = since
+        while True:
+            wake.clear()
+            if version is None:
+                changes = None
+                now = seat_map.version
+            else:
+                now, changes = seat_map.changes_since(version)
+            if changes is None:
+                with seat_map.lock:
+                    now = seat_map.version
+                    full = seat_map.to_dict()
+                yield _sse("snapshot", now, full)
+            elif changes:
+                yield _sse("delta", now, changes)
+            version = now
+            try:
+                await asyncio.wait_for(wake.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+    finally:
+        seat_map.unsubscribe(on_change)
@@ -0,0 +1,111 @@
+import heapq
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+from . import config, metrics
+
+log = logging.getLogger(__name__)
+
+# ---------- hold (TTL) per cart item ----------
+# Min-heap berdasarkan deadline. Entry lama tidak dihapus dari heap (lazy deletion):
+# saat di-pop, entry hanya berlaku kalau deadline-nya masih sama dengan _deadlines.
+# Biaya sweep = O(expired log n), bukan scan semua cart. Key = (user_id,
+# cart_item_id): id item hanya unik di dalam satu cart.
+_heap: List[Tuple[float, str, str]] = []            # (deadline, user_id, cart_item_id)
+_deadlines: Dict[Tuple[str, str], float] = {}       # (user_id, cart_item_id) -> deadline (monotonic)
+_lock = threading.Lock()
+
+stats = {
+    "sweeps": 0,
+    "released_last_sweep": 0,
+    "released_total": 0,
+    "last_sweep_ms": 0.0,
+    "max_sweep_ms": 0.0,
+    "errors": 0,
+}
+
+def now() -> float:
+    return time.monotonic()
+
+def hold(user_id: str, cart_item_id: str, ttl: float | None = None) -> float:
+    """Daftarkan hold untuk cart item; return deadline (monotonic)."""
+    deadline = now() + (config.HOLD_TTL_SECONDS if ttl is None else ttl)
+    with _lock:
+        _deadlines[(user_id, cart_item_id)] = deadline
+        heapq.heappush(_heap, (deadline, user_id, cart_item_id))
+    return deadline
+
+def drop(user_id: str, cart_item_id: str) -> None:
+    """Hapus hold (item di-checkout / dihapus manual)."""
+    with _lock:
+        _deadlines.pop((user_id, cart_item_id), None)
+
+def expires_in(user_id: str, cart_item_id: str) -> float | None:
+    deadline = _deadlines.get((user_id, cart_item_id))
+    return None if deadline is None else max(0.0, deadline - now())
+
+def pop_expired(at: float | None = None) -> List[Tuple[str, str]]:
+    """Ambil semua hold yang sudah lewat deadline: [(user_id, cart_item_id)]."""
+    at = now() if at is None else at
+    out: List[Tuple[str, str]] = []
+    with _lock:
+        while _heap and _heap[0][0] <= at:
+            deadline, user_id, cid = heapq.heappop(_heap)
+            if _deadlines.get((user_id, cid)) == deadline:
+                del _deadlines[(user_id, cid)]
+                out.append((user_id, cid))
+    return out
+
+def has_expired(at: float | None = None) -> bool:
+    """Cek murah O(1) apakah ada entry heap yang sudah jatuh tempo."""
+    at = now() if at is None else at
+    return bool(_heap) and _heap[0][0] <= at
+
+def record_sweep(released: int, elapsed_s: float) -> None:
+    ms = elapsed_s * 1000
+    with _lock:
+        stats["sweeps"] += 1
+        stats["released_last_sweep"] = released
+        stats["released_total"] += released
+        stats["last_sweep_ms"] = ms
+        stats["max_sweep_ms"] = max(stats["max_sweep_ms"], ms)
+
+def snapshot_stats() -> dict:
+    with _lock:
+        return {**stats, "active_holds": len(_deadlines), "heap_size": len(_heap)}
+
+metrics.CallbackMetric(
+    "cart_holds_active", "Cart item yang sedang menahan kursi.", (),
+    lambda: {(): len(_deadlines)})
+metrics.CallbackMetric(
+    "cart_holds_released_total", "Cart item yang dilepas sweeper karena hold kadaluarsa.", (),
+    lambda: {(): stats["released_total"]}, kind="counter")
+
+# ---------- background sweeper ----------
+class Sweeper:
+    """Thread daemon yang memanggil `sweep()` tiap `interval` detik."""
+
+    def __init__(self, sweep: Callable[[], int], interval: float | None = None):
+        self._sweep = sweep
+        self._interval = config.HOLD_SWEEP_INTERVAL if interval is None else interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="hold-sweeper", daemon=True)
+
+    def start(self) -> "Sweeper":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        # satu sweep gagal tidak boleh mematikan thread (hold tidak akan pernah kadaluarsa lagi)
+        while not self._stop.wait(self._interval):
+            try:
+                self._sweep()
+            except Exception:
+                log.exception("hold sweep failed")
+                with _lock:
+                    stats["errors"] += 1
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+from fastapi import HTTPException
+from . import config, metrics
+
+# =========================
+#      IDEMPOTENCY KEY
+# =========================
+# Hasil request sukses disimpan per (endpoint, user, key) di store terbatas
+# (LRU + TTL). Duplikat mengembalikan hasil yang sama tanpa menyentuh seat map.
+# Duplikat yang datang saat eksekusi pertama masih berjalan menunggu hasilnya.
+# Request yang gagal tidak disimpan (tidak ada state yang berubah), jadi retry
+# dengan key yang sama dijalankan ulang.
+
+replays = metrics.Counter(
+    "idempotency_replays_total", "Request duplikat yang dijawab dari cache idempotency.", ("endpoint",))
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "done", "result", "expires_at")
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.done = threading.Event()
+        self.result: Any = None
+        self.expires_at = float("inf")   # pending tidak pernah kadaluarsa
+
+
+class IdempotencyStore:
+    def __init__(self, max_keys: int | None = None, ttl: float | None = None):
+        self.max_keys = config.IDEMPOTENCY_MAX_KEYS if max_keys is None else max_keys
+        self.ttl = config.IDEMPOTENCY_TTL if ttl is None else ttl
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def run(self, key: Hashable, fingerprint: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Jalankan `fn` sekali per key. Return (hasil, replayed).
+        Key yang sama dengan isi request berbeda -> 422.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry.expires_at <= time.monotonic():
+                    del self._entries[key]
+                    entry = None
+                if entry is None:
+                    entry = self._entries[key] = _Entry(fingerprint)
+                    self._evict()
+                    owner = True
+                else:
+                    if entry.fingerprint != fingerprint:
+                        raise HTTPException(422, "Idempotency-Key was already used for a different request")
+                    self._entries.move_to_end(key)
+                    owner = False
+            if owner:
+                break
+            entry.done.wait()
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    return entry.result, True
+            # eksekusi pertama gagal (entry dibuang) -> coba jadi owner
+
+        try:
+            result = fn()
+        except BaseException:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            entry.done.set()
+            raise
+        with self._lock:
+            entry.result = result
+            entry.expires_at = time.monotonic() + self.ttl
+        entry.done.set()
+        return result, False
+
+    def _evict(self) -> None:
+        # urutan OrderedDict = LRU; entry pending tidak dibuang (masih ada yang menunggu)
+        entries = self._entries
+        skipped = 0
+        while len(entries) > self.max_keys and skipped < len(entries):
+            key, oldest = next(iter(entries.items()))
+            if oldest.done.is_set():
+                del entries[key]
+            else:
+                entries.move_to_end(key)
+                skipped += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+store = IdempotencyStore()
+
+
+def run(endpoint: str, user_id: str, key: str | None, fingerprint: str,
+        fn: Callable[[], Any]) -> Tuple[Any, bool]:
+    """Helper route: tanpa key langsung jalan; dengan key lewat store bersama."""
+    if not key:
+        return fn(), False
+    result, replayed = store.run((endpoint, user_id, key), fingerprint, fn)
+    if replayed:
+        replays.inc(1, endpoint)
+    return result, replayed
@@ -0,0 +1,92 @@
+import threading
+from typing import Dict, List, Tuple
+from .schemas import Showtime, SeatCell, SeatLayout
+from .seatmap import STATUSES, LayoutTemplate, SeatMap
+
+LEGEND: Dict[str, str] = {
+    "available": "Kursi dapat dipesan",
+    "reserved": "Sedang di-cart pengguna lain",
+    "booked":   "Sudah dibayar",
+    "blocked":  "Dinonaktifkan",
+    "vip":      "Kursi VIP",
+    "standard": "Kursi standar",
+    "screen_side": "Posisi layar relatif grid",
+    "aisles_cols":  "Nomor kolom lorong/aisle (1-based)"
+}
+
+
+class _Entry:
+    """
+    Layout ter-cache satu showtime. Bagian statis (code, seat_type, aisles, legend)
+    dibangun sekali; saat versi seat map berubah hanya status sel yang berbeda
+    yang di-patch.
+    """
+    __slots__ = ("seat_map", "layout", "cells", "state", "version", "lock")
+
+    def __init__(self, st: Showtime, seat_map: SeatMap, meta: LayoutTemplate):
+        self.seat_map = seat_map
+        self.lock = threading.Lock()
+        with seat_map.lock:
+            self.version = seat_map.version
+            self.state = seat_map.snapshot()
+
+        state = self.state
+        self.cells: List[SeatCell] = []
+        grid: List[List[SeatCell]] = []
+        base = 0
+        for static_row in meta.grid:
+            row_cells = [SeatCell(row=r, col=c, code=code, status=STATUSES[state[base + k]],
+                                  seat_type=seat_type)
+                         for k, (r, c, code, seat_type) in enumerate(static_row)]
+            base += len(row_cells)
+            self.cells.extend(row_cells)
+            grid.append(row_cells)
+
+        self.layout = SeatLayout(
+            showtime_id=st.id, rows=st.rows, cols=st.cols, screen_side=st.screen_side,
+            aisles_cols=list(meta.aisles), legend=LEGEND, grid=grid,
+        )
+
+    def refresh(self) -> None:
+        """Samakan status sel dengan seat map (hanya sel yang berubah)."""
+        seat_map = self.seat_map
+        if self.version == seat_map.version:
+            return
+        with seat_map.lock:
+            changed = seat_map.changed_indexes(self.version)
+            version = seat_map.version
+            state = seat_map.snapshot()
+        cells = self.cells
+        if changed is None:
+            # change log sudah terlewat -> bandingkan seluruh state
+            changed = [i for i, (a, b) in enumerate(zip(self.state, state)) if a != b]
+        for i in changed:
+            cells[i].status = STATUSES[state[i]]
+        self.state = state
+        self.version = version
+
+
+_cache: Dict[int, _Entry] = {}
+_cache_lock = threading.Lock()
+
+
+def etag_for(seat_map: SeatMap) -> str:
+    return f'"{seat_map.uid}.{seat_map.version}"'
+
+
+def get(st: Showtime, seat_map: SeatMap, meta: LayoutTemplate) -> Tuple[SeatLayout, str]:
+    """Ambil layout ter-cache (dibangun/di-patch bila perlu) + ETag-nya."""
+    entry = _cache.get(st.id)
+    if entry is None or entry.seat_map is not seat_map:
+        with _cache_lock:
+            entry = _cache.get(st.id)
+            if entry is None or entry.seat_map is not seat_map:
+                entry = _Entry(st, seat_map, meta)
+                _cache[st.id] = entry
+    with entry.lock:
+        entry.refresh()
+        return entry.layout, f'"{seat_map.uid}.{entry.version}"'
+
+
+def invalidate(showtime_id: int) -> None:
+    _cache.pop(showtime_id, None)
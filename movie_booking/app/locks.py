@@ -0,0 +1,77 @@
+import threading
+import time
+from typing import Dict, Iterable, List
+
+
+class ContendedLock:
+    """
+    threading.Lock yang menghitung contention.
+    Coba acquire non-blocking dulu; kalau gagal berarti lock sedang dipegang
+    thread lain -> dihitung sebagai contended dan lama menunggunya dicatat.
+    Counter hanya diubah saat lock dipegang, jadi aman tanpa lock tambahan.
+    """
+    __slots__ = ("_lock", "acquired", "contended", "wait_ns")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.contended = 0
+        self.wait_ns = 0
+
+    def acquire(self) -> None:
+        if not self._lock.acquire(False):
+            t0 = time.perf_counter_ns()
+            self._lock.acquire()
+            self.contended += 1
+            self.wait_ns += time.perf_counter_ns() - t0
+        self.acquired += 1
+
+    def release(self) -> None:
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+class LockGroup:
+    """Acquire beberapa lock sekaligus dengan urutan tetap (hindari deadlock)."""
+
+    def __init__(self, locks: Iterable[ContendedLock]):
+        self._locks: List[ContendedLock] = list(locks)
+
+    def __enter__(self):
+        done: List[ContendedLock] = []
+        try:
+            for lk in self._locks:
+                lk.acquire()
+                done.append(lk)
+        except BaseException:
+            for lk in reversed(done):
+                lk.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        for lk in reversed(self._locks):
+            lk.release()
+
+
+def summarize(locks: Iterable[ContendedLock]) -> Dict[str, float]:
+    acquired = contended = wait_ns = 0
+    for lk in locks:
+        acquired += lk.acquired
+        contended += lk.contended
+        wait_ns += lk.wait_ns
+    return {
+        "acquired": acquired,
+        "contended": contended,
+        "contention_ratio": contended / acquired if acquired else 0.0,
+        "wait_ms_total": wait_ns / 1e6,
+    }
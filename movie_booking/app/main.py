@@ -1,18 +1,49 @@
 # app/main.py
-from fastapi import FastAPI, HTTPException
-from typing import List, Dict
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Header, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import List, Dict, Optional
 
 from .schemas import (
     # Movie / Showtime
-    MovieCreate, MovieUpdate, Movie,
-    ShowtimeCreate, Showtime, SeatStatus,
+    MovieCreate, MovieUpdate, Movie, MovieSearchHit,
+    ShowtimeCreate, Showtime, ShowtimeBulkCreate, ShowtimeAvailability, SeatStatus,
+    # Studio
+    StudioCreate, StudioUpdate, Studio, StudioShowtimesCreate,
     # Cart & Checkout
     AddToCartRequest, RemoveFromCartRequest, Cart, CartItem,
+    CartBatchRequest, CartBatchResponse,
+    BestAvailableRequest, SeatSuggestion,
     CheckoutRequest, CheckoutResponse,
+    PricingRules, QuoteRequest, QuoteResponse, CartQuote,
+    WaitingRoomSettings, QueueJoinRequest,
+    TxPrepareRequest, TxPrepareResponse, TxCommitRequest, TxAbortRequest,
     # Visual Layout
     SeatLayout,
 )
-from . import crud, storage
+from . import (
+    admission, config, crud, storage, holds, fastjson, feed, idempotency, metrics, paging, persistence, reports,
+    sqlite_store,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # mode durable: recovery (snapshot + WAL) lalu semua mutasi dicatat ke WAL,
+    # atau backend SQLite: state dimuat dari database lalu semua mutasi di-commit ke sana
+    store = None
+    if config.SQLITE_PATH:
+        store = sqlite_store.SQLiteStore(config.SQLITE_PATH).open()
+        crud.restore_holds()
+    elif config.DATA_DIR:
+        store = persistence.DurableStore(config.DATA_DIR).open()
+        crud.restore_holds()
+    # background sweeper: lepas kursi dari cart yang hold-nya kadaluarsa
+    sweeper = holds.Sweeper(crud.release_expired_holds).start()
+    yield
+    sweeper.stop()
+    if store is not None:
+        store.close()
 
 
 app = FastAPI(
@@ -22,7 +53,32 @@ app = FastAPI(
         "Fitur: kelola film & showtime, layout kursi visual, cart, checkout, dan cek tiket."
     ),
     version="1.0.0",
+    lifespan=lifespan,
 )
+# metrik: latensi per route (middleware) + waktu fungsi endpoint saja (route class)
+app.router.route_class = metrics.TimedRoute
+app.add_middleware(admission.AdmissionMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Mode fast JSON (MOVIE_BOOKING_FAST_JSON=1): endpoint baca besar mengirim byte JSON
+# siap pakai (tanpa validasi response_model per item); response_model tetap untuk OpenAPI
+def _json(body: bytes, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(body, media_type=fastjson.MEDIA_TYPE, headers=headers)
+
+# Listing berhalaman: ?limit=&cursor=, cursor halaman berikutnya di header X-Next-Cursor
+# (tidak ada header = halaman terakhir). Body tetap list seperti sebelumnya.
+LIMIT = Query(paging.DEFAULT_LIMIT, ge=1, le=paging.MAX_LIMIT)
+
+def _page(items: list, next_cursor: Optional[str], response: Response, encode=None,
+          availability: bool = False):
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if availability:
+        # showtime + okupansi: field tambahan di luar response_model Showtime
+        return JSONResponse(crud.with_availability(items), headers=headers)
+    if encode is not None and fastjson.enabled:
+        return _json(encode(items), headers)
+    response.headers.update(headers)
+    return items
 
 # =========================
 #         ADMIN
@@ -33,8 +89,10 @@ def create_movie(movie: MovieCreate):
     return crud.create_movie(movie)
 
 @app.get("/admin/movies", response_model=List[Movie], tags=["Admin"])
-def list_movies_admin():
-    return storage.list_movies()
+def list_movies_admin(response: Response, genre: Optional[str] = None, rating: Optional[str] = None,
+                      limit: int = LIMIT, cursor: Optional[str] = None):
+    items, nxt = crud.list_movies_page(limit, cursor, genre=genre, rating=rating)
+    return _page(items, nxt, response)
 
 @app.get("/admin/movies/{movie_id}", response_model=Movie, tags=["Admin"])
 def get_movie_admin(movie_id: int):
@@ -56,9 +114,117 @@ def delete_movie_admin(movie_id: int):
 def create_showtime_admin(movie_id: int, data: ShowtimeCreate):
     return crud.create_showtime(movie_id, data)
 
+# Jadwal massal: satu template studio + daftar slot hari/jam dalam satu request
+@app.post("/admin/movies/{movie_id}/showtimes/bulk", response_model=List[Showtime], tags=["Admin"])
+def create_showtimes_bulk_admin(movie_id: int, data: ShowtimeBulkCreate):
+    return crud.create_showtimes_bulk(movie_id, data)
+
 @app.get("/admin/showtimes", response_model=List[Showtime], tags=["Admin"])
-def list_showtimes_admin():
-    return storage.list_showtimes()
+def list_showtimes_admin(response: Response, day: Optional[str] = None, studio: Optional[str] = None,
+                         movie_id: Optional[int] = None, day_from: Optional[str] = None,
+                         day_to: Optional[str] = None, limit: int = LIMIT, cursor: Optional[str] = None,
+                         with_availability: bool = False):
+    if day is not None:
+        day_from = day_to = day
+    items, nxt = crud.list_showtimes_page(limit, cursor, movie_id=movie_id, studio=studio,
+                                          day_from=day_from, day_to=day_to)
+    return _page(items, nxt, response, fastjson.showtimes, with_availability)
+
+# Pemegang kursi reserved (user & cart item), dari index kepemilikan kursi
+@app.get("/admin/showtimes/{showtime_id}/seats/{seat}/holder", tags=["Admin"])
+def seat_holder_admin(showtime_id: int, seat: str):
+    return crud.get_seat_holder(showtime_id, seat)
+
+# Waiting room showtime (on-sale rush): batas sesi aktif, antrean FIFO, rate limit per user
+@app.put("/admin/showtimes/{showtime_id}/waiting-room", tags=["Admin"])
+def open_waiting_room_admin(showtime_id: int, data: WaitingRoomSettings):
+    return crud.open_waiting_room(showtime_id, data.model_dump(exclude_none=True))
+
+@app.get("/admin/showtimes/{showtime_id}/waiting-room", tags=["Admin"])
+def waiting_room_admin(showtime_id: int):
+    return crud.waiting_room(showtime_id).stats()
+
+@app.delete("/admin/showtimes/{showtime_id}/waiting-room", tags=["Admin"])
+def close_waiting_room_admin(showtime_id: int):
+    crud.close_waiting_room(showtime_id)
+    return {"message": "Waiting room closed"}
+
+# Studio: layout kursi didaftarkan sekali, dipakai bersama oleh semua showtime-nya
+@app.post("/admin/studios", response_model=Studio, tags=["Admin"])
+def create_studio_admin(data: StudioCreate):
+    return crud.create_studio(data)
+
+@app.get("/admin/studios", response_model=List[Studio], tags=["Admin"])
+def list_studios_admin():
+    return storage.list_studios()
+
+@app.get("/admin/studios/{studio_id}", response_model=Studio, tags=["Admin"])
+def get_studio_admin(studio_id: int):
+    return crud.get_studio(studio_id)
+
+@app.put("/admin/studios/{studio_id}", response_model=Studio, tags=["Admin"])
+def update_studio_admin(studio_id: int, data: StudioUpdate):
+    return crud.update_studio(studio_id, data)
+
+@app.delete("/admin/studios/{studio_id}", tags=["Admin"])
+def delete_studio_admin(studio_id: int):
+    crud.delete_studio(studio_id)
+    return {"message": "Studio deleted"}
+
+@app.post("/admin/studios/{studio_id}/showtimes", response_model=List[Showtime], tags=["Admin"])
+def create_studio_showtimes_admin(studio_id: int, data: StudioShowtimesCreate):
+    return crud.create_showtimes_for_studio(studio_id, data)
+
+# Statistik contention lock (seat map per showtime & cart)
+@app.get("/admin/locks", tags=["Admin"])
+def lock_stats_admin():
+    return storage.lock_stats()
+
+# Nyalakan/matikan timer latensi /metrics saat runtime (counter tetap jalan)
+@app.put("/admin/metrics/timing", tags=["Admin"])
+def set_metrics_timing(enabled: bool):
+    metrics.set_timing(enabled)
+    return {"timing": metrics.timing_enabled}
+
+# Rules harga: pengali per seat_type (standard/vip), rule hari/jam, tabel promo
+@app.get("/admin/pricing", response_model=PricingRules, tags=["Admin"])
+def get_pricing_admin():
+    return crud.get_pricing()
+
+@app.put("/admin/pricing", response_model=PricingRules, tags=["Admin"])
+def set_pricing_admin(rules: PricingRules):
+    return crud.set_pricing(rules)
+
+# Statistik hold cart: jumlah dilepas per sweep & latensi sweep
+@app.get("/admin/holds", tags=["Admin"])
+def hold_stats_admin():
+    return holds.snapshot_stats()
+
+# Laporan di-stream (CSV / NDJSON) dari generator: body dikirim per potongan,
+# generator sync diiterasi di thread pool jadi event loop tidak tertahan
+def _report(name: str, columns_rows, fmt: str) -> StreamingResponse:
+    if fmt not in reports.FORMATS:
+        raise HTTPException(400, f"Unknown report format: {fmt}")
+    columns, rows = columns_rows
+    return StreamingResponse(
+        reports.encode(rows, columns, fmt), media_type=reports.FORMATS[fmt],
+        headers={"Content-Disposition": f'inline; filename="{name}.{fmt}"'},
+    )
+
+# Revenue per movie / showtime / day / promo / movie_day; date_from/date_to = YYYY-MM-DD
+# (tanggal checkout, inklusif). Tanpa rentang -> agregat inkremental, dengan rentang -> scan.
+@app.get("/admin/reports/revenue", tags=["Admin"], response_class=StreamingResponse,
+         responses={200: {"content": {"text/csv": {}, "application/x-ndjson": {}}}})
+def revenue_report_admin(group: str = "movie", fmt: str = Query("csv", alias="format"),
+                         date_from: Optional[str] = None, date_to: Optional[str] = None):
+    return _report(f"revenue-{group}", crud.revenue_report(group, date_from, date_to), fmt)
+
+# Okupansi / fill rate per showtime / movie / studio / day (dari counter kursi)
+@app.get("/admin/reports/occupancy", tags=["Admin"], response_class=StreamingResponse,
+         responses={200: {"content": {"text/csv": {}, "application/x-ndjson": {}}}})
+def occupancy_report_admin(group: str = "studio", fmt: str = Query("csv", alias="format"),
+                           movie_id: Optional[int] = None, day: Optional[str] = None):
+    return _report(f"occupancy-{group}", crud.occupancy_report(group, movie_id, day), fmt)
 
 
 # =========================
@@ -66,41 +232,160 @@ def list_showtimes_admin():
 # =========================
 
 @app.get("/movies", response_model=List[Movie], tags=["User"])
-def list_movies_user():
-    return storage.list_movies()
+def list_movies_user(response: Response, genre: Optional[str] = None, rating: Optional[str] = None,
+                     limit: int = LIMIT, cursor: Optional[str] = None):
+    items, nxt = crud.list_movies_page(limit, cursor, genre=genre, rating=rating)
+    return _page(items, nxt, response)
+
+# Search-as-you-type: token terakhir = prefix, typo ringan ditoleransi, urut skor
+@app.get("/movies/search", response_model=List[MovieSearchHit], tags=["User"])
+def search_movies(q: str = Query(..., min_length=1, max_length=200), limit: int = Query(20, ge=1, le=100)):
+    return crud.search_movies(q, limit)
 
 @app.get("/movies/{movie_id}/showtimes", response_model=List[Showtime], tags=["User"])
-def list_showtimes_for_movie(movie_id: int):
-    return storage.list_showtimes(movie_id)
+def list_showtimes_for_movie(movie_id: int, response: Response, day_from: Optional[str] = None,
+                             day_to: Optional[str] = None, limit: int = LIMIT, cursor: Optional[str] = None,
+                             with_availability: bool = False):
+    items, nxt = crud.list_showtimes_page(limit, cursor, movie_id=movie_id,
+                                          day_from=day_from, day_to=day_to)
+    return _page(items, nxt, response, fastjson.showtimes, with_availability)
+
+# Okupansi banyak showtime sekaligus (mis. jadwal satu hari) dari counter seat map;
+# ids=1,2,3 atau filter movie_id/day
+@app.get("/showtimes/availability", response_model=List[ShowtimeAvailability], tags=["User"])
+def list_availability(ids: Optional[str] = None, movie_id: Optional[int] = None, day: Optional[str] = None):
+    try:
+        showtime_ids = [int(x) for x in ids.split(",") if x.strip()] if ids else None
+    except ValueError:
+        raise HTTPException(400, "ids must be a comma-separated list of showtime ids")
+    return crud.list_availability(showtime_ids, movie_id=movie_id, day=day)
 
+# ?since=<version> -> hanya kursi yang berubah. Versi terbaru ada di header X-Seat-Version;
+# X-Seat-Delta: full berarti since sudah terlalu lama dan yang dikirim peta lengkap.
 @app.get("/showtimes/{showtime_id}/seats", response_model=Dict[str, SeatStatus], tags=["User"])
-def get_seats(showtime_id: int):
-    return crud.get_seats_status(showtime_id)
+def get_seats(showtime_id: int, response: Response, since: Optional[int] = Query(None, ge=0)):
+    version, seats, full = crud.get_seat_changes(showtime_id, since)
+    headers = {"X-Seat-Version": str(version), "X-Seat-Delta": "full" if full else "delta"}
+    if full and fastjson.enabled:
+        return _json(fastjson.seats(showtime_id, seats), headers)
+    response.headers.update(headers)
+    return seats
 
-# Layout kursi 2D + metadata (screen_side, aisles_cols) untuk front-end
-@app.get("/showtimes/{showtime_id}/layout", response_model=SeatLayout, tags=["User"])
-def get_layout(showtime_id: int):
-    return crud.get_seat_layout(showtime_id)
+# Push perubahan kursi via Server-Sent Events (resume lewat Last-Event-ID / ?since=)
+@app.get("/showtimes/{showtime_id}/seats/stream", tags=["User"],
+         response_class=StreamingResponse,
+         responses={200: {"content": {"text/event-stream": {}}}})
+async def stream_seats(showtime_id: int, since: Optional[int] = Query(None, ge=0),
+                       last_event_id: Optional[str] = Header(None)):
+    seat_map = storage.seats_map(showtime_id)
+    if seat_map is None:
+        raise HTTPException(404, "Showtime not found")
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    return StreamingResponse(
+        feed.seat_events(seat_map, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (t.strip() for t in header.split(","))
+
+# Layout kursi 2D + metadata (screen_side, aisles_cols) untuk front-end.
+# Mendukung ETag/If-None-Match: layout yang tidak berubah -> 304 tanpa serialisasi.
+@app.get("/showtimes/{showtime_id}/layout", response_model=SeatLayout, tags=["User"],
+         responses={304: {"description": "Layout tidak berubah sejak ETag terakhir"}})
+def get_layout(showtime_id: int, request: Request, response: Response):
+    etag = crud.seat_layout_etag(showtime_id)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    if fastjson.enabled:
+        body, etag = crud.get_seat_layout_json(showtime_id)
+        return _json(body, {"ETag": etag})
+    layout, etag = crud.get_seat_layout_with_etag(showtime_id)
+    response.headers["ETag"] = etag
+    return layout
+
+# Saran blok kursi bersebelahan paling tengah (tanpa reserve)
+@app.get("/showtimes/{showtime_id}/best-available", response_model=SeatSuggestion, tags=["User"])
+def get_best_available(showtime_id: int, quantity: int = Query(..., ge=1, le=20)):
+    return {"showtime_id": showtime_id, "seats": crud.find_best_available(showtime_id, quantity)}
+
+# -------- Waiting room --------
+# Antre untuk showtime yang waiting room-nya aktif; status posisi O(1)
+@app.post("/showtimes/{showtime_id}/queue", tags=["User"])
+def join_queue(showtime_id: int, req: QueueJoinRequest):
+    status, shed = crud.waiting_room(showtime_id).join(req.user_id)
+    if shed:
+        return JSONResponse({"detail": "Waiting room is full, try again later", **status},
+                            status_code=503, headers={"Retry-After": "5"})
+    return status
+
+@app.get("/showtimes/{showtime_id}/queue/{user_id}", tags=["User"])
+def queue_status(showtime_id: int, user_id: str):
+    return crud.waiting_room(showtime_id).status(user_id)
+
+@app.delete("/showtimes/{showtime_id}/queue/{user_id}", tags=["User"])
+def leave_queue(showtime_id: int, user_id: str):
+    return {"showtime_id": showtime_id, "left": crud.waiting_room(showtime_id).leave(user_id)}
 
 # -------- Cart & Checkout --------
+# Header Idempotency-Key opsional (cart/add & checkout): retry dengan key sama
+# mengembalikan hasil pertama tanpa menyentuh seat map
+def _idempotent(endpoint: str, user_id: str, key: Optional[str], fingerprint: str, fn, response: Response):
+    result, replayed = idempotency.run(endpoint, user_id, key, fingerprint, fn)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
 @app.post("/cart/add", response_model=CartItem, tags=["User"])
-def add_to_cart(req: AddToCartRequest):
-    cid, subtotal = crud.add_to_cart(req.user_id, req.showtime_id, req.seats)
-    return {"id": cid, "showtime_id": req.showtime_id, "seats": req.seats, "subtotal": subtotal}
+def add_to_cart(req: AddToCartRequest, response: Response,
+                idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    def run():
+        cid, subtotal = crud.add_to_cart(req.user_id, req.showtime_id, req.seats)
+        return {"id": cid, "showtime_id": req.showtime_id, "seats": req.seats, "subtotal": subtotal}
+    return _idempotent("cart_add", req.user_id, idempotency_key, req.model_dump_json(), run, response)
+
+# Cari blok kursi terbaik + langsung reserve ke cart
+@app.post("/cart/best-available", response_model=CartItem, tags=["User"])
+def add_best_available(req: BestAvailableRequest):
+    cid, seats, subtotal = crud.add_best_available_to_cart(req.user_id, req.showtime_id, req.quantity)
+    return {"id": cid, "showtime_id": req.showtime_id, "seats": seats, "subtotal": subtotal}
+
+# Booking grup lintas showtime dalam satu request (all-or-nothing)
+@app.post("/cart/batch", response_model=CartBatchResponse, tags=["User"])
+def add_batch_to_cart(req: CartBatchRequest):
+    items, total = crud.add_batch_to_cart(req.user_id, [(g.showtime_id, g.seats) for g in req.groups])
+    return {"user_id": req.user_id, "items": items, "total": total}
 
 @app.get("/cart/{user_id}", response_model=Cart, tags=["User"])
 def get_cart(user_id: str):
     items, total = crud.get_cart_summary(user_id)
     return {"user_id": user_id, "items": items, "total": total}
 
+# Harga cart + promo tanpa checkout
+@app.get("/cart/{user_id}/quote", response_model=CartQuote, tags=["User"])
+def quote_cart(user_id: str, promo_code: Optional[str] = None):
+    return crud.quote_cart(user_id, promo_code)
+
+# Harga banyak (showtime, kursi) sekaligus tanpa reserve (mis. preview sebelum pilih kursi)
+@app.post("/pricing/quote", response_model=QuoteResponse, tags=["User"])
+def quote(req: QuoteRequest):
+    return crud.quote([(i.showtime_id, i.seats) for i in req.items], req.promo_code)
+
 @app.delete("/cart/remove", tags=["User"])
 def remove_from_cart(req: RemoveFromCartRequest):
     crud.remove_from_cart(req.user_id, req.cart_item_id, req.seats)
     return {"message": "Updated cart"}
 
 @app.post("/checkout", response_model=CheckoutResponse, tags=["User"])
-def checkout(req: CheckoutRequest):
-    return crud.checkout(req.user_id, req.promo_code)
+def checkout(req: CheckoutRequest, response: Response,
+             idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    return _idempotent("checkout", req.user_id, idempotency_key, req.model_dump_json(),
+                       lambda: crud.checkout(req.user_id, req.promo_code), response)
 
 
 # =========================
@@ -112,7 +397,57 @@ def checkout(req: CheckoutRequest):
 def get_ticket(booking_code: str):
     return crud.get_booking(booking_code)
 
-# List semua tiket milik user
+# List tiket milik user (urut waktu checkout), filter tanggal YYYY-MM-DD inklusif
 @app.get("/users/{user_id}/tickets", response_model=List[CheckoutResponse], tags=["User"])
-def list_tickets(user_id: str):
-    return crud.list_user_bookings(user_id)
+def list_tickets(user_id: str, response: Response, date_from: Optional[str] = None,
+                 date_to: Optional[str] = None, limit: int = LIMIT, cursor: Optional[str] = None):
+    items, nxt = crud.list_user_bookings_page(user_id, limit, cursor, date_from=date_from, date_to=date_to)
+    return _page(items, nxt, response, fastjson.bookings)
+
+
+# =========================
+#   INTERNAL (MODE SHARDED)
+# =========================
+# Hanya dipanggil router shard (app.shard_router), bukan oleh klien.
+
+# Replika movie/studio dari shard 0 (id dipertahankan)
+@app.put("/internal/movies/{movie_id}", response_model=Movie, tags=["Internal"])
+def replicate_movie(movie_id: int, movie: Movie):
+    return crud.replicate_movie(movie.model_copy(update={"id": movie_id}))
+
+@app.put("/internal/studios/{studio_id}", response_model=Studio, tags=["Internal"])
+def replicate_studio(studio_id: int, studio: Studio):
+    return crud.replicate_studio(studio.model_copy(update={"id": studio_id}))
+
+@app.delete("/internal/studios/{studio_id}", tags=["Internal"])
+def drop_studio_replica(studio_id: int):
+    crud.drop_studio_replica(studio_id)
+    return {"message": "Studio deleted"}
+
+@app.get("/internal/studios/{studio_id}/usage", tags=["Internal"])
+def studio_usage(studio_id: int):
+    return {"studio_id": studio_id, "in_use": storage.studio_in_use(studio_id)}
+
+# Leg 2PC checkout: prepare -> commit / abort
+@app.post("/internal/checkout/prepare", response_model=TxPrepareResponse, tags=["Internal"])
+def prepare_checkout(req: TxPrepareRequest):
+    return crud.prepare_checkout(req.user_id, req.txid)
+
+@app.post("/internal/checkout/commit", tags=["Internal"])
+def commit_checkout(req: TxCommitRequest):
+    crud.commit_checkout(req.txid, req.booking.model_dump() if req.booking else None)
+    return {"txid": req.txid, "committed": True}
+
+@app.post("/internal/checkout/abort", tags=["Internal"])
+def abort_checkout(req: TxAbortRequest):
+    return {"txid": req.txid, "aborted": crud.abort_checkout(req.txid)}
+
+
+# =========================
+#        METRICS
+# =========================
+
+# Format teks Prometheus (scrape)
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Metrics"])
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,229 @@
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+from fastapi.routing import APIRoute
+from . import config
+
+# =========================
+#         METRICS
+# =========================
+# Metrik in-process dengan format teks Prometheus (GET /metrics).
+# - Counter selalu aktif (sekadar penjumlahan di bawah lock kecil).
+# - Timer (histogram latensi) bisa dimatikan/dinyalakan saat runtime lewat
+#   `set_timing` tanpa redeploy; saat mati biayanya satu cek flag.
+# Label ditulis sebagai nilai posisi sesuai urutan `labels` saat deklarasi.
+
+# bucket latensi (detik): mulai 50us karena operasi storage/seat map di level mikrodetik
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+timing_enabled: bool = config.METRICS_TIMING
+
+_registry: List["_Metric"] = []
+
+
+def set_timing(enabled: bool) -> None:
+    global timing_enabled
+    timing_enabled = enabled
+
+
+def _fmt_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, *label_values) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0)
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, v in items:
+            yield f"{self.name}{_fmt_labels(self.labels, values)} {_fmt_value(v)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        # per label: [count per bucket (+Inf di akhir, non-kumulatif), sum]
+        self._values: Dict[Tuple, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][i] += 1
+            entry[1][0] += value
+
+    def count(self, *label_values) -> int:
+        entry = self._values.get(label_values)
+        return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s[0])) for k, (c, s) in self._values.items())
+        for values, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts):
+                cumulative += n
+                le = 'le="{}"'.format(bound if bound == "+Inf" else repr(bound))
+                yield f"{self.name}_bucket{_fmt_labels(self.labels, values, le)} {cumulative}"
+            yield f"{self.name}_sum{_fmt_labels(self.labels, values)} {repr(total)}"
+            yield f"{self.name}_count{_fmt_labels(self.labels, values)} {cumulative}"
+
+
+class CallbackMetric(_Metric):
+    """Nilai dibaca saat scrape dari callback -> {label_values: value} (mis. statistik lock)."""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...],
+                 fn: Callable[[], Dict[Tuple, float]], kind: str = "gauge"):
+        super().__init__(name, help, labels)
+        self.kind = kind
+        self.fn = fn
+
+    def _samples(self) -> Iterable[str]:
+        for values, v in sorted(self.fn().items()):
+            yield f"{self.name}{_fmt_labels(self.labels, values)} {_fmt_value(v)}"
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def timed(hist: Histogram, *label_values):
+    """Decorator: catat durasi fungsi ke `hist` bila timer aktif."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not timing_enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hist.observe(time.perf_counter() - t0, *label_values)
+        return wrapper
+    return deco
+
+
+# ---------- metrik aplikasi ----------
+http_request_seconds = Histogram(
+    "http_request_duration_seconds",
+    "Latensi request end-to-end (termasuk validasi & serialisasi response).",
+    ("method", "route", "status"))
+http_handler_seconds = Histogram(
+    "http_handler_duration_seconds",
+    "Latensi fungsi endpoint saja; selisih dengan request = validasi/serialisasi pydantic.",
+    ("route",))
+crud_seconds = Histogram("crud_duration_seconds", "Latensi operasi crud utama.", ("op",))
+storage_seconds = Histogram("storage_op_duration_seconds", "Latensi operasi storage.", ("op",))
+
+seat_transitions = Counter(
+    "seat_transitions_total", "Jumlah kursi yang berpindah status.", ("from_status", "to_status"))
+cart_seats = Histogram(
+    "checkout_cart_seats", "Jumlah kursi per checkout sukses.", (),
+    buckets=(1, 2, 3, 4, 6, 8, 10, 15, 20, 50))
+checkout_failures = Counter("checkout_failures_total", "Checkout gagal per alasan.", ("reason",))
+
+
+# ---------- integrasi FastAPI ----------
+class TimedRoute(APIRoute):
+    """APIRoute yang membungkus endpoint dengan timer `http_handler_duration_seconds`."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _wrap_endpoint(path, endpoint), **kwargs)
+
+
+def _wrap_endpoint(path: str, endpoint: Callable) -> Callable:
+    # functools.wraps -> signature asli tetap terbaca FastAPI (lewat __wrapped__)
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            if not timing_enabled:
+                return await endpoint(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                http_handler_seconds.observe(time.perf_counter() - t0, path)
+        return async_wrapper
+    return timed(http_handler_seconds, path)(endpoint)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI murni: latensi per (method, route template, status). Stream SSE dilewati."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not timing_enabled:
+            await self.app(scope, receive, send)
+            return
+        t0 = time.perf_counter()
+        info = {"status": 500, "stream": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                info["status"] = message["status"]
+                for k, v in message.get("headers", ()):
+                    if k == b"content-type" and v.startswith(b"text/event-stream"):
+                        info["stream"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not info["stream"]:
+                route = scope.get("route")
+                http_request_seconds.observe(time.perf_counter() - t0, scope["method"],
+                                             route.path if route is not None else "unmatched",
+                                             info["status"])
@@ -0,0 +1,95 @@
+import base64
+import json
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Dict, Hashable, List, Tuple
+
+# =========================
+#     SORTED INDEX & CURSOR
+# =========================
+# Listing berhalaman: tiap index menyimpan list sort-key terurut (tuple, id di
+# elemen terakhir). Halaman berikutnya dimulai dengan bisect dari key terakhir
+# halaman sebelumnya (cursor), jadi biaya per halaman O(log n + ukuran halaman)
+# berapa pun total data; tidak ada offset yang di-skip.
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+Key = Tuple
+
+
+class SortedIndex:
+    """bucket -> list sort-key terurut. Bucket None = semua item."""
+    __slots__ = ("_lists",)
+
+    def __init__(self):
+        self._lists: Dict[Hashable, List[Key]] = {}
+
+    def add(self, bucket: Hashable, key: Key) -> None:
+        insort(self._lists.setdefault(bucket, []), key)
+
+    def remove(self, bucket: Hashable, key: Key) -> None:
+        keys = self._lists.get(bucket)
+        if not keys:
+            return
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+        if not keys:
+            del self._lists[bucket]
+
+    def keys(self, bucket: Hashable = None) -> List[Key]:
+        return self._lists.get(bucket, [])
+
+    def clear(self) -> None:
+        self._lists.clear()
+
+
+def page(keys: List[Key], limit: int, after: Key | None = None,
+         lo: Key | None = None, hi: Key | None = None,
+         match: Callable[[Key], bool] | None = None) -> Tuple[List[Key], Key | None]:
+    """
+    Ambil maksimal `limit` key dengan lo <= key < hi, setelah cursor `after`,
+    yang lolos `match`. Return (keys, key terakhir kalau masih ada lanjutan).
+    """
+    start = 0 if lo is None else bisect_left(keys, lo)
+    if after is not None:
+        start = max(start, bisect_right(keys, after))
+    out: List[Key] = []
+    i = start
+    n = len(keys)
+    while i < n:
+        key = keys[i]
+        if hi is not None and key >= hi:
+            return out, None
+        if match is None or match(key):
+            if len(out) == limit:
+                return out, out[-1]
+            out.append(key)
+        i += 1
+    return out, None
+
+
+def encode_cursor(key: Key | None) -> str | None:
+    if key is None:
+        return None
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> Key | None:
+    """Kebalikan `encode_cursor`; ValueError kalau cursor rusak."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(key, list) or not key:
+        raise ValueError("Invalid cursor")
+    return tuple(key)
+
+
+def upper(prefix: str) -> str:
+    """Batas atas eksklusif untuk semua string berawalan `prefix` (mis. tanggal)."""
+    return prefix + "\uffff"
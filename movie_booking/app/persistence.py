@@ -0,0 +1,284 @@
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+from . import config, storage
+
+log = logging.getLogger(__name__)
+
+# =========================
+#   WRITE-AHEAD LOG (WAL)
+# =========================
+# Format: file segmen NDJSON `wal-<lsn awal>.log`, satu record per baris:
+#   {"lsn": 12, "op": "set_seats", "args": [...]}
+# Snapshot: `snapshot-<lsn>.jsonl`, baris pertama {"lsn": N}, sisanya record redo
+# dengan format yang sama. Recovery = apply snapshot + replay WAL dengan lsn > N.
+
+_SEGMENT = "wal-{:020d}.log"
+_SNAPSHOT = "snapshot-{:020d}.jsonl"
+
+
+class WriteAheadLog:
+    """
+    WAL append-only dengan group commit.
+    `append` hanya menaruh record di buffer (murah, urutan = lsn). Satu thread
+    writer mengambil semua record yang menumpuk, menulis sekaligus lalu fsync
+    sekali, kemudian membangunkan semua yang menunggu di `wait`.
+    """
+
+    def __init__(self, directory: str, fsync: bool = True, start_lsn: int | None = None):
+        self.directory = directory
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[int, str | None]] = []
+        self._lsn = _last_lsn(directory) if start_lsn is None else start_lsn
+        self._durable_lsn = self._lsn
+        self._closing = False
+        self._error: BaseException | None = None   # error writer (disk penuh, EIO, ...)
+        self._file = open(os.path.join(directory, _SEGMENT.format(self._lsn + 1)), "a", encoding="utf-8")
+        self.stats = {"records": 0, "commits": 0, "max_batch": 0}
+        self._thread = threading.Thread(target=self._run, name="wal-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def lsn(self) -> int:
+        return self._lsn
+
+    def append(self, op: str, args) -> int:
+        line = json.dumps(args, separators=(",", ":"))
+        with self._cond:
+            self._lsn += 1
+            lsn = self._lsn
+            self._pending.append((lsn, f'{{"lsn":{lsn},"op":"{op}","args":{line}}}\n'))
+            self._cond.notify_all()
+        return lsn
+
+    def wait(self, lsn: int | None = None) -> None:
+        """Blok sampai record `lsn` (default: semua yang sudah di-append) durable."""
+        with self._cond:
+            target = self._lsn if lsn is None else lsn
+            while self._durable_lsn < target:
+                if self._error is not None:
+                    raise RuntimeError("WAL writer failed") from self._error
+                if self._closing and not self._thread.is_alive():
+                    raise RuntimeError("WAL is closed")
+                self._cond.wait()
+
+    def rotate(self) -> int:
+        """Mulai segmen baru setelah record terakhir; return lsn batasnya."""
+        with self._cond:
+            boundary = self._lsn
+            self._pending.append((boundary + 1, None))   # None = mulai segmen baru di lsn ini
+            self._cond.notify_all()
+        self.wait(boundary)
+        return boundary
+
+    def close(self) -> None:
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout=10)
+        self._file.close()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if not self._pending and self._closing:
+                    self._cond.notify_all()
+                    return
+                batch, self._pending = self._pending, []
+                last = self._lsn
+            try:
+                self._write(batch)
+            except BaseException as exc:
+                # writer berhenti: semua yang menunggu (sekarang & nanti) dapat error, bukan hang
+                with self._cond:
+                    self._error = exc
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._durable_lsn = last
+                self.stats["records"] += sum(1 for _, line in batch if line is not None)
+                self.stats["commits"] += 1
+                self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+                self._cond.notify_all()
+
+    def _write(self, batch: List[Tuple[int, str | None]]) -> None:
+        chunk: List[str] = []
+        for lsn, line in batch:
+            if line is None:
+                self._flush(chunk)
+                chunk = []
+                self._file.close()
+                self._file = open(os.path.join(self.directory, _SEGMENT.format(lsn)), "a", encoding="utf-8")
+            else:
+                chunk.append(line)
+        self._flush(chunk)
+
+    def _flush(self, chunk: List[str]) -> None:
+        if chunk:
+            self._file.write("".join(chunk))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+
+def _segments(directory: str) -> List[Tuple[int, str]]:
+    out = []
+    for path in glob.glob(os.path.join(directory, "wal-*.log")):
+        out.append((int(os.path.basename(path)[4:-4]), path))
+    return sorted(out)
+
+
+def _snapshots(directory: str) -> List[Tuple[int, str]]:
+    out = []
+    for path in glob.glob(os.path.join(directory, "snapshot-*.jsonl")):
+        out.append((int(os.path.basename(path)[9:-6]), path))
+    return sorted(out)
+
+
+def _read_records(path: str):
+    """Baca record NDJSON; baris terakhir yang terpotong (crash saat menulis) diabaikan."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                return
+
+
+def _last_lsn(directory: str) -> int:
+    last = 0
+    snaps = _snapshots(directory)
+    if snaps:
+        last = snaps[-1][0]
+    for _, path in _segments(directory):
+        for rec in _read_records(path):
+            last = max(last, rec["lsn"])
+    return last
+
+
+# =========================
+#   SNAPSHOT & RECOVERY
+# =========================
+def write_snapshot(directory: str, lsn: int) -> str:
+    """
+    Tulis snapshot fuzzy: state dibaca sambil traffic berjalan, boleh memuat
+    perubahan setelah `lsn`. Aman karena semua record idempotent, jadi replay
+    WAL > lsn di atasnya menghasilkan state akhir yang sama.
+    """
+    final = os.path.join(directory, _SNAPSHOT.format(lsn))
+    tmp = final + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"lsn": lsn}) + "\n")
+        for op, args in storage.iter_state_records():
+            f.write(json.dumps({"op": op, "args": args}, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, final)
+    return final
+
+
+def recover(directory: str) -> Dict[str, float]:
+    """Load snapshot terbaru lalu replay WAL tail ke storage (journal belum terpasang)."""
+    t0 = time.perf_counter()
+    snap_lsn = 0
+    applied = 0
+    snaps = _snapshots(directory)
+    if snaps:
+        snap_lsn, path = snaps[-1]
+        records = _read_records(path)
+        next(records, None)  # header
+        for rec in records:
+            storage.apply_record(rec["op"], rec["args"])
+            applied += 1
+    replayed = 0
+    last_lsn = snap_lsn
+    for _, path in _segments(directory):
+        for rec in _read_records(path):
+            last_lsn = max(last_lsn, rec["lsn"])
+            if rec["lsn"] > snap_lsn:
+                storage.apply_record(rec["op"], rec["args"])
+                replayed += 1
+    storage.reset_id_counters()
+    orphans = storage.release_orphan_reservations()
+    return {
+        "snapshot_lsn": snap_lsn,
+        "last_lsn": last_lsn,
+        "snapshot_records": applied,
+        "wal_records": replayed,
+        "orphan_seats_released": orphans,
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+class DurableStore:
+    """
+    Backend durable lokal untuk storage in-memory: WAL + snapshot periodik.
+    Pemakaian:
+        store = DurableStore(dir).open()   # recovery + pasang journal
+        ...
+        store.close()
+    """
+
+    def __init__(self, directory: str, snapshot_every: int | None = None, fsync: bool = True):
+        self.directory = directory
+        self.snapshot_every = config.SNAPSHOT_EVERY if snapshot_every is None else snapshot_every
+        self.fsync = fsync
+        self.wal: WriteAheadLog | None = None
+        self.recovery: Dict[str, float] = {}
+        self._snapshot_lock = threading.Lock()
+        self._last_snapshot_lsn = 0
+        self.snapshot_errors = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def open(self) -> "DurableStore":
+        os.makedirs(self.directory, exist_ok=True)
+        self.recovery = recover(self.directory)
+        self._last_snapshot_lsn = int(self.recovery["snapshot_lsn"])
+        self.wal = WriteAheadLog(self.directory, fsync=self.fsync,
+                                 start_lsn=int(self.recovery["last_lsn"]))
+        storage.attach_journal(self.wal)
+        if self.snapshot_every:
+            self._thread = threading.Thread(target=self._run, name="snapshotter", daemon=True)
+            self._thread.start()
+        return self
+
+    def snapshot(self) -> str:
+        """Rotasi WAL, tulis snapshot, lalu buang segmen & snapshot lama (compaction)."""
+        with self._snapshot_lock:
+            boundary = self.wal.rotate()
+            path = write_snapshot(self.directory, boundary)
+            for start, seg in _segments(self.directory):
+                if start <= boundary:
+                    os.remove(seg)
+            for lsn, snap in _snapshots(self.directory):
+                if lsn < boundary:
+                    os.remove(snap)
+            self._last_snapshot_lsn = boundary
+            return path
+
+    def _run(self) -> None:
+        while not self._stop.wait(1.0):
+            if self.wal.lsn - self._last_snapshot_lsn >= self.snapshot_every:
+                try:
+                    self.snapshot()
+                except Exception:
+                    # dicoba lagi di putaran berikutnya; WAL tetap lengkap tanpa snapshot
+                    log.exception("snapshot failed")
+                    self.snapshot_errors += 1
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        storage.detach_journal()
+        if self.wal is not None:
+            self.wal.close()
@@ -0,0 +1,146 @@
+import threading
+from datetime import date
+from typing import Dict, List, Tuple
+from .schemas import WEEKDAYS, PricingRules, Showtime
+from .seatmap import LayoutTemplate
+
+# =========================
+#      PRICING ENGINE
+# =========================
+# Harga item = harga showtime x pengali hari/jam x sum(jumlah kursi per
+# seat_type x pengali tier). Rules (PricingRules) di-compile sekali jadi Engine
+# immutable: tier -> dict, rule hari/jam -> tuple (hari, menit_dari, menit_sampai,
+# pengali), promo -> dict kode -> (rate, min_total, max_discount). Jendela jam
+# dengan menit_dari > menit_sampai melewati tengah malam.
+# Quote di-memo per (showtime, mix seat_type) di dalam Engine; promo dihitung
+# atas total cart (seperti checkout), lookup-nya satu akses dict. Entry
+# menyimpan objek Showtime-nya: showtime yang disimpan ulang (harga / layout
+# berubah) adalah objek baru, jadi entry lama otomatis tidak dipakai; ganti
+# rules = Engine baru = cache kosong. Default (VIP x1.0, tanpa rule waktu, promo
+# DISCOUNT10/STUDENT20) menghasilkan harga yang sama dengan perhitungan lama.
+
+Mix = Tuple[Tuple[str, int], ...]   # ((seat_type, jumlah), ...) urut nama
+
+
+def _minutes(hhmm: str | None, default: int) -> int:
+    if not hhmm:
+        return default
+    h, m = hhmm.split(":")
+    return int(h) * 60 + int(m)
+
+
+class Engine:
+    def __init__(self, rules: PricingRules):
+        self.rules = rules
+        self.tiers: Dict[str, float] = dict(rules.seat_tiers)
+        self.time_rules: Tuple[Tuple[frozenset, int, int, float], ...] = tuple(
+            (frozenset(WEEKDAYS.index(d) for d in (r.days or WEEKDAYS)),
+             _minutes(r.time_from, 0), _minutes(r.time_to, 24 * 60), r.multiplier)
+            for r in rules.time_rules)
+        self.promos: Dict[str, Tuple[float, float, float | None]] = {
+            p.code.upper(): (p.percent / 100, p.min_total, p.max_discount) for p in rules.promos}
+        self._slot_multiplier: Dict[Tuple[str, str], float] = {}
+        self._quotes: Dict[int, Dict[Mix, Tuple[Showtime, float]]] = {}   # showtime_id -> mix -> quote
+
+    def slot_multiplier(self, day: str, time: str) -> float:
+        """Hasil kali semua rule hari/jam yang cocok (di-memo per (day, time))."""
+        mult = self._slot_multiplier.get((day, time))
+        if mult is None:
+            mult = 1.0
+            if self.time_rules:
+                try:
+                    weekday = date.fromisoformat(day).weekday()
+                    minute = _minutes(time, 0)
+                except ValueError:
+                    weekday = minute = -1
+                for days, lo, hi, m in self.time_rules:
+                    in_window = lo <= minute <= hi if lo <= hi else (minute >= lo or minute <= hi)
+                    if weekday in days and in_window:
+                        mult *= m
+            self._slot_multiplier[(day, time)] = mult
+        return mult
+
+    def discount(self, total: float, code: str | None) -> float:
+        rule = self.promos.get(code.upper()) if code else None
+        if rule is None:
+            return 0.0
+        rate, min_total, cap = rule
+        if total < min_total:
+            return 0.0
+        d = rate * total
+        return min(d, cap) if cap is not None else d
+
+    def quote(self, st: Showtime, mix: Mix) -> float:
+        """Subtotal satu item; di-memo selama showtime & rules tidak berubah."""
+        per_showtime = self._quotes.get(st.id)
+        if per_showtime is None:
+            per_showtime = self._quotes[st.id] = {}
+        hit = per_showtime.get(mix)
+        if hit is not None and hit[0] is st:
+            return hit[1]
+        count = sum(n for _, n in mix)
+        units = sum(n * self.tiers.get(seat_type, 1.0) for seat_type, n in mix)
+        mult = self.slot_multiplier(st.day, st.time)
+        if mult == 1.0 and units == count:
+            subtotal = st.price * count        # tanpa penyesuaian: persis harga lama
+        else:
+            subtotal = round(st.price * mult * units, 2)
+        per_showtime[mix] = (st, subtotal)
+        return subtotal
+
+    def forget(self, showtime_id: int) -> None:
+        self._quotes.pop(showtime_id, None)
+
+
+_engine = Engine(PricingRules())
+_lock = threading.Lock()
+
+
+def engine() -> Engine:
+    return _engine
+
+
+def set_rules(rules: PricingRules) -> Engine:
+    """Compile rules baru; quote lama ikut hilang bersama Engine lama."""
+    global _engine
+    with _lock:
+        _engine = Engine(rules)
+    return _engine
+
+
+def invalidate(showtime_id: int) -> None:
+    """Dipanggil storage saat showtime disimpan ulang / dihapus (hanya membebaskan memori)."""
+    _engine.forget(showtime_id)
+
+
+def seat_mix(template: LayoutTemplate, seats: List[str]) -> Mix:
+    counts: Dict[str, int] = {}
+    types, index = template.seat_types, template.index.index
+    for code in seats:
+        seat_type = types[index[code]]
+        counts[seat_type] = counts.get(seat_type, 0) + 1
+    return tuple(sorted(counts.items()))
+
+
+def item_subtotal(st: Showtime, template: LayoutTemplate, seats: List[str]) -> float:
+    return _engine.quote(st, seat_mix(template, seats))
+
+
+def price_items(items: List[Tuple[str, int, List[str]]], lookup) -> Tuple[List[dict], float]:
+    """
+    Harga banyak item cart sekaligus dengan satu Engine (snapshot rules konsisten).
+    `lookup(showtime_id)` -> (Showtime, LayoutTemplate). Return (items + subtotal, total).
+    """
+    eng = _engine
+    out = []
+    total = 0.0
+    for cid, sid, seats in items:
+        st, template = lookup(sid)
+        subtotal = eng.quote(st, seat_mix(template, seats))
+        total += subtotal
+        out.append({"id": cid, "showtime_id": sid, "seats": seats, "subtotal": subtotal})
+    return out, total
+
+
+def promo_discount(total: float, code: str | None) -> float:
+    return _engine.discount(total, code)
@@ -0,0 +1,172 @@
+import csv
+import io
+import json
+import threading
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# =========================
+#   LAPORAN REVENUE & OKUPANSI
+# =========================
+# Agregat revenue di-update inkremental tiap booking baru disimpan (storage
+# memanggil `totals.add`), per movie, showtime, hari checkout, kode promo, dan
+# movie x hari -> laporan standar O(jumlah grup), bukan O(jumlah booking).
+# Rentang tanggal ad-hoc untuk grup lain dihitung lewat scan berpotongan (chunk)
+# atas log booking (lihat crud.revenue_report). Output di-stream sebagai CSV /
+# NDJSON dari generator, baris demi baris, tanpa membangun seluruh hasil.
+
+GROUPS: Dict[str, Tuple[str, ...]] = {
+    "movie": ("movie_id",),
+    "showtime": ("showtime_id",),
+    "day": ("day",),
+    "promo": ("promo_code",),
+    "movie_day": ("movie_id", "day"),
+}
+FIELDS = ("bookings", "seats", "gross", "discount", "paid")
+OCCUPANCY_GROUPS: Dict[str, Tuple[str, ...]] = {
+    "showtime": ("showtime_id",),
+    "movie": ("movie_id",),
+    "studio": ("studio",),
+    "day": ("day",),
+}
+OCCUPANCY_FIELDS = ("showtimes", "total", "available", "reserved", "booked", "blocked", "fill_rate")
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+_ROWS_PER_CHUNK = 500   # baris per potongan body yang dikirim
+
+
+def _keys(booking: dict, group: str) -> Iterator[Tuple[tuple, dict]]:
+    """(key grup, item) untuk tiap item booking."""
+    day = booking.get("timestamp", "")[:10]
+    promo = booking.get("promo_code") or ""
+    for item in booking["items"]:
+        movie_id = item.get("movie_id")
+        if group == "movie":
+            yield (movie_id,), item
+        elif group == "showtime":
+            yield (item["showtime_id"],), item
+        elif group == "day":
+            yield (day,), item
+        elif group == "promo":
+            yield (promo,), item
+        else:
+            yield (movie_id, day), item
+
+
+class Aggregates:
+    """group -> key -> [bookings, seats, gross, discount, paid]."""
+
+    def __init__(self, groups: Iterable[str] = GROUPS):
+        self._by: Dict[str, Dict[tuple, List[float]]] = {g: {} for g in groups}
+        self._lock = threading.Lock()
+
+    def add(self, booking: dict) -> None:
+        gross_total = booking["total_before_discount"]
+        # diskon level booking dibagi proporsional ke item
+        ratio = booking["discount_amount"] / gross_total if gross_total else 0.0
+        with self._lock:
+            for group, table in self._by.items():
+                seen = set()
+                for key, item in _keys(booking, group):
+                    row = table.get(key)
+                    if row is None:
+                        row = table[key] = [0, 0, 0.0, 0.0, 0.0]
+                    if key not in seen:
+                        seen.add(key)
+                        row[0] += 1
+                    subtotal = item["subtotal"]
+                    row[1] += len(item["seats"])
+                    row[2] += subtotal
+                    row[3] += subtotal * ratio
+                    row[4] += subtotal * (1 - ratio)
+
+    def rows(self, group: str, lo: str | None = None, hi: str | None = None) -> Iterator[dict]:
+        """
+        Baris laporan urut key. Hanya daftar key yang disalin (di bawah lock);
+        nilai dibaca per baris saat di-stream. lo/hi (YYYY-MM-DD, inklusif)
+        hanya berlaku untuk grup yang punya kolom day.
+        """
+        with self._lock:
+            keys = list(self._by[group])
+        names = GROUPS[group]
+        day_at = names.index("day") if "day" in names else None
+        keys.sort(key=lambda k: tuple("" if v is None else v for v in k))
+        table = self._by[group]
+        for key in keys:
+            if day_at is not None and ((lo and key[day_at] < lo) or (hi and key[day_at] > hi)):
+                continue
+            with self._lock:
+                values = list(table[key])
+            yield _row(names, key, values)
+
+    def clear(self) -> None:
+        with self._lock:
+            for table in self._by.values():
+                table.clear()
+
+
+def _row(names: Tuple[str, ...], key: tuple, values: List[float]) -> dict:
+    row = dict(zip(names, key))
+    for name, value in zip(FIELDS, values):
+        row[name] = round(value, 2) if isinstance(value, float) else value
+    return row
+
+
+totals = Aggregates()
+
+
+def fold(bookings: Iterable[dict], group: str) -> Iterator[dict]:
+    """Agregasi ad-hoc (hasil scan): memori sebanding jumlah grup, bukan booking."""
+    agg = Aggregates((group,))
+    for b in bookings:
+        agg.add(b)
+    yield from agg.rows(group)
+
+
+def merge(parts: Iterable[str], fields: Tuple[str, ...]) -> Tuple[Tuple[str, ...], List[dict]]:
+    """Gabung laporan NDJSON dari beberapa shard: kolom numerik dijumlah per key (mode sharded)."""
+    acc: Dict[tuple, dict] = {}
+    names: Tuple[str, ...] = ()
+    for text in parts:
+        for line in text.splitlines():
+            if not line:
+                continue
+            row = json.loads(line)
+            names = tuple(k for k in row if k not in fields)
+            key = tuple(row[k] for k in names)
+            cur = acc.get(key)
+            if cur is None:
+                acc[key] = row
+            else:
+                for f in fields:
+                    if f != "fill_rate":
+                        cur[f] = round(cur[f] + row[f], 2)
+    rows = [acc[k] for k in sorted(acc, key=lambda k: tuple("" if v is None else v for v in k))]
+    if "fill_rate" in fields:
+        for row in rows:
+            sellable = row["total"] - row["blocked"]
+            row["fill_rate"] = round(row["booked"] / sellable, 4) if sellable else 0.0
+    return names + fields, rows
+
+
+# ---------- encoding stream ----------
+def encode(rows: Iterable[dict], columns: Tuple[str, ...], fmt: str) -> Iterator[str]:
+    """Generator potongan body CSV (dengan header) / NDJSON."""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n") if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(columns)
+    n = 0
+    for row in rows:
+        if writer is not None:
+            writer.writerow(["" if row.get(c) is None else row.get(c) for c in columns])
+        else:
+            buf.write(json.dumps(row))
+            buf.write("\n")
+        n += 1
+        if n % _ROWS_PER_CHUNK == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    tail = buf.getvalue()
+    if tail or n == 0:
+        yield tail
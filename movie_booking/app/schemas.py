@@ -1,3 +1,4 @@
+import re
 from typing import List, Optional, Dict
 from pydantic import BaseModel, Field, validator
 from enum import Enum
@@ -36,12 +37,27 @@ class MovieUpdate(BaseModel):
 class Movie(MovieBase):
     id: int
 
+class MovieSearchHit(Movie):
+    score: float
+
 # ---------- SHOWTIME ----------
-class ShowtimeBase(BaseModel):
+class ShowtimeSlot(BaseModel):
     day: str = Field(..., example="2025-10-15")
     time: str = Field(..., example="19:00")  # HH:MM (24 jam)
-    studio: str = Field(..., example="Studio 1")
-    price: float = Field(..., ge=0.0, example=50000.0)
+
+    @validator("day")
+    def _day(cls, v):
+        if len(v.split("-")) != 3:
+            raise ValueError("day must be YYYY-MM-DD")
+        return v
+
+    @validator("time")
+    def _time(cls, v):
+        if len(v.split(":")) != 2:
+            raise ValueError("time must be HH:MM 24h")
+        return v
+
+class StudioLayout(BaseModel):
     rows: int = Field(..., ge=1, le=26, example=6)
     cols: int = Field(..., ge=1, le=20, example=10)
 
@@ -60,17 +76,16 @@ class ShowtimeBase(BaseModel):
         description="Kursi dinonaktifkan (blocked)."
     )
 
-    @validator("day")
-    def _day(cls, v):
-        if len(v.split("-")) != 3:
-            raise ValueError("day must be YYYY-MM-DD")
-        return v
+class ShowtimePricing(BaseModel):
+    studio: str = Field(..., example="Studio 1")
+    price: float = Field(..., ge=0.0, example=50000.0)
 
-    @validator("time")
-    def _time(cls, v):
-        if len(v.split(":")) != 2:
-            raise ValueError("time must be HH:MM 24h")
-        return v
+class ShowtimeTemplate(StudioLayout, ShowtimePricing):
+    pass
+
+# urutan base: field slot (day, time) tetap di depan seperti semula
+class ShowtimeBase(ShowtimeTemplate, ShowtimeSlot):
+    pass
 
 class ShowtimeCreate(ShowtimeBase):
     pass
@@ -78,6 +93,52 @@ class ShowtimeCreate(ShowtimeBase):
 class Showtime(ShowtimeBase):
     id: int
     movie_id: int
+    studio_id: Optional[int] = None   # terisi kalau dibuat dari Studio (layout dipakai bersama)
+
+class ShowtimeAvailability(BaseModel):
+    """Okupansi satu showtime (dari counter seat map, tanpa serialisasi peta kursi)."""
+    showtime_id: int
+    day: str
+    time: str
+    total: int
+    available: int
+    reserved: int
+    booked: int
+    blocked: int
+
+class ShowtimeBulkCreate(BaseModel):
+    """Jadwal massal: satu template studio + banyak slot hari/jam."""
+    template: ShowtimeTemplate
+    slots: List[ShowtimeSlot] = Field(..., min_length=1, max_length=10000)
+
+# ---------- STUDIO ----------
+class StudioCreate(StudioLayout):
+    name: str = Field(..., example="Studio 1")
+
+class StudioUpdate(BaseModel):
+    name: Optional[str] = None
+    rows: Optional[int] = Field(None, ge=1, le=26)
+    cols: Optional[int] = Field(None, ge=1, le=20)
+    screen_side: Optional[ScreenSide] = None
+    aisles_cols: Optional[List[int]] = None
+    vip_seats: Optional[List[str]] = None
+    disabled_seats: Optional[List[str]] = None
+
+    @validator("name", "rows", "cols", "screen_side")
+    def _not_null(cls, v):
+        # partial update: field wajib studio boleh tidak dikirim, tapi tidak boleh null
+        if v is None:
+            raise ValueError("must not be null")
+        return v
+
+class Studio(StudioCreate):
+    id: int
+
+class StudioShowtimesCreate(BaseModel):
+    """Jadwalkan satu atau banyak showtime di studio yang sudah terdaftar."""
+    movie_id: int
+    price: float = Field(..., ge=0.0, example=50000.0)
+    slots: List[ShowtimeSlot] = Field(..., min_length=1, max_length=10000)
 
 # ---------- CART & CHECKOUT ----------
 class AddToCartRequest(BaseModel):
@@ -85,6 +146,24 @@ class AddToCartRequest(BaseModel):
     showtime_id: int
     seats: List[str]
 
+class BestAvailableRequest(BaseModel):
+    user_id: str
+    showtime_id: int
+    quantity: int = Field(..., ge=1, le=20, example=4)
+
+class SeatSuggestion(BaseModel):
+    showtime_id: int
+    seats: List[str]
+
+class CartBatchGroup(BaseModel):
+    showtime_id: int
+    seats: List[str] = Field(..., min_length=1)
+
+class CartBatchRequest(BaseModel):
+    """Booking grup: banyak (showtime, kursi) sekaligus, semua berhasil atau tidak sama sekali."""
+    user_id: str
+    groups: List[CartBatchGroup] = Field(..., min_length=1, max_length=100)
+
 class RemoveFromCartRequest(BaseModel):
     user_id: str
     cart_item_id: Optional[str] = None
@@ -101,18 +180,124 @@ class Cart(BaseModel):
     items: List[CartItem]
     total: float
 
+class CartBatchResponse(BaseModel):
+    user_id: str
+    items: List[CartItem]
+    total: float
+
 class CheckoutRequest(BaseModel):
     user_id: str
     promo_code: Optional[str] = None
 
+class BookingItem(CartItem):
+    movie_id: Optional[int] = None   # untuk laporan revenue per movie
+
 class CheckoutResponse(BaseModel):
     booking_code: str
     user_id: str
     total_before_discount: float
     discount_amount: float
     total_paid: float
-    items: List[CartItem]
+    items: List[BookingItem]
     timestamp: str
+    promo_code: Optional[str] = None
+
+# ---------- PRICING ----------
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+_HHMM = re.compile(r"^([01]\d|2[0-3]):[0-5]\d$")
+
+class TimeRule(BaseModel):
+    """
+    Pengali harga untuk showtime di hari/jam tertentu (semua rule yang cocok dikalikan).
+    time_from > time_to = jendela lewat tengah malam (mis. 22:00-02:00); `days`
+    dicocokkan dengan hari showtime itu sendiri.
+    """
+    name: Optional[str] = Field(None, example="weekend")
+    days: Optional[List[str]] = Field(None, example=["sat", "sun"])   # kosong = semua hari
+    time_from: Optional[str] = Field(None, example="18:00")           # HH:MM inklusif
+    time_to: Optional[str] = Field(None, example="23:59")             # HH:MM inklusif
+    multiplier: float = Field(..., gt=0, example=1.2)
+
+    @validator("time_from", "time_to")
+    def _hhmm(cls, v):
+        if v is not None and not _HHMM.match(v):
+            raise ValueError("time must be HH:MM 24h (00:00-23:59)")
+        return v
+
+    @validator("days")
+    def _days(cls, v):
+        if v is not None and any(d.lower() not in WEEKDAYS for d in v):
+            raise ValueError(f"days must be in {WEEKDAYS}")
+        return v and [d.lower() for d in v]
+
+class PromoRule(BaseModel):
+    code: str = Field(..., min_length=1, example="DISCOUNT10")
+    percent: float = Field(..., gt=0, le=100, example=10)
+    min_total: float = Field(0.0, ge=0)
+    max_discount: Optional[float] = Field(None, ge=0)
+
+class PricingRules(BaseModel):
+    """Aturan harga: pengali per seat_type, rule hari/jam, dan tabel promo."""
+    seat_tiers: Dict[str, float] = Field(default_factory=lambda: {"standard": 1.0, "vip": 1.0})
+    time_rules: List[TimeRule] = Field(default_factory=list)
+    promos: List[PromoRule] = Field(default_factory=lambda: [
+        PromoRule(code="DISCOUNT10", percent=10), PromoRule(code="STUDENT20", percent=20)])
+
+class QuoteItem(BaseModel):
+    showtime_id: int
+    seats: List[str] = Field(..., min_length=1)
+
+class QuoteRequest(BaseModel):
+    """Harga banyak (showtime, kursi) sekaligus tanpa reserve; promo dihitung atas total."""
+    items: List[QuoteItem] = Field(..., min_length=1, max_length=500)
+    promo_code: Optional[str] = None
+
+class QuoteLine(BaseModel):
+    showtime_id: int
+    seats: List[str]
+    seat_types: Dict[str, int]
+    subtotal: float
+
+class QuoteResponse(BaseModel):
+    items: List[QuoteLine]
+    total: float
+    discount_amount: float
+    total_paid: float
+
+class CartQuote(BaseModel):
+    user_id: str
+    items: List[CartItem]
+    total: float
+    discount_amount: float
+    total_paid: float
+
+# ---------- WAITING ROOM ----------
+class WaitingRoomSettings(BaseModel):
+    """Kosong = pakai default config (MOVIE_BOOKING_ADMISSION_*)."""
+    active_cap: Optional[int] = Field(None, ge=1)
+    session_ttl: Optional[float] = Field(None, gt=0)
+    queue_max: Optional[int] = Field(None, ge=0)
+    rate: Optional[float] = Field(None, gt=0)
+    burst: Optional[int] = Field(None, ge=1)
+
+class QueueJoinRequest(BaseModel):
+    user_id: str
+
+# ---------- TWO-PHASE CHECKOUT (internal, mode sharded) ----------
+class TxPrepareRequest(BaseModel):
+    txid: str
+    user_id: str
+
+class TxPrepareResponse(BaseModel):
+    items: List[BookingItem]
+    total: float
+
+class TxCommitRequest(BaseModel):
+    txid: str
+    booking: Optional[CheckoutResponse] = None   # diisi hanya untuk shard "home"
+
+class TxAbortRequest(BaseModel):
+    txid: str
 
 # ---------- LAYOUT VISUAL ----------
 class SeatCell(BaseModel):
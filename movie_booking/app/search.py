@@ -0,0 +1,226 @@
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Tuple
+from .schemas import Movie
+
+# =========================
+#      PENCARIAN MOVIE
+# =========================
+# Inverted index in-process atas title, synopsis, genre, rating:
+# term -> {movie_id: bobot}, bobot = jumlah bobot field tempat term muncul
+# (title paling berat). Kosakata disimpan di prefix trie untuk prefix match
+# pada token terakhir query (search-as-you-type). Toleransi typo (edit
+# distance 1: hapus/sisip/ganti satu huruf) lewat index deletion ala
+# SymSpell: varian "term tanpa satu huruf" -> term, jadi lookup
+# cukup len(token) + 1 akses dict. Hanya dipakai kalau token tidak punya
+# match exact/prefix sama sekali.
+# Semua token query wajib cocok (AND). Skor = sum(bobot x idf x faktor jenis
+# match). Index di-update inkremental dari storage (save/delete movie).
+
+FIELD_WEIGHTS = {"title": 3.0, "genre": 2.0, "rating": 1.5, "synopsis": 1.0}
+EXACT, PREFIX, FUZZY = 1.0, 0.6, 0.4      # faktor skor per jenis match
+MAX_EXPANSIONS = 64                        # term maksimum hasil ekspansi prefix / typo per token
+MIN_FUZZY_LEN = 4                          # token lebih pendek tidak dicari dengan toleransi typo
+
+_TOKEN = re.compile(r"[0-9a-z]+")
+_END = ""   # key penanda akhir term di node trie (karakter term tidak pernah kosong)
+
+
+def tokenize(text: str | None) -> List[str]:
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode()
+    return _TOKEN.findall(text)
+
+
+def _deletes(term: str) -> List[str]:
+    return [term[:i] + term[i + 1:] for i in range(len(term))]
+
+
+class _Trie:
+    """Prefix trie kosakata: node = dict char -> node, _END -> term."""
+
+    def __init__(self):
+        self.root: dict = {}
+
+    def add(self, term: str) -> None:
+        node = self.root
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[_END] = term
+
+    def remove(self, term: str) -> None:
+        path = [(_END, self.root)]
+        node = self.root
+        for ch in term:
+            node = node.get(ch)
+            if node is None:
+                return
+            path.append((ch, node))
+        node.pop(_END, None)
+        # pangkas node yang jadi kosong dari bawah
+        for i in range(len(path) - 1, 0, -1):
+            ch, node = path[i]
+            if node:
+                break
+            del path[i - 1][1][ch]
+
+    def complete(self, prefix: str, limit: int) -> List[str]:
+        """Term berawalan `prefix`, yang terpendek dulu (BFS), maksimal `limit`."""
+        node = self.root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return []
+        out: List[str] = []
+        level = [node]
+        while level and len(out) < limit:
+            nxt = []
+            for n in level:
+                for ch, child in n.items():
+                    if ch == _END:
+                        out.append(child)
+                    else:
+                        nxt.append(child)
+            level = nxt
+        return out[:limit]
+
+
+class SearchIndex:
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, float]] = {}   # term -> {movie_id: bobot}
+        self._docs: Dict[int, Dict[str, float]] = {}       # movie_id -> {term: bobot} (untuk hapus/update)
+        self._ranked: Dict[str, List[Tuple[int, float]]] = {}   # cache posting urut bobot (lazy)
+        self._trie = _Trie()
+        self._variants: Dict[str, Dict[str, None]] = {}   # term tanpa satu huruf -> terms
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    @staticmethod
+    def _terms(m: Movie) -> Dict[str, float]:
+        weights: Dict[str, float] = {}
+        for field, w in FIELD_WEIGHTS.items():
+            for term in set(tokenize(getattr(m, field))):
+                weights[term] = weights.get(term, 0.0) + w
+        return weights
+
+    def _remove(self, movie_id: int) -> None:
+        for term in self._docs.pop(movie_id, ()):
+            self._ranked.pop(term, None)
+            posting = self._postings[term]
+            del posting[movie_id]
+            if not posting:
+                del self._postings[term]
+                self._unindex_term(term)
+
+    def add(self, m: Movie) -> None:
+        terms = self._terms(m)
+        with self._lock:
+            self._remove(m.id)
+            self._docs[m.id] = terms
+            for term, w in terms.items():
+                self._ranked.pop(term, None)
+                posting = self._postings.get(term)
+                if posting is None:
+                    posting = self._postings[term] = {}
+                    self._index_term(term)
+                posting[m.id] = w
+
+    def _index_term(self, term: str) -> None:
+        self._trie.add(term)
+        if len(term) >= MIN_FUZZY_LEN - 1:
+            for v in _deletes(term):
+                self._variants.setdefault(v, {})[term] = None
+
+    def _unindex_term(self, term: str) -> None:
+        self._trie.remove(term)
+        if len(term) >= MIN_FUZZY_LEN - 1:
+            for v in _deletes(term):
+                bucket = self._variants.get(v)
+                if bucket is not None:
+                    bucket.pop(term, None)
+                    if not bucket:
+                        del self._variants[v]
+
+    def _near(self, token: str) -> List[str]:
+        """Term berjarak edit 1 dari token (hapus / sisip / ganti satu huruf)."""
+        found: Dict[str, None] = {}
+        if token in self._variants:                  # token = term tanpa satu huruf (huruf terlewat)
+            found.update(self._variants[token])
+        for v in _deletes(token):
+            if v in self._postings and len(v) >= MIN_FUZZY_LEN - 1:   # kelebihan satu huruf
+                found[v] = None
+            if v in self._variants:                  # satu huruf salah
+                found.update(self._variants[v])
+        found.pop(token, None)
+        return list(found)[:MAX_EXPANSIONS]
+
+    def remove(self, movie_id: int) -> None:
+        with self._lock:
+            self._remove(movie_id)
+
+    def _ranked_posting(self, term: str) -> List[Tuple[int, float]]:
+        ranked = self._ranked.get(term)
+        if ranked is None:
+            ranked = self._ranked[term] = sorted(self._postings[term].items(), key=lambda kv: (-kv[1], kv[0]))
+        return ranked
+
+    def _expand(self, token: str, prefix: bool) -> Dict[str, float]:
+        """term -> faktor match untuk satu token query; typo hanya dicari kalau tidak ada match lain."""
+        found: Dict[str, float] = {}
+        if token in self._postings:
+            found[token] = EXACT
+        if prefix:
+            for term in self._trie.complete(token, MAX_EXPANSIONS):
+                found.setdefault(term, PREFIX * len(token) / len(term))
+        if not found and len(token) >= MIN_FUZZY_LEN:
+            for term in self._near(token):
+                found[term] = FUZZY
+        return found
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[int, float]]:
+        """[(movie_id, skor)] urut skor tertinggi; token terakhir diperlakukan sebagai prefix."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        with self._lock:
+            n = len(self._docs) or 1
+            groups = []   # per token: [(posting, bobot pengali)]
+            for i, token in enumerate(tokens):
+                terms = self._expand(token, prefix=i == len(tokens) - 1)
+                if not terms:
+                    return []
+                groups.append([(term, math.log(1 + n / len(self._postings[term])) * factor)
+                               for term, factor in terms.items()])
+            if len(groups) == 1:
+                # satu token: top-k tiap term dari posting yang sudah urut bobot sudah cukup
+                best: Dict[int, float] = {}
+                for term, mult in groups[0]:
+                    for movie_id, w in self._ranked_posting(term)[:limit]:
+                        if w * mult > best.get(movie_id, 0.0):
+                            best[movie_id] = w * mult
+                return heapq.nlargest(limit, best.items(), key=lambda kv: (kv[1], -kv[0]))
+            # AND: kandidat dari token dengan posting paling kecil, token lain cuma lookup
+            groups.sort(key=lambda g: sum(len(self._postings[t]) for t, _ in g))
+            total: Dict[int, float] = {}
+            for term, mult in groups[0]:
+                for movie_id, w in self._postings[term].items():
+                    if w * mult > total.get(movie_id, 0.0):
+                        total[movie_id] = w * mult
+            for group in groups[1:]:
+                postings = [(self._postings[t], mult) for t, mult in group]
+                for movie_id in list(total):
+                    s = max((p.get(movie_id, 0.0) * mult for p, mult in postings), default=0.0)
+                    if s:
+                        total[movie_id] += s
+                    else:
+                        del total[movie_id]
+        return heapq.nlargest(limit, total.items(), key=lambda kv: (kv[1], -kv[0]))
+
+
+index = SearchIndex()
@@ -0,0 +1,135 @@
+import threading
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from .schemas import SeatStatus
+from .seatmap import LayoutTemplate, SeatMap
+
+# =========================
+#   BEST-AVAILABLE FINDER
+# =========================
+# Index per showtime: untuk tiap baris, daftar run kursi available yang
+# bersebelahan (start kolom 0-based, panjang). Run diputus oleh kursi yang tidak
+# available (reserved/booked/blocked) dan oleh aisle: aisle di kolom a berarti
+# lorong di antara kolom a dan a+1, jadi kursi yang mengapit lorong tidak
+# dihitung bersebelahan. Index di-refresh per baris dari change log seat map.
+
+Run = Tuple[int, int]
+
+
+@lru_cache(maxsize=None)
+def _segments(cols: int, aisles: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Bitmask (relatif baris) tiap blok kolom di antara aisle."""
+    cuts = sorted({a for a in aisles if 1 <= a < cols})
+    out = []
+    start = 0
+    for a in cuts + [cols]:
+        out.append(((1 << (a - start)) - 1) << start)
+        start = a
+    return tuple(out)
+
+
+@lru_cache(maxsize=None)
+def _row_order(rows: int) -> Tuple[int, ...]:
+    """Index baris (0-based) urut dari yang paling dekat ke baris tengah."""
+    mid = (rows - 1) / 2
+    return tuple(sorted(range(rows), key=lambda r: abs(r - mid)))
+
+
+def _runs(bits: int, segments: Tuple[int, ...]) -> Tuple[Run, ...]:
+    """Run bit 1 berurutan di `bits`, dipotong per segmen."""
+    out: List[Run] = []
+    for seg in segments:
+        m = bits & seg
+        while m:
+            start = (m & -m).bit_length() - 1
+            x = m >> start
+            length = (~x & (x + 1)).bit_length() - 1
+            out.append((start, length))
+            m &= ~(((1 << length) - 1) << start)
+    return tuple(out)
+
+
+class _RunIndex:
+    """Run kursi available per baris untuk satu seat map, di-patch per baris yang berubah."""
+    __slots__ = ("seat_map", "segments", "version", "runs", "lock")
+
+    def __init__(self, seat_map: SeatMap, meta: LayoutTemplate):
+        layout = seat_map.layout
+        self.seat_map = seat_map
+        self.segments = _segments(layout.cols, meta.aisles)
+        self.lock = threading.Lock()
+        with seat_map.lock:
+            self.version = seat_map.version
+            avail = seat_map.mask(SeatStatus.available)
+        self.runs: List[Tuple[Run, ...]] = [self._row(avail, r) for r in range(layout.rows)]
+
+    def _row(self, avail: int, r: int) -> Tuple[Run, ...]:
+        cols = self.seat_map.layout.cols
+        return _runs((avail >> (r * cols)) & ((1 << cols) - 1), self.segments)
+
+    def refresh(self) -> None:
+        seat_map = self.seat_map
+        if self.version == seat_map.version:
+            return
+        with seat_map.lock:
+            changed = seat_map.changed_indexes(self.version)
+            version = seat_map.version
+            avail = seat_map.mask(SeatStatus.available)
+        layout = seat_map.layout
+        rows = range(layout.rows) if changed is None else {i // layout.cols for i in changed}
+        for r in rows:
+            self.runs[r] = self._row(avail, r)
+        self.version = version
+
+    def best(self, quantity: int) -> List[str] | None:
+        """
+        Blok `quantity` kursi bersebelahan dengan skor terbaik: jarak tengah blok
+        ke kolom tengah + jarak baris ke baris tengah (makin kecil makin baik).
+        """
+        layout = self.seat_map.layout
+        mid_col = (layout.cols - 1) / 2      # 0-based
+        mid_row = (layout.rows - 1) / 2
+        half = (quantity - 1) / 2
+        best_score = None
+        best_at = None
+        # baris dicek dari tengah ke luar; berhenti saat jarak baris saja sudah kalah
+        for r in _row_order(layout.rows):
+            row_cost = abs(r - mid_row)
+            if best_score is not None and row_cost >= best_score:
+                break
+            for start, length in self.runs[r]:
+                if length < quantity:
+                    continue
+                # posisi start paling dekat ke tengah di dalam run ini
+                s = min(max(round(mid_col - half), start), start + length - quantity)
+                score = row_cost + abs(s + half - mid_col)
+                if best_score is None or score < best_score:
+                    best_score, best_at = score, (r, s)
+        if best_at is None:
+            return None
+        r, s = best_at
+        base = r * layout.cols + s
+        return list(layout.codes[base:base + quantity])
+
+
+_cache: Dict[int, _RunIndex] = {}
+_cache_lock = threading.Lock()
+
+
+def best_available(showtime_id: int, seat_map: SeatMap, meta: LayoutTemplate,
+                   quantity: int) -> List[str] | None:
+    """Seat code blok terbaik untuk `quantity` kursi, None kalau tidak ada run yang cukup."""
+    entry = _cache.get(showtime_id)
+    if entry is None or entry.seat_map is not seat_map:
+        with _cache_lock:
+            entry = _cache.get(showtime_id)
+            if entry is None or entry.seat_map is not seat_map:
+                entry = _RunIndex(seat_map, meta)
+                _cache[showtime_id] = entry
+    with entry.lock:
+        entry.refresh()
+        return entry.best(quantity)
+
+
+def invalidate(showtime_id: int) -> None:
+    _cache.pop(showtime_id, None)
@@ -0,0 +1,338 @@
+from array import array
+from collections.abc import MutableMapping
+from functools import lru_cache
+import itertools
+from typing import Callable, Dict, Iterator, List, Tuple
+from .locks import ContendedLock
+from .schemas import SeatStatus
+from .utils import seat_codes, seat_type_for
+
+# urutan status -> kode byte di state array (jangan diubah urutannya)
+STATUSES: Tuple[SeatStatus, ...] = tuple(SeatStatus)
+STATUS_CODE: Dict[SeatStatus, int] = {s: i for i, s in enumerate(STATUSES)}
+
+# jumlah perubahan terakhir yang disimpan per showtime untuk delta feed
+CHANGE_LOG_SIZE = 512
+
+# id unik tiap SeatMap, supaya versi dari seat map lama (showtime dibuat ulang) tidak tertukar
+_uid_counter = itertools.count(1)
+
+
+class SeatIndex:
+    """
+    Index (row, col) <-> seat code yang immutable, dipakai bersama oleh semua
+    showtime dengan ukuran rows x cols yang sama. Seat code di-decode sekali di sini.
+    Index linear: i = (row - 1) * cols + (col - 1).
+    """
+    __slots__ = ("rows", "cols", "codes", "index", "full_mask", "_row_masks")
+
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        self.codes: Tuple[str, ...] = tuple(seat_codes(rows, cols))
+        self.index: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+        self.full_mask = (1 << len(self.codes)) - 1
+        row_bits = (1 << cols) - 1
+        self._row_masks = tuple(row_bits << (r * cols) for r in range(rows))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def row_col(self, i: int) -> Tuple[int, int]:
+        r, c = divmod(i, self.cols)
+        return r + 1, c + 1
+
+    def row_mask(self, row: int) -> int:
+        """Bitmask semua kursi pada baris `row` (1-based)."""
+        return self._row_masks[row - 1]
+
+    def mask_of(self, codes) -> int:
+        """Bitmask dari kumpulan seat code (code yang tidak dikenal diabaikan)."""
+        mask = 0
+        index = self.index
+        for code in codes:
+            i = index.get(code)
+            if i is not None:
+                mask |= 1 << i
+        return mask
+
+
+@lru_cache(maxsize=None)
+def seat_index(rows: int, cols: int) -> SeatIndex:
+    """Ambil SeatIndex yang di-intern per (rows, cols)."""
+    return SeatIndex(rows, cols)
+
+
+class LayoutTemplate:
+    """
+    Bagian immutable layout sebuah studio: index kursi, aisles, kursi VIP/disabled,
+    seat_type per kursi, dan state awal seat map. Di-intern lewat `layout_template`,
+    jadi semua showtime dengan konfigurasi sama memakai objek yang sama; per showtime
+    hanya state kursi (SeatMap) yang dialokasikan.
+    """
+    __slots__ = ("index", "aisles", "vip", "disabled", "blocked_mask", "seat_types",
+                 "grid", "_initial_state", "_initial_masks", "_initial_counts")
+
+    def __init__(self, rows: int, cols: int, aisles: Tuple[int, ...],
+                 vip: frozenset, disabled: frozenset):
+        self.index = seat_index(rows, cols)
+        self.aisles = aisles
+        self.vip = vip
+        self.disabled = disabled
+        self.blocked_mask = self.index.mask_of(disabled)
+        self.seat_types: Tuple[str, ...] = tuple(seat_type_for(code, vip, disabled) for code in self.index.codes)
+        # grid statis per baris: (row, col, code, seat_type), index linear = urutan flatten
+        self.grid: Tuple[Tuple[Tuple[int, int, str, str], ...], ...] = tuple(
+            tuple((r, c, self.index.codes[(r - 1) * cols + c - 1], self.seat_types[(r - 1) * cols + c - 1])
+                  for c in range(1, cols + 1))
+            for r in range(1, rows + 1)
+        )
+        seat_map = SeatMap(self.index)
+        seat_map.set_mask(self.blocked_mask, SeatStatus.blocked)
+        self._initial_state = seat_map.snapshot()
+        self._initial_masks = tuple(seat_map._masks)
+        self._initial_counts = tuple(seat_map._counts)
+
+    def new_seat_map(self) -> "SeatMap":
+        """SeatMap baru dengan state awal (disabled -> blocked) hasil salin, tanpa hitung ulang."""
+        seat_map = SeatMap(self.index)
+        seat_map._state[:] = self._initial_state
+        seat_map._masks[:] = self._initial_masks
+        seat_map._counts[:] = self._initial_counts
+        return seat_map
+
+
+@lru_cache(maxsize=1024)
+def _template(rows: int, cols: int, aisles: Tuple[int, ...],
+              vip: frozenset, disabled: frozenset) -> LayoutTemplate:
+    return LayoutTemplate(rows, cols, aisles, vip, disabled)
+
+
+def layout_template(rows: int, cols: int, aisles=None, vip=None, disabled=None) -> LayoutTemplate:
+    """Ambil LayoutTemplate yang di-intern untuk konfigurasi layout ini."""
+    return _template(rows, cols, tuple(aisles or ()), frozenset(vip or ()), frozenset(disabled or ()))
+
+
+class SeatMap(MutableMapping):
+    """
+    Peta status kursi per showtime yang ringkas.
+
+    - state: bytearray, satu byte per kursi (kode status) -> lookup O(1)
+    - masks: satu bitmask (int) per status -> operasi set-wide, mis. semua kursi
+      available cukup satu operasi mask.
+    - counts: jumlah kursi per status, di-update tiap `set_at` -> okupansi O(1).
+
+    Tetap memenuhi kontrak Dict[str, SeatStatus] (get/[]/in/iter/items) sehingga
+    crud dan response `/showtimes/{id}/seats` tidak berubah. Kursi tidak bisa
+    ditambah/dihapus; layout tetap sesuai SeatIndex.
+
+    Perubahan status yang harus atomik (cek lalu set) lewat `transition`,
+    yang dijalankan di bawah `lock` milik showtime ini.
+
+    `version` naik tepat 1 setiap ada kursi yang statusnya berubah; (uid, version)
+    dipakai sebagai penanda cache (mis. ETag layout). Karena naiknya berurutan,
+    change log cukup ring buffer index kursi: perubahan ke-v ada di slot v % N.
+    Ring buffer baru dialokasikan saat ada perubahan pertama.
+    """
+    __slots__ = ("layout", "lock", "uid", "version", "_state", "_masks", "_counts", "_log", "_watchers")
+
+    def __init__(self, layout: SeatIndex, initial: SeatStatus = SeatStatus.available):
+        self.layout = layout
+        self.lock = ContendedLock()
+        self.uid = next(_uid_counter)
+        self.version = 0
+        self._log: array | None = None
+        self._watchers: List[Callable[[], None]] | None = None
+        code = STATUS_CODE[initial]
+        self._state = bytearray([code]) * len(layout)
+        self._masks: List[int] = [0] * len(STATUSES)
+        self._masks[code] = layout.full_mask
+        self._counts: List[int] = [0] * len(STATUSES)
+        self._counts[code] = len(layout)
+
+    # ---------- akses per index ----------
+    def status_at(self, i: int) -> SeatStatus:
+        return STATUSES[self._state[i]]
+
+    def set_at(self, i: int, status: SeatStatus) -> None:
+        new = STATUS_CODE[status]
+        old = self._state[i]
+        if old == new:
+            return
+        bit = 1 << i
+        self._masks[old] &= ~bit
+        self._masks[new] |= bit
+        self._counts[old] -= 1
+        self._counts[new] += 1
+        self._state[i] = new
+        self.version += 1
+        log = self._log
+        if log is None:
+            log = self._log = array("H", bytes(2 * CHANGE_LOG_SIZE))
+        log[self.version % CHANGE_LOG_SIZE] = i
+
+    # ---------- operasi set-wide ----------
+    def mask(self, status: SeatStatus) -> int:
+        """Bitmask kursi dengan status tertentu."""
+        return self._masks[STATUS_CODE[status]]
+
+    def count(self, status: SeatStatus) -> int:
+        return self._counts[STATUS_CODE[status]]
+
+    def counts(self) -> Dict[str, int]:
+        """Jumlah kursi per status {"available": n, ...}, O(1)."""
+        counts = self._counts
+        return {s.value: counts[i] for i, s in enumerate(STATUSES)}
+
+    def codes_with(self, status: SeatStatus) -> List[str]:
+        """Daftar seat code dengan status tertentu, urut sesuai layout."""
+        mask = self._masks[STATUS_CODE[status]]
+        codes = self.layout.codes
+        out: List[str] = []
+        while mask:
+            low = mask & -mask
+            out.append(codes[low.bit_length() - 1])
+            mask ^= low
+        return out
+
+    def set_mask(self, mask: int, status: SeatStatus) -> None:
+        """Set status untuk semua kursi pada bitmask."""
+        mask &= self.layout.full_mask
+        while mask:
+            low = mask & -mask
+            self.set_at(low.bit_length() - 1, status)
+            mask ^= low
+        self._notify()
+
+    def check(self, codes: List[str], expect: SeatStatus) -> str | None:
+        """
+        Kembalikan seat code pertama yang tidak berstatus `expect`
+        (atau tidak ada di layout), None kalau semua cocok.
+        Pemanggil wajib memegang `lock`.
+        """
+        index = self.layout.index
+        state = self._state
+        want = STATUS_CODE[expect]
+        for code in codes:
+            i = index.get(code)
+            if i is None or state[i] != want:
+                return code
+        return None
+
+    def apply(self, codes: List[str], to: SeatStatus) -> None:
+        """Set status kumpulan kursi yang sudah divalidasi. Pemanggil wajib memegang `lock`."""
+        index = self.layout.index
+        for code in codes:
+            self.set_at(index[code], to)
+        self._notify()
+
+    def transition(self, codes: List[str], expect: SeatStatus, to: SeatStatus) -> str | None:
+        """
+        Cek-lalu-set atomik untuk satu batch kursi: semua harus `expect`,
+        baru semuanya diubah ke `to`. Kalau ada yang gagal, tidak ada yang berubah
+        dan seat code yang gagal dikembalikan.
+        """
+        with self.lock:
+            bad = self.check(codes, expect)
+            if bad is None:
+                self.apply(codes, to)
+            return bad
+
+    # ---------- delta feed ----------
+    def changed_indexes(self, since: int) -> set | None:
+        """
+        Index kursi yang berubah setelah versi `since`.
+        None kalau `since` sudah keluar dari change log (client harus ambil full).
+        Pemanggil sebaiknya memegang `lock` agar konsisten dengan `version`.
+        """
+        version = self.version
+        if since < 0 or since > version or version - since > CHANGE_LOG_SIZE:
+            return None
+        log = self._log
+        if since == version:
+            return set()
+        return {log[v % CHANGE_LOG_SIZE] for v in range(since + 1, version + 1)}
+
+    def changes_since(self, since: int) -> Tuple[int, Dict[str, SeatStatus] | None]:
+        """Return (version saat ini, {code: status} yang berubah sejak `since` atau None)."""
+        with self.lock:
+            idxs = self.changed_indexes(since)
+            version = self.version
+            if idxs is None:
+                return version, None
+            codes = self.layout.codes
+            state = self._state
+            return version, {codes[i]: STATUSES[state[i]] for i in sorted(idxs)}
+
+    def subscribe(self, callback: Callable[[], None]) -> None:
+        """Daftarkan callback (tanpa argumen) yang dipanggil setelah tiap batch perubahan."""
+        with self.lock:
+            self._watchers = [*(self._watchers or ()), callback]
+
+    def unsubscribe(self, callback: Callable[[], None]) -> None:
+        with self.lock:
+            rest = [cb for cb in (self._watchers or ()) if cb is not callback]
+            self._watchers = rest or None
+
+    def _notify(self) -> None:
+        # dipanggil di dalam lock & jalur reservasi: watcher yang error (mis. loop
+        # SSE sudah tertutup) dilepas, tidak boleh menggagalkan request lain
+        watchers = self._watchers
+        if watchers:
+            dead = []
+            for cb in watchers:
+                try:
+                    cb()
+                except Exception:
+                    dead.append(cb)
+            if dead:
+                rest = [cb for cb in watchers if cb not in dead]
+                self._watchers = rest or None
+
+    def snapshot(self) -> bytes:
+        """Salinan state mentah (satu byte per kursi)."""
+        return bytes(self._state)
+
+    def restore(self, state: bytes) -> None:
+        """Kebalikan `snapshot`: set ulang state dari byte mentah (mis. saat recovery)."""
+        if len(state) != len(self._state):
+            raise ValueError("State size does not match seat layout")
+        current = self._state
+        for i, code in enumerate(state):
+            if current[i] != code:
+                self.set_at(i, STATUSES[code])
+        self._notify()
+
+    # ---------- kontrak Mapping[str, SeatStatus] ----------
+    def __getitem__(self, code: str) -> SeatStatus:
+        return STATUSES[self._state[self.layout.index[code]]]
+
+    def get(self, code, default=None):
+        i = self.layout.index.get(code)
+        return default if i is None else STATUSES[self._state[i]]
+
+    def __setitem__(self, code: str, status: SeatStatus) -> None:
+        self.set_at(self.layout.index[code], status)
+        self._notify()
+
+    def __delitem__(self, code: str) -> None:
+        raise TypeError("Seats cannot be removed from a SeatMap")
+
+    def __contains__(self, code) -> bool:
+        return code in self.layout.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.layout.codes)
+
+    def __len__(self) -> int:
+        return len(self.layout.codes)
+
+    def items(self):
+        state = self._state
+        return [(code, STATUSES[state[i]]) for i, code in enumerate(self.layout.codes)]
+
+    def to_dict(self) -> Dict[str, SeatStatus]:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"SeatMap({self.layout.rows}x{self.layout.cols})"
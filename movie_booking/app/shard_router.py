@@ -0,0 +1,562 @@
+# app/shard_router.py
+import asyncio
+import itertools
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from . import config, crud, paging, pricing, reports
+from .schemas import PricingRules
+
+# =========================
+#      SHARD ROUTER
+# =========================
+# Mode sharded: N proses app.main (shard) masing-masing memiliki sebagian
+# showtime -> shard pemilik = (showtime_id - 1) % N, karena shard k hanya
+# membagikan id dengan residu k (MOVIE_BOOKING_SHARD_INDEX/COUNT). Seat map,
+# cart item, dan hold hidup di shard pemilik showtime-nya.
+# Router ini tipis dan stateless (bisa dijalankan beberapa instance):
+# - movie & studio dibuat di shard 0 lalu direplikasi ke semua shard;
+# - showtime baru dibagi round-robin; /showtimes/{id}/* & cart/add ke pemilik;
+# - daftar (showtime, cart, tiket) di-fan-out lalu digabung;
+# - checkout dengan cart di satu shard diteruskan apa adanya, cart lintas shard
+#   lewat two-phase commit (prepare di semua shard -> commit / abort).
+#
+#   MOVIE_BOOKING_SHARDS=http://127.0.0.1:8001,http://127.0.0.1:8002 \
+#       uvicorn app.shard_router:app --port 8000
+#
+# Lokal (satu mesin, N proses shard + router): python -m app.shard_router 4
+
+_HOP_HEADERS = {"content-length", "content-encoding", "transfer-encoding", "connection", "keep-alive", "host"}
+
+
+def owner(showtime_id: int, shard_count: int) -> int:
+    return (showtime_id - 1) % shard_count
+
+
+def _showtime_key(st: dict) -> Tuple:
+    return (st["day"], st["time"], st["id"])
+
+
+def _booking_key(b: dict) -> Tuple:
+    return (b["timestamp"], b["booking_code"])
+
+
+def _to_response(r: httpx.Response) -> Response:
+    headers = {k: v for k, v in r.headers.items() if k.lower() not in _HOP_HEADERS}
+    return Response(r.content, status_code=r.status_code, headers=headers)
+
+
+def _error(results: List[httpx.Response]) -> Response | None:
+    """Response error pertama dari hasil fan-out (None kalau semua sukses)."""
+    for r in results:
+        if r.status_code >= 400:
+            return _to_response(r)
+    return None
+
+
+def create_app(urls: List[str]) -> FastAPI:
+    if not urls:
+        raise ValueError("Sharded mode needs at least one shard URL (MOVIE_BOOKING_SHARDS)")
+    n = len(urls)
+    clients: List[httpx.AsyncClient] = []
+    rr = itertools.count()   # round-robin penempatan showtime baru
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        clients.extend(httpx.AsyncClient(base_url=u, timeout=30) for u in urls)
+        # promo checkout lintas shard dihitung di router: ikut rules yang berlaku di shard
+        try:
+            r = await call(0, "GET", "/admin/pricing")
+            if r.status_code == 200:
+                pricing.set_rules(PricingRules(**r.json()))
+        except httpx.HTTPError:
+            pass
+        yield
+        await asyncio.gather(*(c.aclose() for c in clients))
+        clients.clear()
+
+    app = FastAPI(title="Movie Booking API - Shard Router", version="1.0.0", lifespan=lifespan)
+
+    # ---------- helper ----------
+    async def call(shard: int, method: str, path: str, **kw) -> httpx.Response:
+        return await clients[shard].request(method, path, **kw)
+
+    async def fan_out(method: str, path: str, shards=None, **kw) -> List[httpx.Response]:
+        shards = range(n) if shards is None else shards
+        return list(await asyncio.gather(*(call(i, method, path, **kw) for i in shards)))
+
+    async def forward(request: Request, shard: int, path: str | None = None) -> Response:
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in _HOP_HEADERS}
+        r = await call(shard, request.method, path or request.url.path,
+                       params=request.query_params, content=await request.body(), headers=headers)
+        return _to_response(r)
+
+    def shard_of(raw_id: str) -> int:
+        try:
+            return owner(int(raw_id), n)
+        except ValueError:
+            return 0   # id tidak valid -> biar shard 0 yang menjawab 422
+
+    async def replicate(path: str, body: dict) -> None:
+        if n > 1:
+            await fan_out("PUT", path, shards=range(1, n), json=body)
+
+    async def merged_page(path: str, request: Request, key) -> Response:
+        """
+        Fan-out listing berhalaman lalu merge urut `key`. Cursor shard berupa
+        sort-key yang sama di semua shard, jadi cursor gabungan cukup key item
+        terakhir yang dikembalikan.
+        """
+        params = dict(request.query_params)
+        limit = int(params.get("limit", paging.DEFAULT_LIMIT))
+        results = await fan_out("GET", path, params=params)
+        err = _error(results)
+        if err is not None:
+            return err
+        items = sorted((item for r in results for item in r.json()), key=key)
+        more = len(items) > limit or any(r.headers.get("X-Next-Cursor") for r in results)
+        items = items[:limit]
+        headers = {}
+        if more and items:
+            headers["X-Next-Cursor"] = paging.encode_cursor(key(items[-1]))
+        return JSONResponse(items, headers=headers)
+
+    # ---------- movies & studios (replika di semua shard) ----------
+    @app.post("/admin/movies")
+    async def create_movie(request: Request):
+        r = await call(0, "POST", "/admin/movies", content=await request.body(),
+                       headers={"content-type": "application/json"})
+        if r.status_code == 200:
+            movie = r.json()
+            await replicate(f"/internal/movies/{movie['id']}", movie)
+        return _to_response(r)
+
+    @app.put("/admin/movies/{movie_id}")
+    async def update_movie(movie_id: int, request: Request):
+        r = await call(0, "PUT", f"/admin/movies/{movie_id}", content=await request.body(),
+                       headers={"content-type": "application/json"})
+        if r.status_code == 200:
+            await replicate(f"/internal/movies/{movie_id}", r.json())
+        return _to_response(r)
+
+    @app.delete("/admin/movies/{movie_id}")
+    async def delete_movie(movie_id: int):
+        # cascade showtime terjadi di tiap shard
+        results = await fan_out("DELETE", f"/admin/movies/{movie_id}")
+        return _to_response(results[0])
+
+    @app.post("/admin/studios")
+    async def create_studio(request: Request):
+        r = await call(0, "POST", "/admin/studios", content=await request.body(),
+                       headers={"content-type": "application/json"})
+        if r.status_code == 200:
+            studio = r.json()
+            await replicate(f"/internal/studios/{studio['id']}", studio)
+        return _to_response(r)
+
+    async def studio_users(studio_id: int) -> List[int]:
+        results = await fan_out("GET", f"/internal/studios/{studio_id}/usage")
+        return [i for i, r in enumerate(results) if r.status_code == 200 and r.json()["in_use"]]
+
+    @app.put("/admin/studios/{studio_id}")
+    async def update_studio(studio_id: int, request: Request):
+        # shard yang memakai studio yang memutuskan (409 kalau layout berubah)
+        users = await studio_users(studio_id)
+        home = users[0] if users else 0
+        r = await call(home, "PUT", f"/admin/studios/{studio_id}", content=await request.body(),
+                       headers={"content-type": "application/json"})
+        if r.status_code == 200:
+            await fan_out("PUT", f"/internal/studios/{studio_id}",
+                          shards=[i for i in range(n) if i != home], json=r.json())
+        return _to_response(r)
+
+    @app.delete("/admin/studios/{studio_id}")
+    async def delete_studio(studio_id: int):
+        if await studio_users(studio_id):
+            return JSONResponse({"detail": "Studio is used by existing showtimes"}, status_code=409)
+        r = await call(0, "DELETE", f"/admin/studios/{studio_id}")
+        if r.status_code == 200 and n > 1:
+            await fan_out("DELETE", f"/internal/studios/{studio_id}", shards=range(1, n))
+        return _to_response(r)
+
+    # ---------- showtimes: dibagi round-robin ----------
+    @app.post("/admin/movies/{movie_id}/showtimes")
+    async def create_showtime(movie_id: int, request: Request):
+        return await forward(request, next(rr) % n)
+
+    async def create_split(path: str, body: dict) -> Response:
+        """Bagi slot ke semua shard (round-robin), hasil dikembalikan sesuai urutan slot."""
+        slots = body.get("slots")
+        if not isinstance(slots, list) or not slots:
+            return _to_response(await call(0, "POST", path, json=body))
+        start = next(rr)
+        parts: Dict[int, List[int]] = {}
+        for pos in range(len(slots)):
+            parts.setdefault((start + pos) % n, []).append(pos)
+        shards = list(parts)
+        results = await asyncio.gather(*(
+            call(i, "POST", path, json={**body, "slots": [slots[p] for p in parts[i]]}) for i in shards))
+        err = _error(results)
+        if err is not None:
+            return err
+        created: List[Any] = [None] * len(slots)
+        for i, r in zip(shards, results):
+            for pos, st in zip(parts[i], r.json()):
+                created[pos] = st
+        return JSONResponse(created)
+
+    @app.post("/admin/movies/{movie_id}/showtimes/bulk")
+    async def create_showtimes_bulk(movie_id: int, request: Request):
+        return await create_split(f"/admin/movies/{movie_id}/showtimes/bulk", await request.json())
+
+    @app.post("/admin/studios/{studio_id}/showtimes")
+    async def create_studio_showtimes(studio_id: int, request: Request):
+        return await create_split(f"/admin/studios/{studio_id}/showtimes", await request.json())
+
+    @app.get("/admin/showtimes")
+    async def list_showtimes_admin(request: Request):
+        return await merged_page("/admin/showtimes", request, _showtime_key)
+
+    @app.get("/movies/{movie_id}/showtimes")
+    async def list_showtimes_for_movie(movie_id: int, request: Request):
+        return await merged_page(f"/movies/{movie_id}/showtimes", request, _showtime_key)
+
+    @app.get("/showtimes/availability")
+    async def list_availability(request: Request):
+        results = await fan_out("GET", "/showtimes/availability", params=request.query_params)
+        err = _error(results)
+        if err is not None:
+            return err
+        return sorted((a for r in results for a in r.json()),
+                      key=lambda a: (a["day"], a["time"], a["showtime_id"]))
+
+    # ---------- showtime & cart: ke shard pemilik ----------
+    @app.get("/showtimes/{showtime_id}/seats/stream")
+    async def seat_stream(showtime_id: str, request: Request):
+        client = clients[shard_of(showtime_id)]
+        req = client.build_request("GET", request.url.path, params=request.query_params,
+                                   headers={"accept": "text/event-stream"}, timeout=None)
+        r = await client.send(req, stream=True)
+        headers = {k: v for k, v in r.headers.items() if k.lower() not in _HOP_HEADERS}
+
+        async def body():
+            try:
+                async for chunk in r.aiter_raw():
+                    yield chunk
+            finally:
+                await r.aclose()
+        return StreamingResponse(body(), status_code=r.status_code, headers=headers)
+
+    @app.api_route("/showtimes/{showtime_id}/{rest:path}", methods=["GET", "POST", "PUT", "DELETE"])
+    async def showtime_route(showtime_id: str, rest: str, request: Request):
+        return await forward(request, shard_of(showtime_id))
+
+    @app.api_route("/admin/showtimes/{showtime_id}/{rest:path}", methods=["GET", "POST", "PUT", "DELETE"])
+    async def admin_showtime_route(showtime_id: str, rest: str, request: Request):
+        return await forward(request, shard_of(showtime_id))
+
+    async def to_showtime_owner(request: Request) -> Response:
+        try:
+            showtime_id = int((await request.json())["showtime_id"])
+        except (ValueError, KeyError, TypeError):
+            return await forward(request, 0)   # body tidak valid -> 422 dari shard
+        return await forward(request, owner(showtime_id, n))
+
+    @app.post("/cart/add")
+    async def add_to_cart(request: Request):
+        return await to_showtime_owner(request)
+
+    @app.post("/cart/best-available")
+    async def add_best_available(request: Request):
+        return await to_showtime_owner(request)
+
+    @app.post("/cart/batch")
+    async def add_batch_to_cart(request: Request):
+        """
+        Grup dipecah per shard pemilik. Kalau sebagian shard gagal, item yang
+        sudah di-reserve di shard lain dihapus lagi (kompensasi) supaya tetap
+        all-or-nothing dari sisi klien.
+        """
+        body = await request.json()
+        try:
+            user_id = body["user_id"]
+            groups = body["groups"]
+            parts: Dict[int, List[int]] = {}
+            for pos, g in enumerate(groups):
+                parts.setdefault(owner(int(g["showtime_id"]), n), []).append(pos)
+        except (KeyError, TypeError, ValueError):
+            return await forward(request, 0)   # body tidak valid -> 422 dari shard
+        if len(parts) <= 1:
+            return await forward(request, next(iter(parts), 0))
+        shards = list(parts)
+        results = await asyncio.gather(*(
+            call(i, "POST", "/cart/batch", json={"user_id": user_id, "groups": [groups[p] for p in parts[i]]})
+            for i in shards))
+        err = _error(results)
+        if err is not None:
+            await asyncio.gather(*(
+                call(i, "DELETE", "/cart/remove", json={"user_id": user_id, "cart_item_id": item["id"]})
+                for i, r in zip(shards, results) if r.status_code == 200 for item in r.json()["items"]))
+            return err
+        items: List[Any] = [None] * len(groups)
+        for i, r in zip(shards, results):
+            for pos, item in zip(parts[i], r.json()["items"]):
+                items[pos] = item
+        return {"user_id": user_id, "items": items, "total": sum(r.json()["total"] for r in results)}
+
+    async def carts(user_id: str) -> List[httpx.Response]:
+        return await fan_out("GET", f"/cart/{user_id}")
+
+    @app.get("/cart/{user_id}")
+    async def get_cart(user_id: str):
+        results = await carts(user_id)
+        err = _error(results)
+        if err is not None:
+            return err
+        items = [item for r in results for item in r.json()["items"]]
+        return {"user_id": user_id, "items": items, "total": sum(r.json()["total"] for r in results)}
+
+    @app.get("/cart/{user_id}/quote")
+    async def quote_cart(user_id: str, promo_code: Optional[str] = None):
+        results = await carts(user_id)
+        err = _error(results)
+        if err is not None:
+            return err
+        items = [item for r in results for item in r.json()["items"]]
+        total = sum(r.json()["total"] for r in results)
+        discount = pricing.promo_discount(total, promo_code)
+        return {"user_id": user_id, "items": items, "total": total, "discount_amount": discount,
+                "total_paid": max(0.0, total - discount)}
+
+    @app.delete("/cart/remove")
+    async def remove_from_cart(request: Request):
+        # item/kursi bisa di shard mana pun: sukses kalau minimal satu shard berhasil
+        body = await request.body()
+        results = await fan_out("DELETE", "/cart/remove", content=body,
+                                headers={"content-type": "application/json"})
+        for r in results:
+            if r.status_code == 200:
+                return _to_response(r)
+        return _to_response(results[0])
+
+    # ---------- pricing: rules di semua shard (+ router), quote dipecah per pemilik ----------
+    @app.put("/admin/pricing")
+    async def set_pricing(request: Request):
+        body = await request.json()
+        results = await fan_out("PUT", "/admin/pricing", json=body)
+        err = _error(results)
+        if err is not None:
+            return err
+        pricing.set_rules(PricingRules(**results[0].json()))
+        return _to_response(results[0])
+
+    @app.post("/pricing/quote")
+    async def quote(request: Request):
+        body = await request.json()
+        try:
+            items = body["items"]
+            parts: Dict[int, List[int]] = {}
+            for pos, item in enumerate(items):
+                parts.setdefault(owner(int(item["showtime_id"]), n), []).append(pos)
+        except (KeyError, TypeError, ValueError):
+            return await forward(request, 0)
+        if len(parts) <= 1:
+            return await forward(request, next(iter(parts), 0))
+        shards = list(parts)
+        results = await asyncio.gather(*(
+            call(i, "POST", "/pricing/quote", json={"items": [items[p] for p in parts[i]]}) for i in shards))
+        err = _error(results)
+        if err is not None:
+            return err
+        lines: List[Any] = [None] * len(items)
+        for i, r in zip(shards, results):
+            for pos, line in zip(parts[i], r.json()["items"]):
+                lines[pos] = line
+        total = sum(r.json()["total"] for r in results)
+        discount = pricing.promo_discount(total, body.get("promo_code"))
+        return {"items": lines, "total": total, "discount_amount": discount, "total_paid": max(0.0, total - discount)}
+
+    # ---------- checkout ----------
+    @app.post("/checkout")
+    async def checkout(request: Request):
+        body = await request.json()
+        user_id = body.get("user_id") if isinstance(body, dict) else None
+        if not isinstance(user_id, str):
+            return await forward(request, 0)
+        results = await carts(user_id)
+        err = _error(results)
+        if err is not None:
+            return err
+        shards = [i for i, r in enumerate(results) if r.json()["items"]]
+        if len(shards) <= 1:
+            # cart kosong / satu shard: checkout lokal biasa (Idempotency-Key ikut diteruskan)
+            return await forward(request, shards[0] if shards else 0)
+        return await two_phase_checkout(shards, user_id, body.get("promo_code"))
+
+    async def two_phase_checkout(shards: List[int], user_id: str, promo_code: Optional[str]) -> Response:
+        """
+        Fase 1: prepare di semua shard (kursi divalidasi & dikunci ke txid).
+        Fase 2: semua OK -> commit (booking disimpan di shard pertama / "home"),
+        ada yang gagal (termasuk timeout / koneksi putus) -> abort di semua shard
+        (item kembali ke cart).
+        Commit yang gagal di salah satu shard (mis. shard restart, tx hilang)
+        -> 502 dengan daftar shard yang gagal, bukan body booking.
+        """
+        txid = uuid.uuid4().hex
+        prepared = await asyncio.gather(*(
+            call(i, "POST", "/internal/checkout/prepare", json={"txid": txid, "user_id": user_id})
+            for i in shards), return_exceptions=True)
+        lost = [i for i, r in zip(shards, prepared) if isinstance(r, BaseException)]
+        err = None if lost else _error(prepared)
+        if lost or err is not None:
+            # abort ke SEMUA shard, termasuk yang timeout (bisa saja prepare-nya
+            # sudah jalan); shard yang tetap tak terjangkau dibereskan TTL prepared tx
+            await asyncio.gather(*(
+                call(i, "POST", "/internal/checkout/abort", json={"txid": txid})
+                for i in shards), return_exceptions=True)
+            if lost:
+                return JSONResponse(status_code=502, content={
+                    "detail": "Checkout prepare failed on some shards", "failed_shards": lost})
+            return err
+        items = [item for r in prepared for item in r.json()["items"]]
+        total = sum(r.json()["total"] for r in prepared)
+        booking = crud.build_booking(user_id, items, total, promo_code)
+        committed = await asyncio.gather(*(
+            call(i, "POST", "/internal/checkout/commit",
+                 json={"txid": txid, "booking": booking if i == shards[0] else None})
+            for i in shards), return_exceptions=True)
+        failed = [i for i, r in zip(shards, committed)
+                  if isinstance(r, BaseException) or r.status_code >= 400]
+        if failed:
+            # commit tidak bisa ditarik lagi di shard yang sudah sukses: laporkan
+            # eksplisit (bukan booking sukses) supaya bisa direkonsiliasi
+            return JSONResponse(status_code=502, content={
+                "detail": "Checkout commit failed on some shards",
+                "booking_code": booking["booking_code"], "txid": txid,
+                "failed_shards": failed, "committed_shards": [i for i in shards if i not in failed],
+            })
+        return JSONResponse(booking)
+
+    # ---------- tiket: booking disimpan di shard home ----------
+    @app.get("/tickets/{booking_code}")
+    async def get_ticket(booking_code: str):
+        results = await fan_out("GET", f"/tickets/{booking_code}")
+        for r in results:
+            if r.status_code == 200:
+                return _to_response(r)
+        return _to_response(results[0])
+
+    @app.get("/users/{user_id}/tickets")
+    async def list_tickets(user_id: str, request: Request):
+        return await merged_page(f"/users/{user_id}/tickets", request, _booking_key)
+
+    # ---------- laporan: tiap shard agregat sendiri, router menjumlah per key ----------
+    @app.get("/admin/reports/{kind}")
+    async def report(kind: str, request: Request):
+        params = dict(request.query_params)
+        fmt = params.get("format", "csv")
+        if kind not in ("revenue", "occupancy") or fmt not in reports.FORMATS:
+            return await forward(request, 0)
+        results = await fan_out("GET", f"/admin/reports/{kind}", params={**params, "format": "ndjson"})
+        err = _error(results)
+        if err is not None:
+            return err
+        fields = reports.FIELDS if kind == "revenue" else reports.OCCUPANCY_FIELDS
+        columns, rows = reports.merge((r.text for r in results), fields)
+        return StreamingResponse(reports.encode(rows, columns, fmt), media_type=reports.FORMATS[fmt])
+
+    # ---------- info & fallback ----------
+    @app.get("/admin/shards")
+    async def shard_info():
+        return {"shards": [{"index": i, "url": u} for i, u in enumerate(urls)]}
+
+    # sisanya (katalog movie, studio, metrics, ...) dijawab shard 0, atau shard
+    # tertentu lewat header X-Shard (mis. GET /metrics per shard)
+    @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
+    async def fallback(path: str, request: Request):
+        try:
+            shard = int(request.headers.get("x-shard", 0))
+        except ValueError:
+            shard = 0
+        return await forward(request, shard if 0 <= shard < n else 0)
+
+    return app
+
+
+app = create_app(config.SHARD_URLS or ["http://127.0.0.1:8001"])
+
+
+# =========================
+#    SHARD LOKAL (DEV/TEST)
+# =========================
+def _free_port(host: str) -> int:
+    with socket.socket() as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Shard at {url} exited with code {proc.returncode}")
+        try:
+            if httpx.get(url + "/admin/locks", timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"Shard at {url} did not start within {timeout}s")
+
+
+def start_local_shards(count: int, host: str = "127.0.0.1",
+                       timeout: float = 20.0) -> Tuple[List[str], List[subprocess.Popen]]:
+    """Jalankan `count` proses uvicorn app.main (port bebas). Return (urls, proses)."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    urls: List[str] = []
+    procs: List[subprocess.Popen] = []
+    try:
+        for i in range(count):
+            port = _free_port(host)
+            env = {**os.environ, "MOVIE_BOOKING_SHARD_INDEX": str(i), "MOVIE_BOOKING_SHARD_COUNT": str(count),
+                   "PYTHONPATH": root + os.pathsep + os.environ.get("PYTHONPATH", "")}
+            procs.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--host", host, "--port", str(port),
+                 "--log-level", "warning"], cwd=root, env=env))
+            urls.append(f"http://{host}:{port}")
+        for url, proc in zip(urls, procs):
+            _wait_ready(url, proc, timeout)
+    except BaseException:
+        stop_local_shards(procs)
+        raise
+    return urls, procs
+
+
+def stop_local_shards(procs: List[subprocess.Popen]) -> None:
+    for proc in procs:
+        proc.terminate()
+    for proc in procs:
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    shard_urls, shard_procs = start_local_shards(int(sys.argv[1]) if len(sys.argv) > 1 else 2)
+    print("shards:", ", ".join(shard_urls))
+    try:
+        uvicorn.run(create_app(shard_urls), port=int(os.getenv("PORT", "8000")))
+    finally:
+        stop_local_shards(shard_procs)
@@ -0,0 +1,520 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+from . import storage
+from .schemas import Movie, Showtime, SeatStatus
+from .seatmap import STATUS_CODE, STATUSES, layout_template
+
+# =========================
+#   SQLITE STORAGE BACKEND
+# =========================
+# Backend durable berbasis SQLite, dipilih lewat MOVIE_BOOKING_SQLITE_PATH.
+# Database adalah sumber kebenaran: storage.py mengirim tiap mutasi (record
+# redo yang sama dengan WAL di persistence.py) ke `append`, thread writer
+# menerapkan semua record yang menumpuk dalam SATU transaksi SQLite (group
+# commit), dan storage.commit() menunggu transaksi itu selesai sebelum
+# response dikirim. Storage in-memory tetap melayani baca (SeatMap, index,
+# cache layout / feed bergantung padanya) dan diisi ulang dari database saat
+# start (`open`).
+# Klaim kursi TIDAK lewat journal: crud memanggil reserve_into_cart /
+# reserve_batch_into_cart / finalize_checkout secara sinkron (UPDATE bersyarat)
+# sebelum seat map lokal diubah, jadi beberapa proses yang berbagi satu database
+# tidak bisa menjual kursi yang sama, dan kegagalan database tidak menyisakan
+# perubahan di memori. Record journal untuk kursi tidak pernah menimpa `booked`.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key  TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS movies (
+    id   INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS showtimes (
+    id       INTEGER PRIMARY KEY,
+    movie_id INTEGER NOT NULL,
+    day      TEXT NOT NULL,
+    studio   TEXT NOT NULL,
+    data     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS studios (
+    id   INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_showtimes_movie ON showtimes(movie_id);
+CREATE INDEX IF NOT EXISTS ix_showtimes_day_studio ON showtimes(day, studio);
+CREATE TABLE IF NOT EXISTS seats (
+    showtime_id INTEGER NOT NULL,
+    idx         INTEGER NOT NULL,
+    code        TEXT NOT NULL,
+    status      INTEGER NOT NULL,
+    PRIMARY KEY (showtime_id, code)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cart_items (
+    user_id     TEXT NOT NULL,
+    item_id     TEXT NOT NULL,
+    showtime_id INTEGER NOT NULL,
+    seats       TEXT NOT NULL,
+    PRIMARY KEY (user_id, item_id)
+);
+CREATE TABLE IF NOT EXISTS bookings (
+    code    TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    data    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_bookings_user ON bookings(user_id);
+"""
+
+# statement konstan -> di-compile sekali per koneksi (cache statement sqlite3)
+_RESERVE = (
+    "UPDATE seats SET status = ? "
+    "WHERE showtime_id = ? AND status = ? AND code IN (SELECT value FROM json_each(?))"
+)
+# booked final: record journal (mis. pelepasan dari proses lain yang seat map-nya
+# basi) tidak boleh menurunkannya lagi
+_SET_SEATS = (
+    "UPDATE seats SET status = ? "
+    f"WHERE showtime_id = ? AND status != {STATUS_CODE[SeatStatus.booked]} "
+    "AND code IN (SELECT value FROM json_each(?))"
+)
+_PUT_ITEM = (
+    "INSERT INTO cart_items(user_id, item_id, showtime_id, seats) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(user_id, item_id) DO UPDATE SET showtime_id = excluded.showtime_id, seats = excluded.seats"
+)
+_PUT_BOOKING = "INSERT OR REPLACE INTO bookings(code, user_id, data) VALUES (?, ?, ?)"
+_FIND_BAD = (
+    "SELECT j.value FROM json_each(?) j "
+    "LEFT JOIN seats s ON s.showtime_id = ? AND s.code = j.value "
+    "WHERE s.status IS NULL OR s.status != ? ORDER BY j.key LIMIT 1"
+)
+
+
+class _Rollback(Exception):
+    """Dilempar di dalam `_tx` untuk membatalkan transaksi tanpa error ke pemanggil."""
+
+
+class SQLiteStore:
+    """
+    Storage berbasis SQLite:
+    - journal_mode=WAL: reader tidak memblok writer, aman dipakai beberapa proses
+    - pool koneksi untuk thread pool FastAPI (satu koneksi per request aktif)
+    - reservasi kursi = satu UPDATE bersyarat (bukan baca-lalu-tulis), juga
+      dipakai crud saat store ini jadi journal (`authoritative`)
+    - write batch (executemany, satu transaksi per operasi)
+    - sebagai journal storage.py: append(op, args) -> lsn, wait(lsn) (group commit)
+    """
+
+    # storage.seat_authority(): klaim kursi diputuskan database, bukan seat map proses
+    authoritative = True
+
+    def __init__(self, path: str, pool_size: int = 8):
+        self.path = path
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._all: List[sqlite3.Connection] = []
+        for _ in range(pool_size):
+            conn = self._connect()
+            self._all.append(conn)
+            self._pool.put(conn)
+        with self._conn() as c:
+            c.executescript(_SCHEMA)
+        # journal (terisi setelah open())
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[str, Any]] = []
+        self._lsn = 0
+        self._durable_lsn = 0
+        self._error: BaseException | None = None
+        self._closing = False
+        self._writer: threading.Thread | None = None
+        self.stats = {"records": 0, "commits": 0, "max_batch": 0}
+        self.recovery: Dict[str, float] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None,
+                               timeout=30.0, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    @contextmanager
+    def _conn(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        """Transaksi tulis (BEGIN IMMEDIATE: ambil write lock di awal, hindari upgrade deadlock)."""
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except _Rollback:
+                conn.execute("ROLLBACK")
+                return
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self) -> None:
+        if self._writer is not None:
+            storage.detach_journal()
+            with self._cond:
+                self._closing = True
+                self._cond.notify_all()
+            self._writer.join(timeout=10)
+            self._writer = None
+        for conn in self._all:
+            conn.close()
+
+    # ---------- movie ops ----------
+    def save_movie(self, m: Movie) -> Movie:
+        with self._tx() as c:
+            c.execute("INSERT OR REPLACE INTO movies(id, data) VALUES (?, ?)", (m.id, m.model_dump_json()))
+        return m
+
+    def get_movie(self, movie_id: int) -> Movie | None:
+        with self._conn() as c:
+            row = c.execute("SELECT data FROM movies WHERE id = ?", (movie_id,)).fetchone()
+        return Movie.model_validate_json(row[0]) if row else None
+
+    def list_movies(self) -> List[Movie]:
+        with self._conn() as c:
+            rows = c.execute("SELECT data FROM movies ORDER BY id").fetchall()
+        return [Movie.model_validate_json(r[0]) for r in rows]
+
+    def delete_movie(self, movie_id: int) -> bool:
+        with self._tx() as c:
+            if c.execute("DELETE FROM movies WHERE id = ?", (movie_id,)).rowcount == 0:
+                return False
+            c.execute("DELETE FROM seats WHERE showtime_id IN (SELECT id FROM showtimes WHERE movie_id = ?)",
+                      (movie_id,))
+            c.execute("DELETE FROM showtimes WHERE movie_id = ?", (movie_id,))
+        return True
+
+    # ---------- showtime ops ----------
+    def save_showtime(self, st: Showtime) -> Showtime:
+        with self._tx() as c:
+            self._save_showtime(c, st.model_dump(mode="json"))
+        return st
+
+    def _save_showtime(self, c: sqlite3.Connection, data: dict) -> None:
+        """Simpan showtime + state awal kursi (sama dengan storage: layout studio kalau ada)."""
+        layout = data
+        if data.get("studio_id") is not None:
+            row = c.execute("SELECT data FROM studios WHERE id = ?", (data["studio_id"],)).fetchone()
+            if row is not None:
+                layout = json.loads(row[0])
+        template = layout_template(layout["rows"], layout["cols"], layout.get("aisles_cols"),
+                                   layout.get("vip_seats"), layout.get("disabled_seats"))
+        state = template.new_seat_map().snapshot()
+        sid = data["id"]
+        c.execute("INSERT OR REPLACE INTO showtimes(id, movie_id, day, studio, data) VALUES (?, ?, ?, ?, ?)",
+                  (sid, data["movie_id"], data["day"], data["studio"], json.dumps(data)))
+        c.execute("DELETE FROM seats WHERE showtime_id = ?", (sid,))
+        c.executemany("INSERT INTO seats(showtime_id, idx, code, status) VALUES (?, ?, ?, ?)",
+                      [(sid, i, code, state[i]) for i, code in enumerate(template.index.codes)])
+
+    def get_showtime(self, showtime_id: int) -> Showtime | None:
+        with self._conn() as c:
+            row = c.execute("SELECT data FROM showtimes WHERE id = ?", (showtime_id,)).fetchone()
+        return Showtime.model_validate_json(row[0]) if row else None
+
+    def list_showtimes(self, movie_id: int | None = None, day: str | None = None,
+                       studio: str | None = None) -> List[Showtime]:
+        sql, args = "SELECT data FROM showtimes WHERE 1 = 1", []
+        for col, val in (("movie_id", movie_id), ("day", day), ("studio", studio)):
+            if val is not None:
+                sql += f" AND {col} = ?"
+                args.append(val)
+        with self._conn() as c:
+            rows = c.execute(sql + " ORDER BY id", args).fetchall()
+        return [Showtime.model_validate_json(r[0]) for r in rows]
+
+    def seats_map(self, showtime_id: int) -> Dict[str, SeatStatus] | None:
+        with self._conn() as c:
+            rows = c.execute("SELECT code, status FROM seats WHERE showtime_id = ? ORDER BY idx",
+                             (showtime_id,)).fetchall()
+        return {code: STATUSES[status] for code, status in rows} if rows else None
+
+    # ---------- seat reservation ----------
+    def transition_seats(self, showtime_id: int, seats: List[str],
+                         expect: SeatStatus, to: SeatStatus) -> str | None:
+        """UPDATE bersyarat; kalau jumlah baris berubah != jumlah kursi -> rollback & cari penyebabnya."""
+        bad = None
+        with self._tx() as c:
+            bad = self._transition(c, showtime_id, seats, expect, to)
+            if bad is not None:
+                raise _Rollback
+        return bad
+
+    def _transition(self, c: sqlite3.Connection, showtime_id: int, seats: List[str],
+                    expect: SeatStatus, to: SeatStatus) -> str | None:
+        wanted = list(dict.fromkeys(seats))
+        payload = json.dumps(wanted)
+        c.execute("SAVEPOINT seats")
+        changed = c.execute(_RESERVE, (STATUS_CODE[to], showtime_id, STATUS_CODE[expect], payload)).rowcount
+        if changed != len(wanted):
+            # batalkan update parsial, lalu cari kursi pertama yang tidak `expect`
+            c.execute("ROLLBACK TO seats")
+            row = c.execute(_FIND_BAD, (payload, showtime_id, STATUS_CODE[expect])).fetchone()
+            c.execute("RELEASE seats")
+            return row[0] if row else wanted[0]
+        c.execute("RELEASE seats")
+        return None
+
+    # ---------- cart ops ----------
+    def get_cart(self, user_id: str) -> List[Tuple[str, int, List[str]]]:
+        with self._conn() as c:
+            rows = c.execute("SELECT item_id, showtime_id, seats FROM cart_items WHERE user_id = ? ORDER BY rowid",
+                             (user_id,)).fetchall()
+        return [(cid, sid, json.loads(seats)) for cid, sid, seats in rows]
+
+    def set_cart(self, user_id: str, items: List[Tuple[str, int, List[str]]]) -> None:
+        with self._tx() as c:
+            self._set_cart(c, user_id, items)
+
+    def _set_cart(self, c: sqlite3.Connection, user_id: str, items) -> None:
+        c.execute("DELETE FROM cart_items WHERE user_id = ?", (user_id,))
+        c.executemany(_PUT_ITEM, [(user_id, cid, sid, json.dumps(seats)) for cid, sid, seats in items])
+
+    def reserve_into_cart(self, user_id: str, item: Tuple[str, int, List[str]]) -> str | None:
+        """Reserve kursi + tambah item cart dalam satu transaksi (jalur /cart/add)."""
+        failed = self.reserve_batch_into_cart(user_id, [item])
+        return None if failed is None else failed[1]
+
+    def reserve_batch_into_cart(self, user_id: str,
+                                items: List[Tuple[str, int, List[str]]]) -> Tuple[int, str] | None:
+        """Versi banyak item (jalur /cart/batch): all-or-nothing, return (showtime_id, seat) yang gagal."""
+        self._sync_journal()
+        failed = None
+        with self._tx() as c:
+            for cid, sid, seats in items:
+                bad = self._transition(c, sid, seats, SeatStatus.available, SeatStatus.reserved)
+                if bad is not None:
+                    failed = (sid, bad)
+                    raise _Rollback
+                c.execute(_PUT_ITEM, (user_id, cid, sid, json.dumps(seats)))
+        return failed
+
+    def _sync_journal(self) -> None:
+        """
+        Mode journal: tunggu record proses ini yang masih antre (mis. kursi yang baru
+        dilepas) sampai di database sebelum klaim sinkron. Writer yang sudah mati
+        -> error di sini, sebelum seat map lokal sempat diubah.
+        """
+        if self._writer is not None:
+            self.wait()
+
+    # ---------- bookings ----------
+    def save_booking(self, booking: dict) -> None:
+        with self._tx() as c:
+            c.execute(_PUT_BOOKING, (booking["booking_code"], booking["user_id"], json.dumps(booking)))
+
+    def get_booking(self, booking_code: str) -> dict | None:
+        with self._conn() as c:
+            row = c.execute("SELECT data FROM bookings WHERE code = ?", (booking_code,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_bookings_by_user(self, user_id: str) -> List[dict]:
+        with self._conn() as c:
+            rows = c.execute("SELECT data FROM bookings WHERE user_id = ? ORDER BY rowid", (user_id,)).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def finalize_checkout(self, user_id: str, booking: dict) -> str | None:
+        """
+        Satu transaksi: semua kursi item reserved -> booked, cart dikosongkan,
+        booking disimpan. Item harus masih ada di cart user di database (bisa saja
+        sudah dilepas proses lain). Return seat code yang sudah tidak reserved /
+        bukan milik cart ini (transaksi batal).
+        """
+        self._sync_journal()
+        bad = None
+        with self._tx() as c:
+            for item in booking["items"]:
+                owned = c.execute("SELECT 1 FROM cart_items WHERE user_id = ? AND item_id = ?",
+                                  (user_id, item["id"])).fetchone()
+                bad = item["seats"][0] if owned is None else self._transition(
+                    c, item["showtime_id"], item["seats"], SeatStatus.reserved, SeatStatus.booked)
+                if bad is not None:
+                    raise _Rollback
+            c.execute("DELETE FROM cart_items WHERE user_id = ?", (user_id,))
+            c.execute(_PUT_BOOKING, (booking["booking_code"], user_id, json.dumps(booking)))
+        return bad
+
+    # =========================
+    #   JOURNAL UNTUK storage.py
+    # =========================
+    def open(self) -> "SQLiteStore":
+        """Isi storage in-memory dari database, lalu pasang store ini sebagai journal-nya."""
+        t0 = time.perf_counter()
+        applied = 0
+        for op, args in self.iter_state_records():
+            storage.apply_record(op, args)
+            applied += 1
+        storage.reset_id_counters()
+        self._writer = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._writer.start()
+        storage.attach_journal(self)
+        # dilepas setelah journal terpasang -> ikut tersimpan ke database
+        orphans = storage.release_orphan_reservations()
+        storage.commit()
+        self.recovery = {"records": applied, "orphan_seats_released": orphans,
+                         "seconds": time.perf_counter() - t0}
+        return self
+
+    def iter_state_records(self) -> Iterator[Tuple[str, tuple]]:
+        """Isi database sebagai record redo, urutan sama dengan storage.iter_state_records."""
+        with self._conn() as c:
+            row = c.execute("SELECT data FROM settings WHERE key = 'pricing'").fetchone()
+            if row is not None:
+                yield "save_pricing", (json.loads(row[0]),)
+            for table, op in (("movies", "save_movie"), ("studios", "save_studio"), ("showtimes", "save_showtime")):
+                for (data,) in c.execute(f"SELECT data FROM {table} ORDER BY id"):
+                    yield op, (json.loads(data),)
+            for (sid,) in c.execute("SELECT id FROM showtimes ORDER BY id").fetchall():
+                state = bytes(s for (s,) in c.execute(
+                    "SELECT status FROM seats WHERE showtime_id = ? ORDER BY idx", (sid,)))
+                yield "seat_state", (sid, state.hex())
+            carts: Dict[str, List[Tuple[str, int, List[str]]]] = {}
+            for user_id, cid, sid, seats in c.execute(
+                    "SELECT user_id, item_id, showtime_id, seats FROM cart_items ORDER BY rowid"):
+                carts.setdefault(user_id, []).append((cid, sid, json.loads(seats)))
+            for user_id, items in carts.items():
+                yield "set_cart", (user_id, items)
+            for (data,) in c.execute("SELECT data FROM bookings ORDER BY rowid"):
+                yield "save_booking", (json.loads(data),)
+
+    def append(self, op: str, args) -> int:
+        with self._cond:
+            self._lsn += 1
+            self._pending.append((op, args))
+            self._cond.notify_all()
+            return self._lsn
+
+    def wait(self, lsn: int | None = None) -> None:
+        """Blok sampai record `lsn` (default: semua yang sudah di-append) ter-commit di SQLite."""
+        with self._cond:
+            target = self._lsn if lsn is None else lsn
+            while self._durable_lsn < target:
+                if self._error is not None:
+                    raise RuntimeError("SQLite journal writer failed") from self._error
+                if self._writer is None or not self._writer.is_alive():
+                    raise RuntimeError("SQLite journal is closed")
+                self._cond.wait()
+
+    def _run(self) -> None:
+        conn = self._connect()
+        try:
+            while True:
+                with self._cond:
+                    while not self._pending and not self._closing:
+                        self._cond.wait()
+                    if not self._pending:
+                        return
+                    batch, self._pending = self._pending, []
+                    last = self._lsn
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    for op, args in batch:
+                        _OPS[op](self, conn, *args)
+                    conn.execute("COMMIT")
+                except BaseException as exc:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    with self._cond:
+                        self._error = exc
+                        self._cond.notify_all()
+                    return
+                with self._cond:
+                    self._durable_lsn = last
+                    self.stats["records"] += len(batch)
+                    self.stats["commits"] += 1
+                    self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+                    self._cond.notify_all()
+        finally:
+            conn.close()
+            with self._cond:
+                self._cond.notify_all()
+
+    # ---------- penerapan record redo ke tabel ----------
+    def _op_save_pricing(self, c: sqlite3.Connection, data: dict) -> None:
+        c.execute("INSERT OR REPLACE INTO settings(key, data) VALUES ('pricing', ?)", (json.dumps(data),))
+
+    def _op_save_movie(self, c: sqlite3.Connection, data: dict) -> None:
+        c.execute("INSERT OR REPLACE INTO movies(id, data) VALUES (?, ?)", (data["id"], json.dumps(data)))
+
+    def _op_delete_movie(self, c: sqlite3.Connection, movie_id: int) -> None:
+        c.execute("DELETE FROM seats WHERE showtime_id IN (SELECT id FROM showtimes WHERE movie_id = ?)",
+                  (movie_id,))
+        c.execute("DELETE FROM showtimes WHERE movie_id = ?", (movie_id,))
+        c.execute("DELETE FROM movies WHERE id = ?", (movie_id,))
+
+    def _op_save_studio(self, c: sqlite3.Connection, data: dict) -> None:
+        c.execute("INSERT OR REPLACE INTO studios(id, data) VALUES (?, ?)", (data["id"], json.dumps(data)))
+
+    def _op_delete_studio(self, c: sqlite3.Connection, studio_id: int) -> None:
+        c.execute("DELETE FROM studios WHERE id = ?", (studio_id,))
+
+    def _op_delete_showtime(self, c: sqlite3.Connection, showtime_id: int) -> None:
+        c.execute("DELETE FROM seats WHERE showtime_id = ?", (showtime_id,))
+        c.execute("DELETE FROM showtimes WHERE id = ?", (showtime_id,))
+
+    def _op_set_seats(self, c: sqlite3.Connection, showtime_id: int, seats: List[str], to: str) -> None:
+        c.execute(_SET_SEATS, (STATUS_CODE[SeatStatus(to)], showtime_id, json.dumps(seats)))
+
+    def _op_seat_state(self, c: sqlite3.Connection, showtime_id: int, state_hex: str) -> None:
+        state = bytes.fromhex(state_hex)
+        c.executemany("UPDATE seats SET status = ? WHERE showtime_id = ? AND code = ?",
+                      [(state[i], showtime_id, code) for i, (code,) in enumerate(c.execute(
+                          "SELECT code FROM seats WHERE showtime_id = ? ORDER BY idx", (showtime_id,)).fetchall())])
+
+    def _op_cart_put(self, c: sqlite3.Connection, user_id: str, cart_item_id: str,
+                     showtime_id: int, seats: List[str]) -> None:
+        c.execute(_PUT_ITEM, (user_id, cart_item_id, showtime_id, json.dumps(seats)))
+
+    def _op_cart_drop(self, c: sqlite3.Connection, user_id: str, cart_item_id: str) -> None:
+        c.execute("DELETE FROM cart_items WHERE user_id = ? AND item_id = ?", (user_id, cart_item_id))
+
+    def _op_save_booking(self, c: sqlite3.Connection, booking: dict) -> None:
+        c.execute(_PUT_BOOKING, (booking["booking_code"], booking["user_id"], json.dumps(booking)))
+
+    def _op_checkout(self, c: sqlite3.Connection, user_id: str, booking: dict) -> None:
+        booked = STATUS_CODE[SeatStatus.booked]
+        c.executemany(_SET_SEATS, [(booked, item["showtime_id"], json.dumps(item["seats"]))
+                                   for item in booking["items"]])
+        c.execute("DELETE FROM cart_items WHERE user_id = ?", (user_id,))
+        c.execute(_PUT_BOOKING, (booking["booking_code"], user_id, json.dumps(booking)))
+
+    def _op_commit_tx(self, c: sqlite3.Connection, user_id: str, items, booking: dict | None) -> None:
+        booked = STATUS_CODE[SeatStatus.booked]
+        c.executemany(_SET_SEATS, [(booked, sid, json.dumps(seats)) for _, sid, seats in items])
+        if booking is not None:
+            c.execute(_PUT_BOOKING, (booking["booking_code"], user_id, json.dumps(booking)))
+
+
+_OPS: Dict[str, Any] = {
+    "save_pricing": SQLiteStore._op_save_pricing,
+    "save_movie": SQLiteStore._op_save_movie,
+    "delete_movie": SQLiteStore._op_delete_movie,
+    "save_studio": SQLiteStore._op_save_studio,
+    "delete_studio": SQLiteStore._op_delete_studio,
+    "save_showtime": SQLiteStore._save_showtime,
+    "delete_showtime": SQLiteStore._op_delete_showtime,
+    "set_seats": SQLiteStore._op_set_seats,
+    "seat_state": SQLiteStore._op_seat_state,
+    "set_cart": SQLiteStore._set_cart,
+    "cart_put": SQLiteStore._op_cart_put,
+    "cart_drop": SQLiteStore._op_cart_drop,
+    "save_booking": SQLiteStore._op_save_booking,
+    "checkout": SQLiteStore._op_checkout,
+    "commit_tx": SQLiteStore._op_commit_tx,
+}
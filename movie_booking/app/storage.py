@@ -1,89 +1,688 @@
-from typing import Dict, List, Set, Tuple
-from .schemas import Movie, Showtime, SeatStatus
-from .utils import seat_codes
+from typing import Any, Callable, Dict, Iterator, List, Set, Tuple
+from .schemas import Movie, PricingRules, Showtime, SeatStatus, Studio
+from .seatmap import LayoutTemplate, SeatMap, layout_template
+from .locks import ContendedLock, LockGroup, summarize
+from .paging import Key, SortedIndex, page, upper
+from . import admission, config, fastjson, layout_cache, metrics, pricing, reports, search, seatfinder
 import itertools
 
 # ---------- penyimpanan in-memory ----------
 _movies: Dict[int, Movie] = {}
 _showtimes: Dict[int, Showtime] = {}
-_seats_status: Dict[int, Dict[str, SeatStatus]] = {}        # showtime_id -> seat_code -> status
+_seats_status: Dict[int, SeatMap] = {}                      # showtime_id -> SeatMap (seat_code -> status)
 _booked_seats: Dict[int, Set[str]] = {}
-_carts: Dict[str, List[Tuple[str, int, List[str]]]] = {}    # user_id -> [(cart_item_id, showtime_id, seats)]
+_carts: Dict[str, Dict[str, Tuple[int, List[str]]]] = {}    # user_id -> {cart_item_id: (showtime_id, seats)}
 
-# metadata layout per showtime
-_showtime_meta: Dict[int, Dict] = {}  # id -> {"aisles": List[int], "vip": set(), "disabled": set()}
+# metadata layout per showtime: LayoutTemplate immutable yang di-intern
+# (aisles/vip/disabled/seat_type dipakai bersama oleh showtime dengan layout sama)
+_showtime_meta: Dict[int, LayoutTemplate] = {}
+
+# studio terdaftar: layout di-intern sekali, showtime merujuk lewat studio_id
+_studios: Dict[int, Studio] = {}
+_studio_templates: Dict[int, LayoutTemplate] = {}               # studio_id -> LayoutTemplate
+
+# ---------- secondary index (di-update tiap save/delete) ----------
+# dict dengan value None dipakai sebagai ordered set (urut insert)
+_showtimes_by_movie: Dict[int, Dict[int, None]] = {}    # movie_id -> showtime ids
+_showtimes_by_day: Dict[str, Dict[int, None]] = {}      # day -> showtime ids
+_showtimes_by_studio: Dict[str, Dict[int, None]] = {}   # studio -> showtime ids
+_showtimes_by_studio_id: Dict[int, Dict[int, None]] = {}  # studio_id -> showtime ids
+_bookings_by_user: Dict[str, List[str]] = {}            # user_id -> booking codes
+_seat_owner: Dict[Tuple[int, str], Tuple[str, str]] = {}  # (showtime_id, seat) -> (user_id, cart_item_id)
+_cart_showtimes: Dict[str, Dict[int, int]] = {}         # user_id -> {showtime_id: jumlah item}
+
+# ---------- sorted index untuk listing berhalaman (cursor) ----------
+_movie_order = SortedIndex()                # None / genre / rating -> [(id,)]
+_movie_order_by_genre = SortedIndex()
+_movie_order_by_rating = SortedIndex()
+_showtime_order = SortedIndex()             # None / movie_id / studio -> [(day, time, id)]
+_showtime_order_by_movie = SortedIndex()
+_showtime_order_by_studio = SortedIndex()
+_booking_order_by_user = SortedIndex()      # user_id -> [(timestamp, booking_code)]
+
+def _index_add(index: Dict, key, item_id) -> None:
+    index.setdefault(key, {})[item_id] = None
+
+def _index_remove(index: Dict, key, item_id) -> None:
+    bucket = index.get(key)
+    if bucket is not None:
+        bucket.pop(item_id, None)
+        if not bucket:
+            del index[key]
+
+# ---------- journal (durability, opsional) ----------
+# Kalau ada journal terpasang (lihat persistence.py), tiap mutasi dicatat sebagai
+# record redo (op, args) yang idempotent: replay berurutan menghasilkan state yang sama.
+_journal = None
+
+def attach_journal(journal) -> None:
+    """Pasang journal: objek dengan append(op, args) -> lsn dan wait(lsn)."""
+    global _journal
+    _journal = journal
+
+def detach_journal() -> None:
+    global _journal
+    _journal = None
+
+def has_journal() -> bool:
+    return _journal is not None
+
+def seat_authority():
+    """
+    Journal yang juga memutuskan klaim kursi secara sinkron (SQLiteStore: satu
+    database dipakai beberapa proses), atau None kalau seat map proses ini
+    satu-satunya sumber kebenaran (in-memory / WAL).
+    """
+    return _journal if getattr(_journal, "authoritative", False) else None
+
+def _record(op: str, *args) -> None:
+    if _journal is not None:
+        _journal.append(op, args)
+
+@metrics.timed(metrics.storage_seconds, "commit")
+def commit() -> None:
+    """Tunggu semua mutasi yang sudah dicatat durable (group commit). No-op tanpa journal."""
+    if _journal is not None:
+        _journal.wait()
 
 # ---------- id generator ----------
+# mode sharded: shard k hanya membagikan showtime id dengan (id - 1) % SHARD_COUNT == k,
+# jadi router bisa menentukan pemilik showtime dari id-nya saja
 _movie_id_counter = itertools.count(1)
-_showtime_id_counter = itertools.count(1)
+_showtime_id_counter = itertools.count(config.SHARD_INDEX + 1, config.SHARD_COUNT)
+_studio_id_counter = itertools.count(1)
 def next_movie_id() -> int: return next(_movie_id_counter)
 def next_showtime_id() -> int: return next(_showtime_id_counter)
+def next_studio_id() -> int: return next(_studio_id_counter)
 
 # ---------- movie ops ----------
+def _index_movie(m: Movie) -> None:
+    key = (m.id,)
+    _movie_order.add(None, key)
+    if m.genre is not None:
+        _movie_order_by_genre.add(m.genre, key)
+    if m.rating is not None:
+        _movie_order_by_rating.add(m.rating, key)
+    search.index.add(m)
+
+def _unindex_movie(m: Movie) -> None:
+    key = (m.id,)
+    _movie_order.remove(None, key)
+    _movie_order_by_genre.remove(m.genre, key)
+    _movie_order_by_rating.remove(m.rating, key)
+    search.index.remove(m.id)
+
 def save_movie(m: Movie) -> Movie:
+    old = _movies.get(m.id)
+    if old is not None:
+        _unindex_movie(old)
     _movies[m.id] = m
+    _index_movie(m)
+    if _journal is not None:
+        _record("save_movie", m.model_dump())
     return m
 
 def get_movie(movie_id: int) -> Movie | None: return _movies.get(movie_id)
 def list_movies() -> List[Movie]: return list(_movies.values())
 
+def page_movies(limit: int, after: Key | None = None, genre: str | None = None,
+                rating: str | None = None) -> Tuple[List[Movie], Key | None]:
+    """Satu halaman movie urut id, difilter genre/rating lewat index."""
+    candidates = [(_movie_order.keys(), None)]
+    if genre is not None:
+        candidates.append((_movie_order_by_genre.keys(genre), ("genre", genre)))
+    if rating is not None:
+        candidates.append((_movie_order_by_rating.keys(rating), ("rating", rating)))
+    if len(candidates) > 1:
+        candidates.pop(0)
+    candidates.sort(key=lambda c: len(c[0]))
+    keys = candidates[0][0]
+    checks = [c[1] for c in candidates[1:]]
+
+    def match(key: Key) -> bool:
+        m = _movies.get(key[0])
+        return m is not None and all(getattr(m, f) == v for f, v in checks)
+
+    found, last = page(keys, limit, after, match=match if checks else None)
+    return [m for m in (_movies.get(k[0]) for k in found) if m is not None], last
+
 def delete_movie(movie_id: int) -> bool:
     if movie_id not in _movies:
         return False
-    for sid, st in list(_showtimes.items()):
-        if st.movie_id == movie_id:
-            _showtimes.pop(sid, None)
-            _seats_status.pop(sid, None)
-            _booked_seats.pop(sid, None)
-            _showtime_meta.pop(sid, None)
-    _movies.pop(movie_id, None)
+    for sid in list(_showtimes_by_movie.get(movie_id, ())):
+        _drop_showtime(sid)
+    _unindex_movie(_movies.pop(movie_id))
+    _record("delete_movie", movie_id)
+    return True
+
+# ---------- pricing rules ----------
+def save_pricing(rules: PricingRules) -> PricingRules:
+    """Compile & pasang rules harga baru (quote lama otomatis tidak terpakai)."""
+    pricing.set_rules(rules)
+    _record("save_pricing", rules.model_dump())
+    return rules
+
+def get_pricing() -> PricingRules: return pricing.engine().rules
+
+# ---------- studio ops ----------
+def save_studio(studio: Studio) -> Studio:
+    _studios[studio.id] = studio
+    _studio_templates[studio.id] = layout_template(
+        studio.rows, studio.cols, studio.aisles_cols, studio.vip_seats, studio.disabled_seats)
+    if _journal is not None:
+        _record("save_studio", studio.model_dump(mode="json"))
+    return studio
+
+def get_studio(studio_id: int) -> Studio | None: return _studios.get(studio_id)
+def studio_template(studio_id: int) -> LayoutTemplate | None: return _studio_templates.get(studio_id)
+def list_studios() -> List[Studio]: return list(_studios.values())
+def studio_in_use(studio_id: int) -> bool: return bool(_showtimes_by_studio_id.get(studio_id))
+
+def delete_studio(studio_id: int) -> bool:
+    if _studios.pop(studio_id, None) is None:
+        return False
+    _studio_templates.pop(studio_id, None)
+    _record("delete_studio", studio_id)
     return True
 
 # ---------- showtime ops ----------
-def save_showtime(st: Showtime) -> Showtime:
-    _showtimes[st.id] = st
+def _index_showtime(st: Showtime) -> None:
+    _index_add(_showtimes_by_movie, st.movie_id, st.id)
+    _index_add(_showtimes_by_day, st.day, st.id)
+    _index_add(_showtimes_by_studio, st.studio, st.id)
+    if st.studio_id is not None:
+        _index_add(_showtimes_by_studio_id, st.studio_id, st.id)
+    key = _showtime_key(st)
+    _showtime_order.add(None, key)
+    _showtime_order_by_movie.add(st.movie_id, key)
+    _showtime_order_by_studio.add(st.studio, key)
 
-    # init seat map (default available)
-    seat_map = {code: SeatStatus.available for code in seat_codes(st.rows, st.cols)}
+def _unindex_showtime(st: Showtime) -> None:
+    _index_remove(_showtimes_by_movie, st.movie_id, st.id)
+    _index_remove(_showtimes_by_day, st.day, st.id)
+    _index_remove(_showtimes_by_studio, st.studio, st.id)
+    if st.studio_id is not None:
+        _index_remove(_showtimes_by_studio_id, st.studio_id, st.id)
+    key = _showtime_key(st)
+    _showtime_order.remove(None, key)
+    _showtime_order_by_movie.remove(st.movie_id, key)
+    _showtime_order_by_studio.remove(st.studio, key)
 
-    # metadata: aisles/vip/disabled
-    aisles = list(st.aisles_cols or [])
-    vip = set(st.vip_seats or [])
-    disabled = set(st.disabled_seats or [])
+def _showtime_key(st: Showtime) -> Key:
+    return (st.day, st.time, st.id)
 
-    # tandai kursi disabled sebagai blocked
-    for code in disabled:
-        if code in seat_map:
-            seat_map[code] = SeatStatus.blocked
+@metrics.timed(metrics.storage_seconds, "save_showtime")
+def save_showtime(st: Showtime, template: LayoutTemplate | None = None) -> Showtime:
+    """
+    Simpan showtime + seat map baru. `template` boleh diberikan oleh pemanggil yang
+    sudah punya (mis. bulk scheduling) supaya tidak perlu lookup intern lagi.
+    """
+    old = _showtimes.get(st.id)
+    if old is not None:
+        _unindex_showtime(old)
+        pricing.invalidate(st.id)
+    _showtimes[st.id] = st
+    _index_showtime(st)
+
+    # metadata aisles/vip/disabled dipakai bersama; kursi disabled sudah blocked di state awal
+    if template is None and st.studio_id is not None:
+        template = _studio_templates.get(st.studio_id)
+    if template is None:
+        template = layout_template(st.rows, st.cols, st.aisles_cols, st.vip_seats, st.disabled_seats)
 
-    _seats_status[st.id] = seat_map
+    _seats_status[st.id] = template.new_seat_map()
     _booked_seats[st.id] = set()
-    _showtime_meta[st.id] = {"aisles": aisles, "vip": vip, "disabled": disabled}
+    _showtime_meta[st.id] = template
+    if _journal is not None:
+        _record("save_showtime", st.model_dump(mode="json"))
     return st
 
-def list_showtimes(movie_id: int | None = None) -> List[Showtime]:
-    sts = list(_showtimes.values())
-    return [s for s in sts if movie_id is None or s.movie_id == movie_id]
+def _drop_showtime(showtime_id: int) -> bool:
+    st = _showtimes.pop(showtime_id, None)
+    if st is None:
+        return False
+    _unindex_showtime(st)
+    layout_cache.invalidate(showtime_id)
+    seatfinder.invalidate(showtime_id)
+    fastjson.invalidate(showtime_id)
+    admission.close_room(showtime_id)
+    pricing.invalidate(showtime_id)
+    _seats_status.pop(showtime_id, None)
+    _booked_seats.pop(showtime_id, None)
+    _showtime_meta.pop(showtime_id, None)
+    return True
+
+def delete_showtime(showtime_id: int) -> bool:
+    if not _drop_showtime(showtime_id):
+        return False
+    _record("delete_showtime", showtime_id)
+    return True
+
+@metrics.timed(metrics.storage_seconds, "list_showtimes")
+def list_showtimes(movie_id: int | None = None, day: str | None = None,
+                   studio: str | None = None) -> List[Showtime]:
+    """List showtime, difilter lewat secondary index -> O(jumlah hasil)."""
+    buckets = []
+    if movie_id is not None:
+        buckets.append(_showtimes_by_movie.get(movie_id, {}))
+    if day is not None:
+        buckets.append(_showtimes_by_day.get(day, {}))
+    if studio is not None:
+        buckets.append(_showtimes_by_studio.get(studio, {}))
+    if not buckets:
+        return list(_showtimes.values())
+    # iterasi bucket terkecil, cek keanggotaan di bucket lain
+    buckets.sort(key=len)
+    smallest, rest = buckets[0], buckets[1:]
+    return [_showtimes[sid] for sid in list(smallest) if all(sid in b for b in rest)]
+
+def page_showtimes(limit: int, after: Key | None = None, movie_id: int | None = None,
+                   studio: str | None = None, day_from: str | None = None,
+                   day_to: str | None = None) -> Tuple[List[Showtime], Key | None]:
+    """
+    Satu halaman showtime urut (day, time, id). Range hari lewat bisect; filter
+    equality memakai index terkecil, sisanya dicek per item.
+    Return (showtimes, key terakhir untuk cursor berikutnya atau None).
+    """
+    candidates = [(_showtime_order.keys(), None)]
+    if movie_id is not None:
+        candidates.append((_showtime_order_by_movie.keys(movie_id), ("movie_id", movie_id)))
+    if studio is not None:
+        candidates.append((_showtime_order_by_studio.keys(studio), ("studio", studio)))
+    if len(candidates) > 1:
+        candidates.pop(0)
+    candidates.sort(key=lambda c: len(c[0]))
+    keys = candidates[0][0]
+    checks = [c[1] for c in candidates[1:]]
+
+    def match(key: Key) -> bool:
+        st = _showtimes.get(key[-1])
+        return st is not None and all(getattr(st, f) == v for f, v in checks)
+
+    found, last = page(keys, limit, after,
+                       lo=(day_from,) if day_from else None,
+                       hi=(upper(day_to),) if day_to else None,
+                       match=match if checks else None)
+    items = [st for st in (_showtimes.get(k[-1]) for k in found) if st is not None]
+    return items, last
 
 def get_showtime(showtime_id: int) -> Showtime | None: return _showtimes.get(showtime_id)
-def seats_map(showtime_id: int): return _seats_status.get(showtime_id)
-def showtime_meta(showtime_id: int): return _showtime_meta.get(showtime_id)
+def seats_map(showtime_id: int) -> SeatMap | None: return _seats_status.get(showtime_id)
+def showtime_meta(showtime_id: int) -> LayoutTemplate | None: return _showtime_meta.get(showtime_id)
+
+# ---------- seat reservation (atomik per showtime) ----------
+@metrics.timed(metrics.storage_seconds, "transition_seats")
+def transition_seats(showtime_id: int, seats: List[str], expect: SeatStatus, to: SeatStatus,
+                     claim: Callable[[], str | None] | None = None) -> str | None:
+    """
+    Ubah status batch kursi secara atomik (expect -> to) di bawah lock showtime.
+    `claim` (opsional) dipanggil setelah cek lokal lolos, sebelum seat map diubah;
+    kalau ia mengembalikan seat code, transisi batal (mis. kursi sudah diambil
+    proses lain di database yang sama).
+    Return seat code pertama yang gagal (None kalau sukses semua).
+    """
+    sm = _seats_status[showtime_id]
+    with sm.lock:
+        bad = sm.check(seats, expect)
+        if bad is None and claim is not None:
+            bad = claim()
+        if bad is None:
+            sm.apply(seats, to)
+            _record("set_seats", showtime_id, list(seats), to.value)
+    if bad is None:
+        metrics.seat_transitions.inc(len(seats), expect.value, to.value)
+    return bad
+
+@metrics.timed(metrics.storage_seconds, "transition_seats_batch")
+def transition_seats_batch(groups: List[Tuple[int, List[str]]], expect: SeatStatus, to: SeatStatus,
+                           claim: Callable[[], Tuple[int, str] | None] | None = None) -> Tuple[int, str] | None:
+    """
+    Versi banyak showtime dari `transition_seats`: semua lock showtime diambil
+    sekali (urut id), semua kursi dicek dulu (lalu `claim`), baru semuanya diubah.
+    Return (showtime_id, seat code) pertama yang gagal -> tidak ada yang berubah.
+    """
+    with showtime_locks(sid for sid, _ in groups):
+        for sid, seats in groups:
+            bad = _seats_status[sid].check(seats, expect)
+            if bad is not None:
+                return sid, bad
+        if claim is not None:
+            failed = claim()
+            if failed is not None:
+                return failed
+        for sid, seats in groups:
+            _seats_status[sid].apply(seats, to)
+            _record("set_seats", sid, list(seats), to.value)
+    metrics.seat_transitions.inc(sum(len(seats) for _, seats in groups), expect.value, to.value)
+    return None
+
+def occupancy(showtime_id: int) -> Dict[str, int] | None:
+    """Jumlah kursi per status (counter seat map, O(1)); None kalau showtime tidak ada."""
+    sm = _seats_status.get(showtime_id)
+    if sm is None:
+        return None
+    with sm.lock:
+        return sm.counts()
+
+def showtime_locks(showtime_ids) -> LockGroup:
+    """Lock beberapa showtime sekaligus, selalu urut showtime_id (anti deadlock)."""
+    return LockGroup(_seats_status[sid].lock for sid in sorted(set(showtime_ids)))
 
 # ---------- cart ops ----------
-def get_cart(user_id: str) -> List[tuple[str, int, List[str]]]:
-    return _carts.get(user_id, [])
+# lock striping: satu lock untuk sekelompok user, bukan satu lock per user
+_CART_LOCK_STRIPES = 64
+_cart_locks: List[ContendedLock] = [ContendedLock() for _ in range(_CART_LOCK_STRIPES)]
+
+def cart_lock(user_id: str) -> ContendedLock:
+    return _cart_locks[hash(user_id) % _CART_LOCK_STRIPES]
+
+# Cart = dict per user (cart_item_id -> item) + index kepemilikan kursi global,
+# jadi tambah/hapus item, hapus sebagian kursi, dan "siapa yang memegang kursi
+# ini" sebanding jumlah kursi yang disentuh, bukan ukuran cart. Journal mencatat
+# per item (cart_put / cart_drop), bukan seluruh cart.
+CartItemTuple = Tuple[str, int, List[str]]
+
+def _put_item(user_id: str, cart_item_id: str, showtime_id: int, seats: List[str]) -> None:
+    items = _carts.setdefault(user_id, {})
+    counts = _cart_showtimes.setdefault(user_id, {})
+    old = items.get(cart_item_id)
+    if old is not None:
+        # ganti isi item di tempat (urutan cart tetap)
+        _unown(user_id, old[0], old[1])
+        _uncount(counts, old[0])
+    counts[showtime_id] = counts.get(showtime_id, 0) + 1
+    items[cart_item_id] = (showtime_id, seats)
+    for code in seats:
+        _seat_owner[(showtime_id, code)] = (user_id, cart_item_id)
+
+def _unown(user_id: str, showtime_id: int, seats: List[str]) -> None:
+    for code in seats:
+        if _seat_owner.get((showtime_id, code), (None,))[0] == user_id:
+            del _seat_owner[(showtime_id, code)]
+
+def _uncount(counts: Dict[int, int], showtime_id: int) -> None:
+    counts[showtime_id] -= 1
+    if not counts[showtime_id]:
+        del counts[showtime_id]
+
+def _drop_item(user_id: str, cart_item_id: str) -> Tuple[int, List[str]] | None:
+    items = _carts.get(user_id)
+    item = items.pop(cart_item_id, None) if items else None
+    if item is None:
+        return None
+    showtime_id, seats = item
+    _unown(user_id, showtime_id, seats)
+    _uncount(_cart_showtimes[user_id], showtime_id)
+    if not items:
+        del _carts[user_id]
+        _cart_showtimes.pop(user_id, None)
+    return item
+
+def _clear_cart(user_id: str) -> None:
+    for cart_item_id in list(_carts.get(user_id, ())):
+        _drop_item(user_id, cart_item_id)
+
+def _set_cart(user_id: str, items: List[CartItemTuple]) -> None:
+    _clear_cart(user_id)
+    for cart_item_id, showtime_id, seats in items:
+        _put_item(user_id, cart_item_id, showtime_id, list(seats))
+
+def get_cart(user_id: str) -> List[CartItemTuple]:
+    return [(cid, sid, seats) for cid, (sid, seats) in _carts.get(user_id, {}).items()]
 
-def set_cart(user_id: str, items: List[tuple[str, int, List[str]]]) -> None:
-    _carts[user_id] = items
+def get_cart_item(user_id: str, cart_item_id: str) -> Tuple[int, List[str]] | None:
+    return _carts.get(user_id, {}).get(cart_item_id)
+
+def cart_showtimes(user_id: str) -> List[int]:
+    """Showtime yang ada di cart user (tanpa menelusuri item)."""
+    return list(_cart_showtimes.get(user_id, ()))
+
+def list_carts() -> List[Tuple[str, List[CartItemTuple]]]:
+    return [(u, get_cart(u)) for u in list(_carts)]
+
+def seat_holder(showtime_id: int, seat: str) -> Tuple[str, str] | None:
+    """(user_id, cart_item_id) yang sedang memegang kursi reserved ini."""
+    return _seat_owner.get((showtime_id, seat))
+
+def put_cart_item(user_id: str, cart_item_id: str, showtime_id: int, seats: List[str]) -> None:
+    """Tambah / ganti satu item cart. Pemanggil wajib memegang cart lock."""
+    _put_item(user_id, cart_item_id, showtime_id, seats)
+    _record("cart_put", user_id, cart_item_id, showtime_id, seats)
+
+def drop_cart_item(user_id: str, cart_item_id: str) -> Tuple[int, List[str]] | None:
+    """Hapus satu item cart; return (showtime_id, seats) atau None. Pemanggil memegang cart lock."""
+    item = _drop_item(user_id, cart_item_id)
+    if item is not None:
+        _record("cart_drop", user_id, cart_item_id)
+    return item
+
+def remove_cart_seats(user_id: str, seats: List[str]) -> List[Tuple[str, int, List[str], bool]]:
+    """
+    Lepas kursi tertentu dari item mana pun milik user (lewat index kepemilikan).
+    Return [(cart_item_id, showtime_id, kursi dilepas, item jadi kosong)].
+    Pemanggil wajib memegang cart lock.
+    """
+    wanted = set(seats)
+    hit: Dict[str, List[str]] = {}
+    for sid in _cart_showtimes.get(user_id, ()):
+        for code in wanted:
+            owner = _seat_owner.get((sid, code))
+            if owner is not None and owner[0] == user_id:
+                hit.setdefault(owner[1], []).append(code)
+    out = []
+    for cart_item_id, removed in hit.items():
+        sid, item_seats = _carts[user_id][cart_item_id]
+        gone = set(removed)
+        keep = [s for s in item_seats if s not in gone]
+        if keep:
+            put_cart_item(user_id, cart_item_id, sid, keep)
+        else:
+            drop_cart_item(user_id, cart_item_id)
+        out.append((cart_item_id, sid, [s for s in item_seats if s in gone], not keep))
+    return out
+
+def clear_cart(user_id: str) -> None:
+    _clear_cart(user_id)
+    _record("set_cart", user_id, [])
+
+def set_cart(user_id: str, items: List[CartItemTuple]) -> None:
+    """Ganti seluruh isi cart (dipakai recovery/2PC abort). Pemanggil memegang cart lock."""
+    _set_cart(user_id, items)
+    _record("set_cart", user_id, items)
 
 # --- BOOKINGS (NEW) ---
 _bookings: Dict[str, dict] = {}
+_booking_log: List[str] = []        # booking codes urut simpan (append-only, untuk scan laporan)
+
+def _index_booking(user_id: str, booking: dict) -> None:
+    code = booking["booking_code"]
+    _bookings_by_user.setdefault(user_id, []).append(code)
+    _booking_order_by_user.add(user_id, (booking.get("timestamp", ""), code))
+    _booking_log.append(code)
+    reports.totals.add(booking)
 
 def save_booking(booking: dict) -> None:
-    _bookings[booking["booking_code"]] = booking
+    code = booking["booking_code"]
+    if code not in _bookings:
+        _index_booking(booking["user_id"], booking)
+    _bookings[code] = booking
+    _record("save_booking", booking)
 
 def get_booking(booking_code: str) -> dict | None:
     return _bookings.get(booking_code)
 
+def booking_chunk(start: int, size: int) -> List[dict]:
+    """Booking ke-start .. start+size (urut simpan). Slice list saja, tanpa lock."""
+    return [_bookings[code] for code in _booking_log[start:start + size]]
+
+@metrics.timed(metrics.storage_seconds, "list_bookings_by_user")
 def list_bookings_by_user(user_id: str) -> List[dict]:
-    return [b for b in _bookings.values() if b.get("user_id") == user_id]
+    return [_bookings[code] for code in _bookings_by_user.get(user_id, ())]
+
+def page_bookings_by_user(user_id: str, limit: int, after: Key | None = None,
+                          date_from: str | None = None,
+                          date_to: str | None = None) -> Tuple[List[dict], Key | None]:
+    """Satu halaman tiket user urut waktu checkout; date_from/date_to = YYYY-MM-DD (inklusif)."""
+    found, last = page(_booking_order_by_user.keys(user_id), limit, after,
+                       lo=(date_from,) if date_from else None,
+                       hi=(upper(date_to),) if date_to else None)
+    return [_bookings[code] for _, code in found], last
+
+# ---------- checkout ----------
+def _finalize_checkout(user_id: str, booking: dict) -> None:
+    for item in booking["items"]:
+        sm = _seats_status.get(item["showtime_id"])
+        if sm is not None:
+            sm.apply(item["seats"], SeatStatus.booked)
+    _clear_cart(user_id)
+    code = booking["booking_code"]
+    if code not in _bookings:
+        _index_booking(user_id, booking)
+    _bookings[code] = booking
+
+@metrics.timed(metrics.storage_seconds, "finalize_checkout")
+def finalize_checkout(user_id: str, booking: dict) -> None:
+    """
+    Kursi item booking -> booked, cart user dikosongkan, booking disimpan.
+    Dicatat sebagai SATU record journal supaya recovery tidak pernah melihat
+    setengah checkout. Pemanggil wajib memegang cart lock & lock semua showtime.
+    """
+    _finalize_checkout(user_id, booking)
+    _record("checkout", user_id, booking)
+    seats = sum(len(item["seats"]) for item in booking["items"])
+    metrics.seat_transitions.inc(seats, SeatStatus.reserved.value, SeatStatus.booked.value)
+
+# ---------- two-phase checkout (mode sharded, peran participant) ----------
+# prepare: item cart dipindah ke transaksi (kursi tetap reserved); commit: kursi ->
+# booked (+ booking disimpan di shard "home"); abort: item kembali ke cart.
+# Transaksi prepared hanya ada di memori: kalau shard restart, kursinya jadi orphan
+# dan dilepas saat recovery (setara abort). Yang tak pernah di-commit/abort (router
+# crash di antara fase) di-abort sweeper setelah `deadline`.
+_prepared: Dict[str, Tuple[str, List[Tuple[str, int, List[str]]], float]] = {}   # txid -> (user_id, items, deadline)
+
+def prepare_tx(txid: str, user_id: str, items: List[Tuple[str, int, List[str]]], deadline: float) -> None:
+    _prepared[txid] = (user_id, items, deadline)
+
+def pop_tx(txid: str) -> Tuple[str, List[Tuple[str, int, List[str]]]] | None:
+    tx = _prepared.pop(txid, None)
+    return None if tx is None else tx[:2]
+
+def expired_txs(at: float) -> List[str]:
+    """txid transaksi prepared yang deadline-nya sudah lewat."""
+    return [txid for txid, (_, _, deadline) in list(_prepared.items()) if deadline <= at]
+
+def _commit_tx(user_id: str, items: List[Tuple[str, int, List[str]]], booking: dict | None) -> None:
+    for _, sid, seats in items:
+        sm = _seats_status.get(sid)
+        if sm is not None:
+            sm.apply(seats, SeatStatus.booked)
+    if booking is not None:
+        if booking["booking_code"] not in _bookings:
+            _index_booking(user_id, booking)
+        _bookings[booking["booking_code"]] = booking
+
+@metrics.timed(metrics.storage_seconds, "commit_tx")
+def commit_tx(user_id: str, items: List[Tuple[str, int, List[str]]], booking: dict | None) -> None:
+    """Leg commit 2PC dalam satu record journal. Pemanggil wajib memegang lock showtime item."""
+    _commit_tx(user_id, items, booking)
+    _record("commit_tx", user_id, items, booking)
+    seats = sum(len(seat_list) for _, _, seat_list in items)
+    metrics.seat_transitions.inc(seats, SeatStatus.reserved.value, SeatStatus.booked.value)
+
+# ---------- lock stats ----------
+def lock_stats() -> Dict[str, Dict[str, float]]:
+    return {
+        "showtimes": summarize(sm.lock for sm in list(_seats_status.values())),
+        "carts": summarize(_cart_locks),
+    }
+
+metrics.CallbackMetric(
+    "lock_wait_seconds_total", "Total waktu menunggu lock yang sedang dipegang thread lain.", ("lock",),
+    lambda: {(kind,): v["wait_ms_total"] / 1e3 for kind, v in lock_stats().items()}, kind="counter")
+metrics.CallbackMetric(
+    "lock_contended_total", "Jumlah acquire lock yang harus menunggu.", ("lock",),
+    lambda: {(kind,): v["contended"] for kind, v in lock_stats().items()}, kind="counter")
+
+
+# ---------- snapshot & replay (dipakai persistence.py) ----------
+def iter_state_records() -> Iterator[Tuple[str, tuple]]:
+    """
+    Seluruh state sebagai record redo (format sama dengan journal), urut sesuai
+    dependensi: pricing -> movie -> studio -> showtime -> seat state -> cart -> booking.
+    State tiap showtime dibaca di bawah lock-nya supaya konsisten per showtime.
+    """
+    yield "save_pricing", (get_pricing().model_dump(),)
+    for m in list(_movies.values()):
+        yield "save_movie", (m.model_dump(),)
+    for studio in list(_studios.values()):
+        yield "save_studio", (studio.model_dump(mode="json"),)
+    for st in list(_showtimes.values()):
+        yield "save_showtime", (st.model_dump(mode="json"),)
+    for sid, sm in list(_seats_status.items()):
+        with sm.lock:
+            state = sm.snapshot()
+        yield "seat_state", (sid, state.hex())
+    for user_id, items in list_carts():
+        yield "set_cart", (user_id, items)
+    for b in list(_bookings.values()):
+        yield "save_booking", (b,)
+
+def _apply_seat_state(showtime_id: int, state_hex: str) -> None:
+    sm = _seats_status.get(showtime_id)
+    if sm is not None:
+        with sm.lock:
+            sm.restore(bytes.fromhex(state_hex))
+
+def _apply_set_seats(showtime_id: int, seats: List[str], to: str) -> None:
+    sm = _seats_status.get(showtime_id)
+    if sm is not None:
+        with sm.lock:
+            sm.apply(seats, SeatStatus(to))
+
+_APPLY: Dict[str, Any] = {
+    "save_pricing": lambda data: save_pricing(PricingRules(**data)),
+    "save_movie": lambda data: save_movie(Movie(**data)),
+    "delete_movie": delete_movie,
+    "save_studio": lambda data: save_studio(Studio(**data)),
+    "delete_studio": delete_studio,
+    "save_showtime": lambda data: save_showtime(Showtime(**data)),
+    "delete_showtime": delete_showtime,
+    "set_seats": _apply_set_seats,
+    "seat_state": _apply_seat_state,
+    "set_cart": _set_cart,
+    "cart_put": _put_item,
+    "cart_drop": _drop_item,
+    "save_booking": save_booking,
+    "checkout": _finalize_checkout,
+    "commit_tx": _commit_tx,
+}
+
+def apply_record(op: str, args) -> None:
+    """Replay satu record redo. Dipanggil saat recovery (journal belum terpasang)."""
+    _APPLY[op](*args)
+
+def release_orphan_reservations() -> int:
+    """
+    Kursi reserved yang tidak ada di cart mana pun (mis. crash di antara reserve
+    dan update cart) dikembalikan ke available. Dipanggil setelah recovery.
+    """
+    released = 0
+    for sid, sm in list(_seats_status.items()):
+        with sm.lock:
+            orphans = [c for c in sm.codes_with(SeatStatus.reserved) if (sid, c) not in _seat_owner]
+            if orphans:
+                sm.apply(orphans, SeatStatus.available)
+                _record("set_seats", sid, orphans, SeatStatus.available.value)
+                released += len(orphans)
+    if released:
+        metrics.seat_transitions.inc(released, SeatStatus.reserved.value, SeatStatus.available.value)
+    return released
+
+def reset_id_counters() -> None:
+    """Lanjutkan id generator setelah recovery (max id + 1)."""
+    global _movie_id_counter, _showtime_id_counter, _studio_id_counter
+    _movie_id_counter = itertools.count(max(_movies, default=0) + 1)
+    top, first = max(_showtimes, default=0), config.SHARD_INDEX + 1
+    _showtime_id_counter = itertools.count(top + 1 + (first - top - 1) % config.SHARD_COUNT,
+                                           config.SHARD_COUNT)
+    _studio_id_counter = itertools.count(max(_studios, default=0) + 1)
@@ -15,13 +15,3 @@ def seat_type_for(code: str, vip: Set[str], disabled: Set[str]) -> str:
     if code in vip:
         return "vip"
     return "standard"
-
-def apply_promo(total: float, code: str | None) -> float:
-    if not code:
-        return 0.0
-    c = code.upper()
-    if c == "DISCOUNT10":
-        return 0.10 * total
-    if c == "STUDENT20":
-        return 0.20 * total
-    return 0.0
\ No newline at end of file
@@ -0,0 +1,75 @@
+import time
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.admission import WaitingRoom
+
+client = TestClient(app)
+
+
+def _showtime():
+    mv = client.post("/admin/movies", json={"title": "Premiere", "duration_min": 150}).json()
+    return client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2026-05-01", "time": "00:01", "studio": "IMAX", "price": 90000, "rows": 2, "cols": 5
+    }).json()
+
+
+def test_waiting_room_gates_cart_and_layout():
+    st = _showtime()
+    sid = st["id"]
+    assert client.put(f"/admin/showtimes/{sid}/waiting-room", json={"active_cap": 1, "rate": 0.01, "burst": 3}).status_code == 200
+
+    assert client.post(f"/showtimes/{sid}/queue", json={"user_id": "ani"}).json()["state"] == "admitted"
+    queued = client.post(f"/showtimes/{sid}/queue", json={"user_id": "beni"}).json()
+    assert queued["state"] == "queued" and queued["position"] == 1
+
+    # belum masuk -> ditolak sebelum route (429 + Retry-After), tanpa menyentuh seat map
+    r = client.post("/cart/add", json={"user_id": "beni", "showtime_id": sid, "seats": ["A1"]})
+    assert r.status_code == 429 and "retry-after" in r.headers
+    assert client.get(f"/showtimes/{sid}/layout").status_code == 429
+    assert client.get(f"/showtimes/{sid}/layout", headers={"X-User-Id": "ani"}).status_code == 200
+    assert client.post("/cart/add", json={"user_id": "ani", "showtime_id": sid, "seats": ["A1"]}).status_code == 200
+
+    # token bucket: burst 3 sudah habis (layout + cart/add + satu lagi) -> rate limited
+    client.get(f"/showtimes/{sid}/layout", params={"user_id": "ani"})
+    r = client.get(f"/showtimes/{sid}/layout", params={"user_id": "ani"})
+    assert r.status_code == 429 and r.json()["detail"] == "Rate limit exceeded"
+
+    # ani keluar -> beni naik dari antrean
+    client.request("DELETE", f"/showtimes/{sid}/queue/ani")
+    assert client.get(f"/showtimes/{sid}/queue/beni").json()["state"] == "admitted"
+    assert client.post("/cart/add", json={"user_id": "beni", "showtime_id": sid, "seats": ["A2"]}).status_code == 200
+
+    client.request("DELETE", f"/admin/showtimes/{sid}/waiting-room")
+    assert client.get(f"/showtimes/{sid}/layout").status_code == 200
+
+
+def test_waiting_room_gates_every_batch_group():
+    open_st, gated = _showtime(), _showtime()
+    client.put(f"/admin/showtimes/{gated['id']}/waiting-room", json={"active_cap": 1})
+    client.post(f"/showtimes/{gated['id']}/queue", json={"user_id": "citra"})
+
+    # showtime ber-waiting room di group kedua tetap ditolak, tidak ada kursi yang ter-reserve
+    r = client.post("/cart/batch", json={"user_id": "dodi", "groups": [
+        {"showtime_id": open_st["id"], "seats": ["A1"]},
+        {"showtime_id": gated["id"], "seats": ["A1", "A2", "A3", "A4"]}]})
+    assert r.status_code == 429 and r.json()["showtime_id"] == gated["id"]
+    seats = client.get(f"/showtimes/{gated['id']}/seats", headers={"X-User-Id": "citra"}).json()
+    assert all(s == "available" for s in seats.values())
+    assert client.get("/cart/dodi").json()["items"] == []
+
+    r = client.post("/cart/batch", json={"user_id": "citra", "groups": [
+        {"showtime_id": gated["id"], "seats": ["A1", "A2"]}]})
+    assert r.status_code == 200
+    client.request("DELETE", f"/admin/showtimes/{gated['id']}/waiting-room")
+
+
+def test_fifo_promotion_expiry_and_shedding():
+    room = WaitingRoom(1, active_cap=2, session_ttl=0.05, queue_max=2)
+    assert [room.join(u)[0]["state"] for u in "abcd"] == ["admitted", "admitted", "queued", "queued"]
+    status, shed = room.join("e")
+    assert shed and status["state"] == "none"
+    assert room.status("d")["position"] == 2
+    time.sleep(0.06)   # sesi a & b kadaluarsa -> c, d naik berurutan
+    assert room.status("c")["state"] == room.status("d")["state"] == "admitted"
+    assert room.stats()["queued"] == 0
@@ -0,0 +1,98 @@
+import asyncio
+import inspect
+import threading
+
+import httpx
+from fastapi.testclient import TestClient
+from app import aio, storage
+from app.aio_main import app
+
+client = TestClient(app)
+
+
+def _showtime(rows=2, cols=3):
+    mv = client.post("/admin/movies", json={"title": "Async", "duration_min": 90}).json()
+    return client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2026-03-01", "time": "20:00", "studio": "A1", "price": 30000, "rows": rows, "cols": cols
+    }).json()
+
+
+def test_hot_routes_are_async_and_other_routes_are_reused():
+    endpoints = {(r.path, m): r.endpoint for r in app.routes for m in getattr(r, "methods", ())}
+    for key in [("/cart/add", "POST"), ("/checkout", "POST"), ("/showtimes/{showtime_id}/layout", "GET")]:
+        assert inspect.iscoroutinefunction(inspect.unwrap(endpoints[key]))
+    assert ("/admin/movies", "POST") in endpoints and ("/users/{user_id}/tickets", "GET") in endpoints
+
+
+def test_async_booking_flow():
+    st = _showtime()
+    item = client.post("/cart/add", json={"user_id": "ayu", "showtime_id": st["id"], "seats": ["A1", "A2"]})
+    assert item.status_code == 200 and item.json()["subtotal"] == 60000
+    assert client.get(f"/showtimes/{st['id']}/seats").json()["A1"] == "reserved"
+    assert client.request("DELETE", "/cart/remove", json={"user_id": "ayu", "seats": ["A2"]}).status_code == 200
+    booking = client.post("/checkout", json={"user_id": "ayu"})
+    assert booking.status_code == 200 and booking.json()["total_paid"] == 30000
+    assert client.get(f"/showtimes/{st['id']}/layout").json()["grid"][0][0]["status"] == "booked"
+
+
+def test_concurrent_adds_on_event_loop_reserve_each_seat_once():
+    st = _showtime(rows=1, cols=4)
+
+    async def rush():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://aio") as c:
+            return await asyncio.gather(*(
+                c.post("/cart/add", json={"user_id": f"u{i}", "showtime_id": st["id"], "seats": [f"A{i % 4 + 1}"]})
+                for i in range(40)))
+
+    codes = [r.status_code for r in asyncio.run(rush())]
+    assert codes.count(200) == 4 and codes.count(400) == 36
+
+
+def test_in_memory_ops_run_on_event_loop_without_thread_pool(monkeypatch):
+    st = _showtime()
+    dispatched, real = [], asyncio.to_thread
+
+    async def to_thread(fn, *args):
+        dispatched.append(fn.__name__)
+        return await real(fn, *args)
+
+    monkeypatch.setattr(aio.asyncio, "to_thread", to_thread)
+    assert client.post("/cart/add", json={"user_id": "ika", "showtime_id": st["id"], "seats": ["B1"]}).status_code == 200
+    assert client.get(f"/showtimes/{st['id']}/layout").status_code == 200
+    assert client.get("/cart/ika").status_code == 200
+    assert client.post("/checkout", json={"user_id": "ika"}).status_code == 200
+    assert dispatched == []
+
+    # lock showtime sedang dipegang thread lain -> jatuh ke thread pool
+    lock = storage.seats_map(st["id"]).lock
+    lock.acquire()
+    threading.Timer(0.2, lock.release).start()
+    assert client.get(f"/showtimes/{st['id']}/best-available", params={"quantity": 1}).status_code == 200
+    assert dispatched == ["find_best_available"]
+
+
+def test_thread_lock_contention_does_not_block_event_loop():
+    busy, free = _showtime(rows=1, cols=2), _showtime(rows=1, cols=2)
+    held, release = threading.Event(), threading.Event()
+
+    def holder():   # mis. sweeper / route sync yang sedang memegang lock showtime
+        with storage.showtime_locks([busy["id"]]):
+            held.set()
+            release.wait(5)
+
+    threading.Thread(target=holder, daemon=True).start()
+    held.wait(5)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://aio") as c:
+            blocked = asyncio.ensure_future(
+                c.post("/cart/add", json={"user_id": "w1", "showtime_id": busy["id"], "seats": ["A1"]}))
+            other = await asyncio.wait_for(
+                c.post("/cart/add", json={"user_id": "w2", "showtime_id": free["id"], "seats": ["A1"]}), 2)
+            assert other.status_code == 200 and not blocked.done()
+            release.set()
+            return (await blocked).status_code
+
+    assert asyncio.run(scenario()) == 200
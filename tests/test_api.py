@@ -1,3 +1,4 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -75,13 +76,222 @@ def test_remove_partial_and_whole_item():
     item = client.post("/cart/add", json={"user_id": "bob", "showtime_id": st_id, "seats": ["A1","A2","A3"]}).json()
 
     # remove only A2
-    r = client.delete("/cart/remove", json={"user_id": "bob", "seats": ["A2"]})
+    r = client.request("DELETE", "/cart/remove", json={"user_id": "bob", "seats": ["A2"]})
     assert r.status_code == 200
     cart = client.get("/cart/bob").json()
     assert cart["items"][0]["seats"] == ["A1","A3"]
 
     # remove by item id
-    r = client.delete("/cart/remove", json={"user_id": "bob", "cart_item_id": item["id"]})
+    r = client.request("DELETE", "/cart/remove", json={"user_id": "bob", "cart_item_id": item["id"]})
     assert r.status_code == 200
     cart = client.get("/cart/bob").json()
     assert cart["total"] == 0 and cart["items"] == []
+
+def test_showtime_and_ticket_indexes():
+    mv = client.post("/admin/movies", json={"title": "Arrival", "duration_min": 116}).json()
+    for day, studio in [("2025-11-10", "Idx-1"), ("2025-11-10", "Idx-2"), ("2025-11-11", "Idx-1")]:
+        client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+            "day": day, "time": "18:00", "studio": studio, "price": 30000, "rows": 1, "cols": 3
+        })
+    shows = client.get(f"/movies/{mv['id']}/showtimes").json()
+    assert len(shows) == 3
+    same_day = client.get("/admin/showtimes", params={"day": "2025-11-10", "studio": "Idx-1"}).json()
+    assert [s["id"] for s in same_day] == [shows[0]["id"]]
+
+    client.post("/cart/add", json={"user_id": "erin", "showtime_id": shows[0]["id"], "seats": ["A1"]})
+    code = client.post("/checkout", json={"user_id": "erin"}).json()["booking_code"]
+    assert [t["booking_code"] for t in client.get("/users/erin/tickets").json()] == [code]
+
+    # hapus movie -> showtime ikut hilang dari semua index
+    client.delete(f"/admin/movies/{mv['id']}")
+    assert client.get(f"/movies/{mv['id']}/showtimes").json() == []
+    assert client.get("/admin/showtimes", params={"studio": "Idx-1"}).json() == []
+
+def test_layout_etag_and_patch():
+    mv = client.post("/admin/movies", json={"title": "Tenet", "duration_min": 150}).json()
+    st = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2025-11-12", "time": "20:00", "studio": "S5", "price": 35000, "rows": 2, "cols": 3,
+        "vip_seats": ["A2"]
+    }).json()
+    url = f"/showtimes/{st['id']}/layout"
+
+    r1 = client.get(url)
+    etag = r1.headers["etag"]
+    r2 = client.get(url, headers={"If-None-Match": etag})
+    assert r2.status_code == 304 and r2.content == b""
+
+    # status kursi berubah -> ETag baru dan sel ter-patch
+    client.post("/cart/add", json={"user_id": "frank", "showtime_id": st["id"], "seats": ["A2"]})
+    r3 = client.get(url, headers={"If-None-Match": etag})
+    assert r3.status_code == 200 and r3.headers["etag"] != etag
+    cell = r3.json()["grid"][0][1]
+    assert cell["code"] == "A2" and cell["status"] == "reserved" and cell["seat_type"] == "vip"
+
+def test_bulk_showtimes_share_layout_template():
+    from app import storage
+
+    mv = client.post("/admin/movies", json={"title": "Up", "duration_min": 96}).json()
+    r = client.post(f"/admin/movies/{mv['id']}/showtimes/bulk", json={
+        "template": {"studio": "Bulk-1", "price": 30000, "rows": 3, "cols": 5,
+                     "aisles_cols": [2], "vip_seats": ["C3"], "disabled_seats": ["A5"]},
+        "slots": [{"day": f"2025-12-{d:02d}", "time": t} for d in (1, 2) for t in ("13:00", "19:00")],
+    })
+    assert r.status_code == 200
+    shows = r.json()
+    assert len(shows) == 4 and shows[3]["day"] == "2025-12-02" and shows[3]["time"] == "19:00"
+
+    metas = {id(storage.showtime_meta(s["id"])) for s in shows}
+    assert len(metas) == 1   # satu template dipakai semua showtime
+    seats = client.get(f"/showtimes/{shows[0]['id']}/seats").json()
+    assert seats["A5"] == "blocked" and seats["C3"] == "available"
+
+    bad = client.post(f"/admin/movies/{mv['id']}/showtimes/bulk", json={
+        "template": {"studio": "Bulk-1", "price": 30000, "rows": 3, "cols": 5},
+        "slots": [{"day": "2025/12/01", "time": "13:00"}],
+    })
+    assert bad.status_code == 422
+
+
+def test_studio_layout_shared_by_showtimes():
+    from app import storage
+
+    studio = client.post("/admin/studios", json={
+        "name": "Studio Flyweight", "rows": 4, "cols": 6,
+        "aisles_cols": [3], "vip_seats": ["D1"], "disabled_seats": ["A6"],
+    }).json()
+    mv = client.post("/admin/movies", json={"title": "Coco", "duration_min": 105}).json()
+    r = client.post(f"/admin/studios/{studio['id']}/showtimes", json={
+        "movie_id": mv["id"], "price": 40000,
+        "slots": [{"day": "2025-12-10", "time": "10:00"}, {"day": "2025-12-10", "time": "16:00"}],
+    })
+    assert r.status_code == 200
+    shows = r.json()
+    assert [s["studio_id"] for s in shows] == [studio["id"]] * 2
+    assert shows[0]["studio"] == "Studio Flyweight" and shows[0]["rows"] == 4
+
+    metas = {id(storage.showtime_meta(s["id"])) for s in shows}
+    assert metas == {id(storage.studio_template(studio["id"]))}
+    layout = client.get(f"/showtimes/{shows[1]['id']}/layout").json()
+    assert layout["grid"][0][5]["seat_type"] == "blocked" and layout["grid"][3][0]["seat_type"] == "vip"
+
+    # layout studio terkunci selama dipakai showtime; ganti nama tetap boleh
+    assert client.put(f"/admin/studios/{studio['id']}", json={"cols": 8}).status_code == 409
+    assert client.put(f"/admin/studios/{studio['id']}", json={"name": "Studio 9"}).json()["name"] == "Studio 9"
+    for body in ({"rows": None}, {"name": None}, {"screen_side": None}):
+        assert client.put(f"/admin/studios/{studio['id']}", json=body).status_code == 422
+    assert client.request("DELETE", f"/admin/studios/{studio['id']}").status_code == 409
+    for s in shows:
+        storage.delete_showtime(s["id"])
+    assert client.request("DELETE", f"/admin/studios/{studio['id']}").status_code == 200
+    assert client.get(f"/admin/studios/{studio['id']}").status_code == 404
+
+def test_cart_batch_is_all_or_nothing():
+    mv = client.post("/admin/movies", json={"title": "Group", "duration_min": 100}).json()
+    a, b = [client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2025-11-01", "time": t, "studio": "G", "price": 40000, "rows": 2, "cols": 3
+    }).json() for t in ("10:00", "13:00")]
+
+    r = client.post("/cart/batch", json={"user_id": "grp", "groups": [
+        {"showtime_id": a["id"], "seats": ["A1", "A2"]}, {"showtime_id": b["id"], "seats": ["B1"]}]})
+    assert r.status_code == 200
+    body = r.json()
+    assert [i["subtotal"] for i in body["items"]] == [80000, 40000] and body["total"] == 120000
+    assert len(client.get("/cart/grp").json()["items"]) == 2
+
+    # satu kursi sudah dipegang -> seluruh batch ditolak, kursi lain tetap available
+    r = client.post("/cart/batch", json={"user_id": "grp2", "groups": [
+        {"showtime_id": b["id"], "seats": ["A3"]}, {"showtime_id": a["id"], "seats": ["A1"]}]})
+    assert r.status_code == 400
+    assert client.get(f"/showtimes/{b['id']}/seats").json()["A3"] == "available"
+    assert client.get("/cart/grp2").json()["items"] == []
+    assert client.post("/cart/batch", json={"user_id": "grp2", "groups": [
+        {"showtime_id": b["id"], "seats": ["A3"]}, {"showtime_id": b["id"], "seats": ["A3"]}]}).status_code == 400
+
+def test_cart_add_rejects_duplicate_seats():
+    mv = client.post("/admin/movies", json={"title": "Twice", "duration_min": 100}).json()
+    st = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2025-11-02", "time": "10:00", "studio": "D", "price": 150, "rows": 1, "cols": 3
+    }).json()
+    r = client.post("/cart/add", json={"user_id": "dup", "showtime_id": st["id"], "seats": ["A1", "A1"]})
+    assert r.status_code == 400
+    assert client.get(f"/showtimes/{st['id']}/seats").json()["A1"] == "available"
+    assert client.get("/cart/dup").json()["items"] == []
+
+
+def test_seat_holder_index_follows_cart():
+    mv = client.post("/admin/movies", json={"title": "Holder", "duration_min": 90}).json()
+    st = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2025-11-02", "time": "20:00", "studio": "H", "price": 10000, "rows": 1, "cols": 4
+    }).json()
+    item = client.post("/cart/add", json={"user_id": "eka", "showtime_id": st["id"], "seats": ["A1", "A2"]}).json()
+    holder = client.get(f"/admin/showtimes/{st['id']}/seats/A2/holder")
+    assert holder.json() == {"showtime_id": st["id"], "seat": "A2", "user_id": "eka", "cart_item_id": item["id"]}
+    assert client.get(f"/admin/showtimes/{st['id']}/seats/A3/holder").status_code == 404
+
+    # kursi orang lain tidak ikut terhapus; partial remove memperbarui index
+    client.post("/cart/add", json={"user_id": "fajar", "showtime_id": st["id"], "seats": ["A3"]})
+    assert client.request("DELETE", "/cart/remove", json={"user_id": "eka", "seats": ["A2", "A3"]}).status_code == 200
+    assert client.get(f"/admin/showtimes/{st['id']}/seats/A2/holder").status_code == 404
+    assert client.get(f"/admin/showtimes/{st['id']}/seats/A3/holder").json()["user_id"] == "fajar"
+    assert client.get("/cart/eka").json()["items"][0]["seats"] == ["A1"]
+    client.post("/checkout", json={"user_id": "eka"})
+    assert client.get(f"/admin/showtimes/{st['id']}/seats/A1/holder").status_code == 404
+
+def test_availability_counters_track_transitions():
+    mv = client.post("/admin/movies", json={"title": "Counter", "duration_min": 90}).json()
+    a, b = [client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2025-11-03", "time": t, "studio": "K", "price": 10000, "rows": 2, "cols": 3,
+        "disabled_seats": ["B3"]
+    }).json() for t in ("21:00", "09:00")]
+    client.post("/cart/add", json={"user_id": "gita", "showtime_id": a["id"], "seats": ["A1", "A2", "A3"]})
+    client.request("DELETE", "/cart/remove", json={"user_id": "gita", "seats": ["A3"]})
+    client.post("/checkout", json={"user_id": "gita"})
+    client.post("/cart/add", json={"user_id": "hadi", "showtime_id": a["id"], "seats": ["B1"]})
+
+    rows = client.get("/showtimes/availability", params={"movie_id": mv["id"], "day": "2025-11-03"}).json()
+    assert [r["showtime_id"] for r in rows] == [b["id"], a["id"]]
+    assert rows[1] == {"showtime_id": a["id"], "day": "2025-11-03", "time": "21:00", "total": 6,
+                       "available": 2, "reserved": 1, "booked": 2, "blocked": 1}
+    assert client.get("/showtimes/availability", params={"ids": str(b["id"])}).json()[0]["available"] == 5
+
+    listed = client.get(f"/movies/{mv['id']}/showtimes", params={"with_availability": "true"}).json()
+    assert [s["availability"]["available"] for s in listed] == [5, 2]
+    assert "availability" not in client.get(f"/movies/{mv['id']}/showtimes").json()[0]
+
+
+def test_revenue_and_occupancy_reports_stream():
+    mv = client.post("/admin/movies", json={"title": "Report", "duration_min": 90}).json()
+    a, b = [client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2025-12-01", "time": t, "studio": "RPT", "price": 10000, "rows": 2, "cols": 5,
+        "disabled_seats": ["B5"]
+    }).json() for t in ("10:00", "13:00")]
+    client.post("/cart/add", json={"user_id": "rina", "showtime_id": a["id"], "seats": ["A1", "A2"]})
+    client.post("/cart/add", json={"user_id": "rina", "showtime_id": b["id"], "seats": ["A1"]})
+    booking = client.post("/checkout", json={"user_id": "rina", "promo_code": "discount10"}).json()
+    assert booking["promo_code"] == "DISCOUNT10"
+    client.post("/cart/add", json={"user_id": "sari", "showtime_id": b["id"], "seats": ["A2"]})
+    client.post("/checkout", json={"user_id": "sari"})
+
+    r = client.get("/admin/reports/revenue", params={"group": "movie"})
+    assert r.headers["content-type"].startswith("text/csv")
+    lines = r.text.splitlines()
+    assert lines[0] == "movie_id,bookings,seats,gross,discount,paid"
+    assert f"{mv['id']},2,4,40000.0,3000.0,37000.0" in lines
+
+    # per showtime lewat agregat == lewat scan (rentang tanggal ad-hoc)
+    day = booking["timestamp"][:10]
+    mine = lambda rows: [x for x in rows if x["showtime_id"] in (a["id"], b["id"])]
+    agg = mine(map(json.loads, client.get("/admin/reports/revenue", params={
+        "group": "showtime", "format": "ndjson"}).text.splitlines()))
+    scan = mine(map(json.loads, client.get("/admin/reports/revenue", params={
+        "group": "showtime", "format": "ndjson", "date_from": day, "date_to": day}).text.splitlines()))
+    assert agg == scan == [
+        {"showtime_id": a["id"], "bookings": 1, "seats": 2, "gross": 20000.0, "discount": 2000.0, "paid": 18000.0},
+        {"showtime_id": b["id"], "bookings": 2, "seats": 2, "gross": 20000.0, "discount": 1000.0, "paid": 19000.0},
+    ]
+    assert client.get("/admin/reports/revenue", params={
+        "group": "movie", "date_from": "1999-01-01", "date_to": "1999-12-31"}).text == "movie_id,bookings,seats,gross,discount,paid\n"
+
+    occ = client.get("/admin/reports/occupancy", params={"group": "studio", "day": "2025-12-01"}).text.splitlines()
+    assert "RPT,2,20,14,0,4,2,0.2222" in occ
+    assert client.get("/admin/reports/occupancy", params={"format": "xml"}).status_code == 400
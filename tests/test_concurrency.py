@@ -0,0 +1,71 @@
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+def _hot_showtime(rows=26, cols=20):
+    mv = client.post("/admin/movies", json={"title": "Premiere", "duration_min": 120}).json()
+    st = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2025-12-01", "time": "19:00", "studio": "IMAX", "price": 75000,
+        "rows": rows, "cols": cols
+    }).json()
+    return st["id"]
+
+
+def test_concurrent_cart_add_never_double_books():
+    st_id = _hot_showtime()
+    seats = client.get(f"/showtimes/{st_id}/seats").json()
+    codes = list(seats)
+    rng = random.Random(7)
+    # 2000 request, tiap request 1-3 kursi dari kumpulan kecil -> benturan tinggi
+    hot = codes[:120]
+    jobs = [(f"u{i}", rng.sample(hot, rng.randint(1, 3))) for i in range(2000)]
+
+    def add(job):
+        user, picks = job
+        r = client.post("/cart/add", json={"user_id": user, "showtime_id": st_id, "seats": picks})
+        return user, picks, r.status_code
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(add, jobs))
+    elapsed = time.perf_counter() - t0
+
+    won = [(u, p) for u, p, code in results if code == 200]
+    assert all(code in (200, 400) for _, _, code in results)
+    held = Counter(s for _, picks in won for s in picks)
+    assert held and max(held.values()) == 1          # tidak ada kursi dipegang 2 cart
+
+    final = client.get(f"/showtimes/{st_id}/seats").json()
+    reserved = {s for s, status in final.items() if status == "reserved"}
+    assert reserved == set(held)
+    assert len(jobs) / elapsed > 100                  # throughput tetap wajar
+
+    locks = client.get("/admin/locks").json()
+    assert locks["showtimes"]["acquired"] >= len(jobs)
+
+
+def test_concurrent_checkout_books_each_seat_once():
+    st_id = _hot_showtime(rows=1, cols=10)
+    users = [f"c{i}" for i in range(10)]
+    for i, user in enumerate(users):
+        assert client.post("/cart/add", json={
+            "user_id": user, "showtime_id": st_id, "seats": [f"A{i + 1}"]
+        }).status_code == 200
+
+    def pay(user):
+        return client.post("/checkout", json={"user_id": user}).status_code
+
+    # checkout ganda per user: hanya satu yang boleh sukses
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        codes = list(pool.map(pay, users * 2))
+    assert codes.count(200) == len(users)
+
+    final = client.get(f"/showtimes/{st_id}/seats").json()
+    assert all(status == "booked" for status in final.values())
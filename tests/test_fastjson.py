@@ -0,0 +1,59 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app import fastjson
+
+client = TestClient(app)
+
+
+def _both(url: str):
+    fastjson.set_enabled(False)
+    try:
+        slow = client.get(url)
+        fastjson.set_enabled(True)
+        fast = client.get(url)
+    finally:
+        fastjson.set_enabled(False)
+    assert fast.status_code == slow.status_code == 200
+    assert fast.headers["content-type"] == slow.headers["content-type"]
+    return slow, fast
+
+
+def test_fast_json_matches_pydantic_output():
+    mv = client.post("/admin/movies", json={"title": "Amélie", "duration_min": 122}).json()
+    st = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2025-12-28", "time": "17:00", "studio": "Ruang Ü", "price": 45000.5,
+        "rows": 4, "cols": 5, "aisles_cols": [2], "vip_seats": ["D3"], "disabled_seats": ["A5"],
+        "screen_side": "left",
+    }).json()
+    client.post("/cart/add", json={"user_id": "olla", "showtime_id": st["id"], "seats": ["B2", "C3"]})
+    client.post("/checkout", json={"user_id": "olla", "promo_code": "DISCOUNT10"})
+    client.post("/cart/add", json={"user_id": "olla", "showtime_id": st["id"], "seats": ["D4"]})
+
+    for url in (f"/showtimes/{st['id']}/seats", f"/showtimes/{st['id']}/layout",
+                f"/movies/{mv['id']}/showtimes", "/admin/showtimes?studio=Ruang Ü",
+                "/users/olla/tickets"):
+        slow, fast = _both(url)
+        assert fast.content == slow.content, url
+
+    slow, fast = _both(f"/showtimes/{st['id']}/layout")
+    assert fast.headers["etag"] == slow.headers["etag"]
+    slow, fast = _both(f"/showtimes/{st['id']}/seats")
+    assert fast.headers["x-seat-version"] == slow.headers["x-seat-version"]
+
+    # cache ikut berubah saat status kursi berubah
+    fastjson.set_enabled(True)
+    try:
+        client.post("/cart/add", json={"user_id": "olla", "showtime_id": st["id"], "seats": ["A1"]})
+        assert client.get(f"/showtimes/{st['id']}/seats").json()["A1"] == "reserved"
+        assert client.get(f"/showtimes/{st['id']}/layout").json()["grid"][0][0]["status"] == "reserved"
+    finally:
+        fastjson.set_enabled(False)
+
+
+def test_booking_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(fastjson.config, "FAST_JSON_BOOKING_CACHE", 3)
+    booking = {"user_id": "lru", "items": [], "total_before_discount": 0.0, "discount_amount": 0.0,
+               "total_paid": 0.0, "timestamp": "2025-12-28T17:00:00"}
+    bodies = [fastjson.bookings([{**booking, "booking_code": f"LRU-{i}"}]) for i in range(5)]
+    assert list(fastjson._booking_cache) == ["LRU-2", "LRU-3", "LRU-4"]
+    assert fastjson.bookings([{**booking, "booking_code": "LRU-0"}]) == bodies[0]
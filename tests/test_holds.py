@@ -0,0 +1,85 @@
+import time
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app import config, crud, holds
+
+client = TestClient(app)
+
+
+def test_expired_holds_are_released_by_sweep():
+    mv = client.post("/admin/movies", json={"title": "Oppenheimer", "duration_min": 180}).json()
+    st = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2025-11-01", "time": "21:00", "studio": "S3", "price": 45000, "rows": 1, "cols": 5
+    }).json()
+    st_id = st["id"]
+    client.post("/cart/add", json={"user_id": "carol", "showtime_id": st_id, "seats": ["A1", "A2"]})
+    kept = client.post("/cart/add", json={"user_id": "dave", "showtime_id": st_id, "seats": ["A3"]}).json()
+
+    # belum kadaluarsa -> tidak ada yang dilepas
+    assert crud.release_expired_holds() == 0
+
+    # dave checkout duluan; hold-nya ikut hilang
+    assert client.post("/checkout", json={"user_id": "dave"}).status_code == 200
+    assert holds.expires_in("dave", kept["id"]) is None
+
+    later = holds.now() + config.HOLD_TTL_SECONDS + 1
+    released = crud.release_expired_holds(at=later)   # termasuk hold dari test lain
+    assert released >= 1
+
+    seats = client.get(f"/showtimes/{st_id}/seats").json()
+    assert seats["A1"] == "available" and seats["A2"] == "available"
+    assert seats["A3"] == "booked"
+    assert client.get("/cart/carol").json()["items"] == []
+
+    stats = client.get("/admin/holds").json()
+    assert stats["released_last_sweep"] == released and stats["sweeps"] >= 2
+
+
+def test_holds_with_same_item_id_in_different_carts_are_independent():
+    at = holds.now()
+    holds.hold("erin", "dup00001", ttl=10)
+    holds.hold("fred", "dup00001", ttl=20)
+    holds.drop("erin", "dup00001")
+    assert holds.expires_in("erin", "dup00001") is None
+    assert holds.expires_in("fred", "dup00001") > 10
+    # hold milik fred tidak ikut terlewati / terlepas oleh entry erin
+    assert ("fred", "dup00001") not in holds.pop_expired(at + 15)
+    assert ("fred", "dup00001") in holds.pop_expired(at + 21)
+
+
+def test_sweeper_survives_a_failing_sweep():
+    calls = []
+
+    def sweep():
+        calls.append(1)
+        if len(calls) == 1:
+            raise KeyError("showtime deleted mid-sweep")
+        return 0
+
+    errors = holds.snapshot_stats()["errors"]
+    sweeper = holds.Sweeper(sweep, interval=0.01).start()
+    deadline = holds.now() + 5
+    while len(calls) < 3 and holds.now() < deadline:
+        time.sleep(0.01)
+    sweeper.stop()
+    assert len(calls) >= 3 and holds.snapshot_stats()["errors"] == errors + 1
+
+
+def test_stale_prepared_checkout_is_aborted_by_sweep():
+    mv = client.post("/admin/movies", json={"title": "Tenet", "duration_min": 150}).json()
+    st_id = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2025-11-02", "time": "21:00", "studio": "S3", "price": 45000, "rows": 1, "cols": 5
+    }).json()["id"]
+    client.post("/cart/add", json={"user_id": "gina", "showtime_id": st_id, "seats": ["A1"]})
+
+    # router crash setelah prepare: tidak pernah ada commit / abort
+    crud.prepare_checkout("gina", "tx-stale")
+    assert client.get("/cart/gina").json()["items"] == []
+    crud.release_expired_holds()
+    assert client.get("/cart/gina").json()["items"] == []
+
+    crud.release_expired_holds(at=holds.now() + config.PREPARED_TX_TTL + 1)
+    assert [i["showtime_id"] for i in client.get("/cart/gina").json()["items"]] == [st_id]
+    assert client.get(f"/showtimes/{st_id}/seats").json()["A1"] == "reserved"
+    assert crud.abort_checkout("tx-stale") is False
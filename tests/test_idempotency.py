@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.main import app
+from app import storage
+from app.idempotency import IdempotencyStore
+
+client = TestClient(app)
+
+
+def test_checkout_retry_returns_same_booking():
+    mv = client.post("/admin/movies", json={"title": "Rocky", "duration_min": 120}).json()
+    st = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2025-12-26", "time": "18:00", "studio": "S13", "price": 20000, "rows": 2, "cols": 3
+    }).json()
+    add = {"user_id": "nino", "showtime_id": st["id"], "seats": ["A1"]}
+    first = client.post("/cart/add", json=add, headers={"Idempotency-Key": "add-1"})
+    again = client.post("/cart/add", json=add, headers={"Idempotency-Key": "add-1"})
+    assert again.json() == first.json() and again.headers["idempotent-replayed"] == "true"
+    assert len(storage.get_cart("nino")) == 1
+
+    r1 = client.post("/checkout", json={"user_id": "nino"}, headers={"Idempotency-Key": "co-1"})
+    r2 = client.post("/checkout", json={"user_id": "nino"}, headers={"Idempotency-Key": "co-1"})
+    assert r1.status_code == r2.status_code == 200
+    assert r2.json()["booking_code"] == r1.json()["booking_code"]
+    assert len(client.get("/users/nino/tickets").json()) == 1
+
+    other = client.post("/checkout", json={"user_id": "nino", "promo_code": "STUDENT20"},
+                        headers={"Idempotency-Key": "co-1"})
+    assert other.status_code == 422
+    # tanpa key perilaku lama tetap: cart sudah kosong
+    assert client.post("/checkout", json={"user_id": "nino"}).status_code == 400
+
+
+def test_in_flight_duplicate_waits_for_first_run():
+    store = IdempotencyStore(max_keys=10, ttl=60)
+    calls = []
+    started = threading.Event()
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return {"ok": len(calls)}
+
+    results = []
+    t = threading.Thread(target=lambda: results.append(store.run("k", "f", slow)))
+    t.start()
+    started.wait()
+    results.append(store.run("k", "f", slow))
+    t.join()
+    assert len(calls) == 1
+    assert sorted(r[1] for r in results) == [False, True]
+    assert results[0][0] == results[1][0] == {"ok": 1}
+
+
+def test_failures_are_not_cached_and_store_is_bounded():
+    store = IdempotencyStore(max_keys=3, ttl=60)
+
+    def boom():
+        raise HTTPException(400, "nope")
+    with pytest.raises(HTTPException):
+        store.run("k", "f", boom)
+    assert store.run("k", "f", lambda: 1) == (1, False)
+
+    for i in range(10):
+        store.run(f"x{i}", "f", lambda: i)
+    assert len(store) == 3
+    assert store.run("x9", "f", lambda: "new") == (9, True)
+    assert store.run("x0", "f", lambda: "new") == ("new", False)
+
+    expiring = IdempotencyStore(max_keys=3, ttl=0)
+    expiring.run("k", "f", lambda: 1)
+    assert expiring.run("k", "f", lambda: 2) == (2, False)
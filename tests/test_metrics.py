@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app import metrics
+
+client = TestClient(app)
+
+
+def _sample(text: str, prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_count_transitions_failures_and_routes():
+    mv = client.post("/admin/movies", json={"title": "Alien", "duration_min": 117}).json()
+    st = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2025-12-24", "time": "21:00", "studio": "S12", "price": 10000, "rows": 2, "cols": 3
+    }).json()
+    before = client.get("/metrics").text
+
+    client.post("/cart/add", json={"user_id": "mira", "showtime_id": st["id"], "seats": ["A1", "A2"]})
+    client.post("/checkout", json={"user_id": "mira"})
+    assert client.post("/checkout", json={"user_id": "mira"}).status_code == 400
+    text = client.get("/metrics").text
+
+    rsv = 'seat_transitions_total{from_status="available",to_status="reserved"}'
+    bkd = 'seat_transitions_total{from_status="reserved",to_status="booked"}'
+    assert _sample(text, rsv) - _sample(before, rsv) == 2
+    assert _sample(text, bkd) - _sample(before, bkd) == 2
+    fail = 'checkout_failures_total{reason="empty_cart"}'
+    assert _sample(text, fail) - _sample(before, fail) == 1
+
+    route = 'http_request_duration_seconds_count{method="POST",route="/checkout",status="200"}'
+    assert _sample(text, route) >= 1
+    assert 'http_handler_duration_seconds_count{route="/checkout"}' in text
+    assert 'storage_op_duration_seconds_count{op="finalize_checkout"}' in text
+    assert "# TYPE lock_wait_seconds_total counter" in text
+
+
+def test_timing_toggle_at_runtime():
+    try:
+        assert client.put("/admin/metrics/timing", params={"enabled": False}).json() == {"timing": False}
+        n = metrics.http_handler_seconds.count("/movies")
+        client.get("/movies")
+        assert metrics.http_handler_seconds.count("/movies") == n
+    finally:
+        client.put("/admin/metrics/timing", params={"enabled": True})
+    client.get("/movies")
+    assert metrics.http_handler_seconds.count("/movies") == n + 1
@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+def _all_pages(url: str, **params):
+    pages, cursor = [], None
+    while True:
+        r = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200
+        pages.append(r.json())
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+
+
+def test_showtimes_cursor_pages_and_filters():
+    mv = client.post("/admin/movies", json={"title": "Paged", "duration_min": 90}).json()
+    slots = [{"day": f"2026-03-{d:02d}", "time": t} for d in (3, 1, 2) for t in ("20:00", "10:00")]
+    client.post(f"/admin/movies/{mv['id']}/showtimes/bulk", json={
+        "template": {"studio": "Pg-1", "price": 10000, "rows": 1, "cols": 2}, "slots": slots})
+
+    pages = _all_pages(f"/movies/{mv['id']}/showtimes", limit=4)
+    assert [len(p) for p in pages] == [4, 2]
+    flat = [(s["day"], s["time"]) for p in pages for s in p]
+    assert flat == sorted(flat)   # urut hari & jam, bukan urut dibuat
+
+    ranged = client.get("/admin/showtimes", params={
+        "movie_id": mv["id"], "studio": "Pg-1", "day_from": "2026-03-02", "day_to": "2026-03-03"}).json()
+    assert [(s["day"], s["time"]) for s in ranged] == [
+        ("2026-03-02", "10:00"), ("2026-03-02", "20:00"), ("2026-03-03", "10:00"), ("2026-03-03", "20:00")]
+
+    assert client.get("/admin/showtimes", params={"cursor": "bm90LWpzb24"}).status_code == 400
+    assert client.get("/admin/showtimes", params={"limit": 0}).status_code == 422
+
+
+def test_movies_and_tickets_pages():
+    for i in range(3):
+        client.post("/admin/movies", json={"title": f"Noir {i}", "duration_min": 100,
+                                            "genre": "Noir", "rating": "R" if i % 2 else "PG"})
+    pages = _all_pages("/movies", genre="Noir", limit=2)
+    assert [len(p) for p in pages] == [2, 1]
+    assert [m["title"] for m in client.get("/movies", params={"genre": "Noir", "rating": "R"}).json()] == ["Noir 1"]
+
+    mv = client.post("/admin/movies", json={"title": "Tix", "duration_min": 90}).json()
+    st = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2026-04-01", "time": "19:00", "studio": "Pg-2", "price": 5000, "rows": 1, "cols": 5}).json()
+    codes = []
+    for seat in ("A1", "A2", "A3"):
+        client.post("/cart/add", json={"user_id": "pia", "showtime_id": st["id"], "seats": [seat]})
+        codes.append(client.post("/checkout", json={"user_id": "pia"}).json()["booking_code"])
+
+    pages = _all_pages("/users/pia/tickets", limit=2)
+    assert sorted(t["booking_code"] for p in pages for t in p) == sorted(codes)
+    assert client.get("/users/pia/tickets", params={"date_to": "2000-01-01"}).json() == []
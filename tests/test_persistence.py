@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app import persistence
+
+client = TestClient(app)
+
+_RECOVER = """
+import json, sys
+from app import persistence, storage
+info = persistence.recover(sys.argv[1])
+st_id = int(sys.argv[2])
+print(json.dumps({
+    "info": info,
+    "seats": {k: v.value for k, v in storage.seats_map(st_id).items()},
+    "cart": storage.get_cart("hana"),
+    "tickets": [b["booking_code"] for b in storage.list_bookings_by_user("hana")],
+}))
+"""
+
+
+def _recover_in_fresh_process(directory, st_id):
+    env = {**os.environ, "PYTHONPATH": os.path.join(os.path.dirname(__file__), "..", "movie_booking")}
+    out = subprocess.run([sys.executable, "-c", _RECOVER, str(directory), str(st_id)],
+                         capture_output=True, text=True, env=env, check=True)
+    return json.loads(out.stdout)
+
+
+def test_wal_and_snapshot_recovery(tmp_path):
+    store = persistence.DurableStore(str(tmp_path), snapshot_every=0).open()
+    try:
+        mv = client.post("/admin/movies", json={"title": "Alien", "duration_min": 117}).json()
+        st = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+            "day": "2025-12-05", "time": "22:00", "studio": "S7", "price": 40000, "rows": 1, "cols": 4
+        }).json()
+        client.post("/cart/add", json={"user_id": "hana", "showtime_id": st["id"], "seats": ["A1"]})
+        code = client.post("/checkout", json={"user_id": "hana"}).json()["booking_code"]
+
+        store.snapshot()   # compaction: segmen WAL lama dibuang
+        assert [f for f in os.listdir(tmp_path) if f.startswith("snapshot-")]
+
+        # mutasi setelah snapshot hanya ada di WAL tail
+        item = client.post("/cart/add", json={"user_id": "hana", "showtime_id": st["id"], "seats": ["A3"]}).json()
+        assert store.wal.stats["commits"] >= 1
+    finally:
+        store.close()
+
+    state = _recover_in_fresh_process(tmp_path, st["id"])
+    assert state["info"]["wal_records"] >= 2
+    assert state["seats"] == {"A1": "booked", "A2": "available", "A3": "reserved", "A4": "available"}
+    assert state["cart"] == [[item["id"], st["id"], ["A3"]]]
+    assert state["tickets"] == [code]
+
+
+def test_wal_write_error_fails_waiters_instead_of_hanging(tmp_path):
+    wal = persistence.WriteAheadLog(str(tmp_path), start_lsn=0)
+
+    def disk_full(chunk):
+        raise OSError(28, "No space left on device")
+
+    wal._flush = disk_full
+    errors = []
+
+    def commit():
+        try:
+            wal.wait(wal.append("set_seats", (1, ["A1"], "reserved")))
+        except RuntimeError as e:
+            errors.append(e)
+
+    for _ in range(2):   # waiter saat error terjadi & waiter sesudahnya
+        t = threading.Thread(target=commit)
+        t.start()
+        t.join(timeout=5)
+        assert not t.is_alive()
+    assert len(errors) == 2 and isinstance(errors[0].__cause__, OSError)
+    wal.close()
@@ -0,0 +1,93 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app import pricing, storage
+from app.schemas import PricingRules
+
+client = TestClient(app)
+
+DEFAULT = PricingRules().model_dump()
+
+
+@pytest.fixture
+def rules():
+    yield lambda body: client.put("/admin/pricing", json=body)
+    client.put("/admin/pricing", json=DEFAULT)
+
+
+def _showtime(day="2026-06-06", time="20:00"):   # 2026-06-06 = Sabtu
+    mv = client.post("/admin/movies", json={"title": "Priced", "duration_min": 100}).json()
+    return client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": day, "time": time, "studio": "P1", "price": 40000, "rows": 2, "cols": 4,
+        "vip_seats": ["A1", "A2"], "disabled_seats": ["B4"]
+    }).json()
+
+
+def test_defaults_keep_flat_prices():
+    st = _showtime()
+    q = client.post("/pricing/quote", json={"items": [{"showtime_id": st["id"], "seats": ["A1", "B1"]}],
+                                            "promo_code": "student20"}).json()
+    assert q["items"][0] == {"showtime_id": st["id"], "seats": ["A1", "B1"],
+                             "seat_types": {"standard": 1, "vip": 1}, "subtotal": 80000}
+    assert q["discount_amount"] == 16000 and q["total_paid"] == 64000
+    assert client.get("/admin/pricing").json() == DEFAULT
+
+
+def test_tiers_time_rules_and_promo_table(rules):
+    st = _showtime()
+    weekday = _showtime(day="2026-06-08", time="13:00")
+    assert rules({
+        "seat_tiers": {"standard": 1.0, "vip": 1.5},
+        "time_rules": [{"name": "weekend night", "days": ["sat", "sun"], "time_from": "18:00", "multiplier": 1.2}],
+        "promos": [{"code": "HEMAT", "percent": 50, "min_total": 100000, "max_discount": 30000}],
+    }).status_code == 200
+
+    q = client.post("/pricing/quote", json={"items": [
+        {"showtime_id": st["id"], "seats": ["A1", "B1"]},        # (1.5 + 1) x 40000 x 1.2
+        {"showtime_id": weekday["id"], "seats": ["A2"]},         # 1.5 x 40000
+    ], "promo_code": "hemat"}).json()
+    assert [i["subtotal"] for i in q["items"]] == [120000, 60000]
+    assert q["total"] == 180000 and q["discount_amount"] == 30000 and q["total_paid"] == 150000
+    # promo lama sudah tidak ada di tabel
+    assert client.post("/pricing/quote", json={"items": [{"showtime_id": weekday["id"], "seats": ["A1"]}],
+                                                "promo_code": "DISCOUNT10"}).json()["discount_amount"] == 0
+
+    # cart, quote cart, dan checkout memakai engine yang sama
+    client.post("/cart/add", json={"user_id": "pia", "showtime_id": st["id"], "seats": ["A1", "B1"]})
+    assert client.get("/cart/pia").json()["total"] == 120000
+    assert client.get("/cart/pia/quote", params={"promo_code": "HEMAT"}).json()["total_paid"] == 90000
+    booking = client.post("/checkout", json={"user_id": "pia", "promo_code": "HEMAT"}).json()
+    assert booking["total_before_discount"] == 120000 and booking["total_paid"] == 90000
+
+    bad = client.post("/pricing/quote", json={"items": [{"showtime_id": st["id"], "seats": ["B4"]}]})
+    assert bad.status_code == 400
+
+
+def test_quote_cache_follows_showtime_changes(rules):
+    rules({"seat_tiers": {"standard": 1.0, "vip": 2.0}})
+    st = _showtime()
+    body = {"items": [{"showtime_id": st["id"], "seats": ["A1"]}]}
+    assert client.post("/pricing/quote", json=body).json()["total"] == 80000
+    assert st["id"] in pricing.engine()._quotes
+
+    # showtime disimpan ulang dengan harga baru (replikasi / replay) -> quote dihitung ulang
+    old = storage.get_showtime(st["id"])
+    storage.save_showtime(old.model_copy(update={"price": 25000}), storage.showtime_meta(st["id"]))
+    assert st["id"] not in pricing.engine()._quotes
+    assert client.post("/pricing/quote", json=body).json()["total"] == 50000
+
+    # rules baru = engine baru, cache lama tidak terpakai
+    rules({"seat_tiers": {"standard": 1.0, "vip": 3.0}})
+    assert client.post("/pricing/quote", json=body).json()["total"] == 75000
+
+
+def test_time_rule_validation_and_overnight_window(rules):
+    for bad in ("25", "ab:cd", "24:00", "12:60", "7:30"):
+        assert rules({"time_rules": [{"time_from": bad, "multiplier": 1.2}]}).status_code == 422
+    assert rules({"time_rules": [{"time_from": "22:00", "time_to": "01:59", "multiplier": 0.5}]}).status_code == 200
+
+    body = lambda st: {"items": [{"showtime_id": st["id"], "seats": ["B1"]}]}
+    late, early, noon = (_showtime(time=t) for t in ("23:30", "01:00", "12:00"))
+    assert client.post("/pricing/quote", json=body(late)).json()["total"] == 20000
+    assert client.post("/pricing/quote", json=body(early)).json()["total"] == 20000
+    assert client.post("/pricing/quote", json=body(noon)).json()["total"] == 40000
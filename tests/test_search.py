@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.schemas import Movie
+from app.search import SearchIndex
+
+client = TestClient(app)
+
+
+def _movie(id, title, **kw):
+    return Movie(id=id, title=title, duration_min=100, **kw)
+
+
+def test_ranking_prefix_and_typo_tolerance():
+    idx = SearchIndex()
+    idx.add(_movie(1, "Interstellar", synopsis="A journey through space", genre="Sci-Fi"))
+    idx.add(_movie(2, "Space Jam", genre="Comedy"))
+    idx.add(_movie(3, "Inter Milan Story", synopsis="Football club"))
+    idx.add(_movie(4, "Ratatouille", rating="G"))
+
+    # title lebih berat dari synopsis
+    assert [m for m, _ in idx.search("space")] == [2, 1]
+    # token terakhir prefix; match penuh mengalahkan prefix
+    assert [m for m, _ in idx.search("inter")] == [3, 1]
+    assert [m for m, _ in idx.search("interst")] == [1]
+    # typo ringan (edit distance 1) & aksen diabaikan
+    assert [m for m, _ in idx.search("intrstellar")] == [1]
+    assert [m for m, _ in idx.search("Ratatouíle")] == [4]
+    # semua token wajib cocok
+    assert [m for m, _ in idx.search("space comedy")] == [2]
+    assert idx.search("space football") == []
+
+    idx.add(_movie(2, "Moon Jam"))        # update: term lama hilang dari index & trie
+    idx.remove(1)
+    assert idx.search("space") == [] and idx.search("interst") == []
+    assert [m for m, _ in idx.search("moo")] == [2]
+    assert len(idx) == 3
+
+
+def test_search_endpoint_follows_crud():
+    mv = client.post("/admin/movies", json={"title": "Zyxwv Returns", "duration_min": 120,
+                                             "genre": "Thriller"}).json()
+    hits = client.get("/movies/search", params={"q": "zyxw"}).json()
+    assert [h["id"] for h in hits] == [mv["id"]] and hits[0]["score"] > 0
+
+    client.put(f"/admin/movies/{mv['id']}", json={"title": "Qwvut Returns"})
+    assert client.get("/movies/search", params={"q": "zyxwv"}).json() == []
+    assert [h["title"] for h in client.get("/movies/search", params={"q": "qwvut thriler"}).json()] == ["Qwvut Returns"]
+
+    client.delete(f"/admin/movies/{mv['id']}")
+    assert client.get("/movies/search", params={"q": "qwvut"}).json() == []
+    assert client.get("/movies/search", params={"q": ""}).status_code == 422
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app import feed, storage
+from app.schemas import SeatStatus
+
+client = TestClient(app)
+
+
+def _showtime():
+    mv = client.post("/admin/movies", json={"title": "Heat", "duration_min": 170}).json()
+    return client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2025-11-20", "time": "19:30", "studio": "S6", "price": 30000, "rows": 3, "cols": 4
+    }).json()["id"]
+
+
+def test_seats_since_returns_only_changes():
+    st_id = _showtime()
+    r = client.get(f"/showtimes/{st_id}/seats")
+    v0 = int(r.headers["x-seat-version"])
+    assert len(r.json()) == 12
+
+    client.post("/cart/add", json={"user_id": "gina", "showtime_id": st_id, "seats": ["B2", "C3"]})
+    r = client.get(f"/showtimes/{st_id}/seats", params={"since": v0})
+    assert r.headers["x-seat-delta"] == "delta"
+    assert r.json() == {"B2": "reserved", "C3": "reserved"}
+
+    v1 = int(r.headers["x-seat-version"])
+    r = client.get(f"/showtimes/{st_id}/seats", params={"since": v1})
+    assert r.json() == {}
+
+    # versi di masa depan -> tidak valid, kirim peta penuh
+    r = client.get(f"/showtimes/{st_id}/seats", params={"since": v1 + 100})
+    assert r.headers["x-seat-delta"] == "full" and len(r.json()) == 12
+
+
+def test_seat_event_stream_pushes_deltas():
+    st_id = _showtime()
+    seat_map = storage.seats_map(st_id)
+
+    async def scenario():
+        events = feed.seat_events(seat_map, heartbeat=5)
+        first = await events.__anext__()
+        assert first.startswith("id: ") and "event: snapshot" in first
+
+        # mutasi dari thread lain (seperti endpoint sync) harus membangunkan stream
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, storage.transition_seats, st_id, ["A1"],
+                                   SeatStatus.available, SeatStatus.reserved)
+        delta = await asyncio.wait_for(events.__anext__(), 2)
+        await events.aclose()
+        return delta
+
+    delta = asyncio.run(scenario())
+    assert "event: delta" in delta
+    data = json.loads(delta.split("data: ", 1)[1])
+    assert data["seats"] == {"A1": "reserved"}
+    assert seat_map._watchers is None
+
+
+def test_dead_subscriber_does_not_break_reservations():
+    sid = _showtime()
+    sm = storage.seats_map(sid)
+    closed = asyncio.new_event_loop()
+    closed.close()
+
+    def dead():   # watcher SSE yang loop-nya sudah tertutup
+        closed.call_soon_threadsafe(lambda: None)
+
+    sm.subscribe(dead)
+    r = client.post("/cart/add", json={"user_id": "zed", "showtime_id": sid, "seats": ["A1"]})
+    assert r.status_code == 200
+    assert sm._watchers is None or dead not in sm._watchers
+    assert client.post("/checkout", json={"user_id": "zed"}).status_code == 200
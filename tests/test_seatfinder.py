@@ -0,0 +1,53 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app import seatfinder
+from app.schemas import SeatStatus
+from app.seatmap import layout_template
+
+client = TestClient(app)
+
+
+def test_runs_break_at_aisles_and_unavailable_seats():
+    tpl = layout_template(1, 8, aisles=[3], disabled=["A6"])
+    sm = tpl.new_seat_map()
+    sm["A2"] = SeatStatus.booked
+    # A1 | A3 (aisle setelah kolom 3) | A4 A5 | A7 A8
+    assert seatfinder.best_available(-1, sm, tpl, 3) is None
+    assert seatfinder.best_available(-1, sm, tpl, 2) == ["A4", "A5"]
+    assert seatfinder.best_available(-1, sm, tpl, 1) in (["A4"], ["A5"])
+
+
+def test_prefers_center_and_tracks_changes():
+    tpl = layout_template(5, 10)
+    sm = tpl.new_seat_map()
+    assert seatfinder.best_available(-2, sm, tpl, 4) == ["C4", "C5", "C6", "C7"]
+
+    sm.set_mask(sm.layout.mask_of(["C5"]), SeatStatus.reserved)
+    best = seatfinder.best_available(-2, sm, tpl, 4)
+    assert best[0][0] in "BD" and best == [best[0][0] + str(c) for c in range(4, 8)]
+
+    sm.set_mask(sm.layout.mask_of(["C5"]), SeatStatus.available)
+    assert seatfinder.best_available(-2, sm, tpl, 4) == ["C4", "C5", "C6", "C7"]
+
+
+def test_best_available_reserves_through_cart():
+    mv = client.post("/admin/movies", json={"title": "Jaws", "duration_min": 124}).json()
+    st = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+        "day": "2025-12-20", "time": "20:00", "studio": "S11", "price": 25000,
+        "rows": 3, "cols": 6, "aisles_cols": [3],
+    }).json()
+
+    hint = client.get(f"/showtimes/{st['id']}/best-available", params={"quantity": 3}).json()
+    assert hint["seats"] == ["B1", "B2", "B3"]
+
+    r = client.post("/cart/best-available", json={"user_id": "kiki", "showtime_id": st["id"], "quantity": 3})
+    assert r.status_code == 200
+    item = r.json()
+    assert item["seats"] == hint["seats"] and item["subtotal"] == 75000
+    seats = client.get(f"/showtimes/{st['id']}/seats").json()
+    assert all(seats[s] == "reserved" for s in item["seats"])
+
+    # blok berikutnya tidak memakai kursi yang sudah di-reserve
+    nxt = client.post("/cart/best-available", json={"user_id": "kiki", "showtime_id": st["id"], "quantity": 3}).json()
+    assert not set(nxt["seats"]) & set(item["seats"])
+    assert client.get(f"/showtimes/{st['id']}/best-available", params={"quantity": 4}).status_code == 400
@@ -0,0 +1,38 @@
+from app.schemas import SeatStatus
+from app.seatmap import SeatMap, seat_index
+
+
+def test_seat_index_is_shared_per_size():
+    assert seat_index(3, 4) is seat_index(3, 4)
+    layout = seat_index(3, 4)
+    assert layout.codes[0] == "A1" and layout.codes[-1] == "C4"
+    assert layout.index["B2"] == 5
+    assert layout.row_col(5) == (2, 2)
+
+
+def test_seat_map_dict_contract_and_masks():
+    layout = seat_index(2, 3)
+    sm = SeatMap(layout)
+    sm.set_mask(layout.mask_of(["B3"]), SeatStatus.blocked)
+    sm["A1"] = SeatStatus.reserved
+
+    assert sm["A1"] == SeatStatus.reserved
+    assert sm.get("Z9") is None and "Z9" not in sm
+    assert list(sm) == ["A1", "A2", "A3", "B1", "B2", "B3"]
+    assert sm.codes_with(SeatStatus.available) == ["A2", "A3", "B1", "B2"]
+    assert sm.count(SeatStatus.blocked) == 1
+    assert sm.mask(SeatStatus.reserved) == 1
+    assert sm.to_dict()["B3"] == SeatStatus.blocked
+
+
+def test_status_counters_match_masks():
+    import random
+    from app.seatmap import STATUSES, layout_template
+    rng = random.Random(3)
+    sm = layout_template(4, 5, disabled=["A1", "D5"]).new_seat_map()
+    assert sm.counts() == {"available": 18, "reserved": 0, "booked": 0, "blocked": 2}
+    for _ in range(200):
+        sm[rng.choice(sm.layout.codes)] = rng.choice(STATUSES)
+        assert all(sm.count(s) == sm.mask(s).bit_count() for s in STATUSES)
+    sm.restore(bytes(len(sm)))
+    assert sm.counts()[STATUSES[0].value] == 20
@@ -0,0 +1,174 @@
+import json
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.shard_router import create_app, owner, start_local_shards, stop_local_shards
+
+HALL = {"studio": "S1", "price": 10000, "rows": 2, "cols": 5}
+
+
+@pytest.fixture(scope="module")
+def router():
+    urls, procs = start_local_shards(2)
+    try:
+        with TestClient(create_app(urls)) as client:
+            client.shard_urls = urls
+            yield client
+    finally:
+        stop_local_shards(procs)
+
+
+def _shard(router, n, method, path, **kw):
+    """Request langsung ke shard ke-n (melewati router)."""
+    return httpx.request(method, router.shard_urls[n] + path, **kw)
+
+
+def _movie_with_showtimes(router, count=4):
+    mv = router.post("/admin/movies", json={"title": "Shard", "duration_min": 100}).json()
+    slots = [{"day": f"2031-01-{d + 1:02d}", "time": "19:00"} for d in range(count)]
+    shows = router.post(f"/admin/movies/{mv['id']}/showtimes/bulk", json={"template": HALL, "slots": slots}).json()
+    return mv, shows
+
+
+def test_showtimes_are_partitioned_and_listed_in_order(router):
+    mv, shows = _movie_with_showtimes(router)
+    # movie direplikasi ke semua shard; showtime tersebar dan id-nya menentukan pemilik
+    for n in (0, 1):
+        assert _shard(router, n, "GET", f"/admin/movies/{mv['id']}").status_code == 200
+    assert [s["day"] for s in shows] == [f"2031-01-{d + 1:02d}" for d in range(4)]
+    assert {owner(s["id"], 2) for s in shows} == {0, 1}
+    for s in shows:
+        assert _shard(router, owner(s["id"], 2), "GET", f"/showtimes/{s['id']}/seats").status_code == 200
+        assert _shard(router, 1 - owner(s["id"], 2), "GET", f"/showtimes/{s['id']}/seats").status_code == 404
+
+    first = router.get(f"/movies/{mv['id']}/showtimes", params={"limit": 3})
+    rest = router.get(f"/movies/{mv['id']}/showtimes", params={"limit": 3, "cursor": first.headers["x-next-cursor"]})
+    assert [s["id"] for s in first.json() + rest.json()] == [s["id"] for s in shows]
+    assert "x-next-cursor" not in rest.headers
+
+
+def test_cross_shard_checkout_uses_two_phase_commit(router):
+    _, shows = _movie_with_showtimes(router, 2)
+    a, b = shows
+    assert owner(a["id"], 2) != owner(b["id"], 2)
+    assert router.post("/cart/add", json={"user_id": "ana", "showtime_id": a["id"], "seats": ["A1"]}).status_code == 200
+    assert router.post("/cart/add", json={"user_id": "ana", "showtime_id": b["id"], "seats": ["B2"]}).status_code == 200
+    cart = router.get("/cart/ana").json()
+    assert len(cart["items"]) == 2 and cart["total"] == 20000
+
+    r = router.post("/checkout", json={"user_id": "ana"})
+    assert r.status_code == 200, r.text
+    booking = r.json()
+    assert booking["total_paid"] == 20000 and len(booking["items"]) == 2
+    assert router.get(f"/showtimes/{a['id']}/seats").json()["A1"] == "booked"
+    assert router.get(f"/showtimes/{b['id']}/seats").json()["B2"] == "booked"
+    assert router.get("/cart/ana").json()["items"] == []
+    assert router.get(f"/tickets/{booking['booking_code']}").status_code == 200
+    assert [t["booking_code"] for t in router.get("/users/ana/tickets").json()] == [booking["booking_code"]]
+
+
+def test_failed_commit_leg_is_reported_not_booked(router, monkeypatch):
+    _, (a, b) = _movie_with_showtimes(router, 2)
+    router.post("/cart/add", json={"user_id": "eka", "showtime_id": a["id"], "seats": ["A3"]})
+    router.post("/cart/add", json={"user_id": "eka", "showtime_id": b["id"], "seats": ["A3"]})
+    lost = router.shard_urls[1]
+    request = httpx.AsyncClient.request
+
+    async def flaky(self, method, url, **kw):
+        # shard 1 "restart" di antara prepare dan commit: tx yang sudah di-prepare hilang
+        if url == "/internal/checkout/commit" and str(self.base_url).rstrip("/") == lost:
+            await request(self, "POST", "/internal/checkout/abort", json={"txid": kw["json"]["txid"]})
+        return await request(self, method, url, **kw)
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", flaky)
+    r = router.post("/checkout", json={"user_id": "eka"})
+    assert r.status_code == 502
+    assert r.json()["failed_shards"] == [1] and r.json()["committed_shards"] == [0]
+    assert "booking_code" in r.json() and "total_paid" not in r.json()
+
+
+def test_lost_prepare_leg_aborts_every_shard(router, monkeypatch):
+    _, (a, b) = _movie_with_showtimes(router, 2)
+    router.post("/cart/add", json={"user_id": "fani", "showtime_id": a["id"], "seats": ["B5"]})
+    router.post("/cart/add", json={"user_id": "fani", "showtime_id": b["id"], "seats": ["B5"]})
+    lost = router.shard_urls[1]
+    request = httpx.AsyncClient.request
+
+    async def flaky(self, method, url, **kw):
+        # prepare di shard 1 sempat jalan, tapi response-nya tidak pernah sampai
+        r = await request(self, method, url, **kw)
+        if url == "/internal/checkout/prepare" and str(self.base_url).rstrip("/") == lost:
+            raise httpx.ReadTimeout("timed out")
+        return r
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", flaky)
+    r = router.post("/checkout", json={"user_id": "fani"})
+    assert r.status_code == 502 and r.json()["failed_shards"] == [1]
+    monkeypatch.undo()
+    # abort sampai ke kedua shard: item kembali ke cart, kursi tetap reserved
+    assert sorted(i["showtime_id"] for i in router.get("/cart/fani").json()["items"]) == sorted([a["id"], b["id"]])
+    assert router.get(f"/showtimes/{b['id']}/seats").json()["B5"] == "reserved"
+    assert router.post("/checkout", json={"user_id": "fani"}).status_code == 200
+
+
+def test_participant_prepare_abort_restores_cart(router):
+    _, shows = _movie_with_showtimes(router, 2)
+    a, b = shows
+    router.post("/cart/add", json={"user_id": "budi", "showtime_id": a["id"], "seats": ["A1"]})
+    router.post("/cart/add", json={"user_id": "budi", "showtime_id": b["id"], "seats": ["A1"]})
+
+    # prepare langsung di shard pemilik `a`: checkout via router hanya melihat cart shard lain
+    home = owner(a["id"], 2)
+    prep = _shard(router, home, "POST", "/internal/checkout/prepare", json={"txid": "t-1", "user_id": "budi"})
+    assert prep.status_code == 200 and prep.json()["total"] == 10000
+    assert router.post("/checkout", json={"user_id": "budi"}).status_code == 200   # hanya cart shard lain
+    assert router.get(f"/showtimes/{b['id']}/seats").json()["A1"] == "booked"
+
+    # abort -> item `a` kembali ke cart dan kursinya tetap reserved
+    assert _shard(router, home, "POST", "/internal/checkout/abort", json={"txid": "t-1"}).json()["aborted"]
+    assert [i["showtime_id"] for i in router.get("/cart/budi").json()["items"]] == [a["id"]]
+    assert router.get(f"/showtimes/{a['id']}/seats").json()["A1"] == "reserved"
+    assert _shard(router, home, "POST", "/internal/checkout/commit", json={"txid": "t-1"}).status_code == 404
+
+
+def test_cross_shard_batch_compensates_on_failure(router):
+    _, (a, b) = _movie_with_showtimes(router, 2)
+    ok = router.post("/cart/batch", json={"user_id": "cici", "groups": [
+        {"showtime_id": a["id"], "seats": ["A1"]}, {"showtime_id": b["id"], "seats": ["A1", "A2"]}]})
+    assert ok.status_code == 200 and [i["showtime_id"] for i in ok.json()["items"]] == [a["id"], b["id"]]
+    assert ok.json()["total"] == 30000
+
+    # b/A1 sudah dipegang cici -> reserve di shard `a` dibatalkan lagi
+    bad = router.post("/cart/batch", json={"user_id": "dodi", "groups": [
+        {"showtime_id": a["id"], "seats": ["B1"]}, {"showtime_id": b["id"], "seats": ["A1"]}]})
+    assert bad.status_code == 400
+    assert router.get(f"/showtimes/{a['id']}/seats").json()["B1"] == "available"
+    assert router.get("/cart/dodi").json()["items"] == []
+
+
+def test_reports_are_summed_across_shards(router):
+    mv, shows = _movie_with_showtimes(router, 2)
+    for s in shows:
+        router.post("/cart/add", json={"user_id": "rudi", "showtime_id": s["id"], "seats": ["A1", "A2"]})
+    assert router.post("/checkout", json={"user_id": "rudi"}).status_code == 200
+
+    occ = router.get("/admin/reports/occupancy", params={"group": "movie", "format": "ndjson"}).text.splitlines()
+    assert {"movie_id": mv["id"], "showtimes": 2, "total": 20, "available": 16, "reserved": 0,
+            "booked": 4, "blocked": 0, "fill_rate": 0.2} in map(json.loads, occ)
+    revenue = router.get("/admin/reports/revenue", params={"group": "movie"}).text.splitlines()
+    assert f"{mv['id']},1,4,40000.0,0.0,40000.0" in revenue
+
+
+def test_pricing_rules_and_quotes_span_shards(router):
+    _, shows = _movie_with_showtimes(router, 2)
+    rules = {"seat_tiers": {"standard": 2.0}, "promos": [{"code": "HALF", "percent": 50}]}
+    assert router.put("/admin/pricing", json=rules).status_code == 200
+    try:
+        for n in (0, 1):
+            assert _shard(router, n, "GET", "/admin/pricing").json()["seat_tiers"] == {"standard": 2.0}
+        q = router.post("/pricing/quote", json={"promo_code": "half", "items": [
+            {"showtime_id": s["id"], "seats": ["A1"]} for s in shows]}).json()
+        assert [i["showtime_id"] for i in q["items"]] == [s["id"] for s in shows]
+        assert q["total"] == 40000 and q["total_paid"] == 20000
+    finally:
+        router.put("/admin/pricing", json={})
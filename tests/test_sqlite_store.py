@@ -0,0 +1,164 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.schemas import Movie, Showtime, SeatStatus
+from app.sqlite_store import SQLiteStore
+
+client = TestClient(app)
+
+_LOAD = """
+import json, sys
+from app import storage
+from app.sqlite_store import SQLiteStore
+store = SQLiteStore(sys.argv[1]).open()
+st_id = int(sys.argv[2])
+print(json.dumps({
+    "info": store.recovery,
+    "seats": {k: v.value for k, v in storage.seats_map(st_id).items()},
+    "cart": storage.get_cart("rani"),
+    "tickets": [b["booking_code"] for b in storage.list_bookings_by_user("rani")],
+    "pricing": storage.get_pricing().seat_tiers,
+}))
+store.close()
+"""
+
+_BUYER = """
+import sys
+from fastapi import HTTPException
+from app import crud
+from app.sqlite_store import SQLiteStore
+store = SQLiteStore(sys.argv[1]).open()
+print("ready", flush=True)
+sys.stdin.readline()
+try:
+    crud.add_to_cart(sys.argv[2], 1, ["A1"])
+    print(crud.checkout(sys.argv[2], None)["booking_code"])
+except HTTPException as e:
+    print(e.status_code)
+store.close()
+"""
+
+
+def _env():
+    return {**os.environ, "PYTHONPATH": os.path.join(os.path.dirname(__file__), "..", "movie_booking")}
+
+
+def _store(tmp_path):
+    store = SQLiteStore(str(tmp_path / "booking.db"), pool_size=4)
+    store.save_movie(Movie(id=1, title="Jaws", duration_min=124))
+    store.save_showtime(Showtime(id=1, movie_id=1, day="2025-10-15", time="19:00", studio="S1",
+                                 price=50000, rows=2, cols=4, disabled_seats=["B4"]))
+    return store
+
+
+def test_conditional_update_reserves_once(tmp_path):
+    store = _store(tmp_path)
+    assert store.seats_map(1)["B4"] == SeatStatus.blocked
+
+    def grab(i):
+        return store.reserve_into_cart(f"u{i}", (f"item{i}", 1, ["A1", "A2"]))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(grab, range(16)))
+    assert results.count(None) == 1
+    assert store.transition_seats(1, ["A3", "B4"], SeatStatus.available, SeatStatus.reserved) == "B4"
+    assert store.seats_map(1)["A3"] == SeatStatus.available   # batch gagal -> tidak ada yang berubah
+    store.close()
+
+
+def test_checkout_transaction(tmp_path):
+    store = _store(tmp_path)
+    assert store.reserve_into_cart("ivy", ("c1", 1, ["A1"])) is None
+    booking = {"booking_code": "BKG-1", "user_id": "ivy",
+               "items": [{"id": "c1", "showtime_id": 1, "seats": ["A1"], "subtotal": 50000}]}
+    assert store.finalize_checkout("ivy", booking) is None
+    assert store.get_cart("ivy") == []
+    assert store.seats_map(1)["A1"] == SeatStatus.booked
+    assert [b["booking_code"] for b in store.list_bookings_by_user("ivy")] == ["BKG-1"]
+    # checkout ulang: kursi sudah booked -> dibatalkan
+    assert store.finalize_checkout("ivy", {**booking, "booking_code": "BKG-2"}) == "A1"
+    assert store.get_booking("BKG-2") is None
+    store.close()
+
+
+def test_storage_routes_writes_through_sqlite(tmp_path):
+    path = str(tmp_path / "app.db")
+    store = SQLiteStore(path).open()
+    try:
+        mv = client.post("/admin/movies", json={"title": "Heat", "duration_min": 170}).json()
+        st = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+            "day": "2025-12-06", "time": "20:00", "studio": "S9", "price": 40000, "rows": 1, "cols": 4,
+            "disabled_seats": ["A4"]}).json()
+        client.post("/cart/add", json={"user_id": "rani", "showtime_id": st["id"], "seats": ["A1"]})
+        code = client.post("/checkout", json={"user_id": "rani"}).json()["booking_code"]
+        item = client.post("/cart/add", json={"user_id": "rani", "showtime_id": st["id"], "seats": ["A2"]}).json()
+        client.put("/admin/pricing", json={"seat_tiers": {"standard": 1.0, "vip": 1.5}})
+        assert store.stats["commits"] >= 1
+        # response baru dikirim setelah transaksi SQLite-nya commit
+        assert store.seats_map(st["id"])["A1"] == SeatStatus.booked
+        assert store.get_cart("rani") == [(item["id"], st["id"], ["A2"])]
+    finally:
+        client.put("/admin/pricing", json={})
+        store.close()
+
+    out = subprocess.run([sys.executable, "-c", _LOAD, path, str(st["id"])],
+                         capture_output=True, text=True, env=_env(), check=True)
+    state = json.loads(out.stdout)
+    assert state["seats"] == {"A1": "booked", "A2": "reserved", "A3": "available", "A4": "blocked"}
+    assert state["cart"] == [[item["id"], st["id"], ["A2"]]]
+    assert state["tickets"] == [code]
+    assert state["pricing"] == {"standard": 1.0, "vip": 1.0}
+    assert state["info"]["orphan_seats_released"] == 0
+
+
+def test_two_processes_cannot_sell_the_same_seat(tmp_path):
+    path = str(tmp_path / "shared.db")
+    store = SQLiteStore(path)
+    store.save_movie(Movie(id=1, title="Jaws", duration_min=124))
+    store.save_showtime(Showtime(id=1, movie_id=1, day="2025-10-15", time="19:00", studio="S1",
+                                 price=50000, rows=1, cols=2))
+    store.close()
+
+    # dua proses memuat state yang sama (A1 available di memori keduanya), lalu berebut
+    procs = [subprocess.Popen([sys.executable, "-c", _BUYER, path, user], stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE, text=True, env=_env()) for user in ("p1", "p2")]
+    for p in procs:
+        assert p.stdout.readline().strip() == "ready"
+    for p in procs:
+        p.stdin.write("go\n")
+        p.stdin.flush()
+    results = sorted(p.communicate(timeout=60)[0].strip() for p in procs)
+    assert results[0] == "400" and results[1].startswith("BKG-")
+
+    store = SQLiteStore(path)
+    assert store.seats_map(1)["A1"] == SeatStatus.booked
+    assert [len(store.list_bookings_by_user(u)) for u in ("p1", "p2")] in ([1, 0], [0, 1])
+    store.close()
+
+
+def test_writer_failure_leaves_seat_map_untouched(tmp_path, monkeypatch):
+    from app import sqlite_store, storage
+    store = SQLiteStore(str(tmp_path / "broken.db")).open()
+    try:
+        mv = client.post("/admin/movies", json={"title": "Alien", "duration_min": 117}).json()
+        st = client.post(f"/admin/movies/{mv['id']}/showtimes", json={
+            "day": "2025-12-07", "time": "20:00", "studio": "S9", "price": 40000, "rows": 1, "cols": 2}).json()
+
+        def broken(*args):
+            raise sqlite3.OperationalError("disk I/O error")
+
+        monkeypatch.setitem(sqlite_store._OPS, "save_movie", broken)
+        failing = TestClient(app, raise_server_exceptions=False)
+        assert failing.post("/admin/movies", json={"title": "Aliens", "duration_min": 137}).status_code == 500
+        # writer mati -> klaim kursi gagal SEBELUM seat map lokal berubah
+        assert failing.post("/cart/add", json={"user_id": "tia", "showtime_id": st["id"], "seats": ["A1"]}).status_code == 500
+        assert storage.seats_map(st["id"]).check(["A1"], SeatStatus.available) is None
+        assert storage.get_cart("tia") in (None, [])
+    finally:
+        store.close()